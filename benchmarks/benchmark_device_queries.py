@@ -0,0 +1,88 @@
+"""
+Compares the time and memory used to serve a device listing when hydrating full Device
+ORM objects versus selecting only the columns that are serialised.
+
+Run from the repository root, with the environment variables used by the unit tests set:
+
+    python -m benchmarks.benchmark_device_queries --devices 100000
+"""
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from flask_batteries_included.sqldb import db
+
+from dhos_activation_auth_api.app import create_app
+from dhos_activation_auth_api.models.device import Device
+
+
+def populate(count: int) -> None:
+    now = datetime.utcnow()
+    rows = [
+        {
+            "uuid": str(uuid.uuid4()),
+            "created": now + timedelta(microseconds=i),
+            "created_by_": "benchmark",
+            "modified": now + timedelta(microseconds=i),
+            "modified_by_": "benchmark",
+            "location_id": "L1",
+            "description": f"Device {i}",
+            "hashed_authorisation_code": os.urandom(49),
+            "active": True,
+        }
+        for i in range(count)
+    ]
+    db.session.bulk_insert_mappings(Device, rows)
+    db.session.commit()
+
+
+def hydrated() -> List[Dict]:
+    return [d.to_dict() for d in Device.query.filter(Device.active.is_(True)).all()]
+
+
+def projected() -> List[Dict]:
+    rows = db.session.query(*Device.dict_columns()).filter(Device.active.is_(True))
+    return [Device.row_to_dict(r) for r in rows.all()]
+
+
+def measure(fn: Callable[[], List[Dict]], repeat: int) -> Tuple[float, int]:
+    best_time = float("inf")
+    peak_memory = 0
+    for _ in range(repeat):
+        db.session.expunge_all()
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        best_time = min(best_time, time.perf_counter() - start)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best_time, peak_memory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app(testing=True, use_pgsql=False, use_sqlite=True)
+    with app.app_context():
+        populate(args.devices)
+        results = {
+            "hydrated ORM objects": measure(hydrated, args.repeat),
+            "projected columns": measure(projected, args.repeat),
+        }
+
+    print(f"Listing {args.devices} devices (best of {args.repeat}):")
+    for name, (seconds, peak) in results.items():
+        print(f"  {name:<22} {seconds * 1000:8.1f} ms  {peak / 2**20:8.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares the time taken to generate secure random strings by calling
+Cryptodome.Random.random.choice once per character against drawing one block of OS
+randomness per string and rejection sampling it, as helpers.utils now does.
+
+Run from the repository root:
+
+    python -m benchmarks.benchmark_random_strings --count 20000
+"""
+import argparse
+import string
+import time
+from typing import Callable, Dict, List
+
+import Cryptodome.Random.random as crr
+
+from dhos_activation_auth_api.helpers import utils
+
+
+def per_character_random_string(length: int) -> str:
+    return "".join(crr.choice(utils.random_choices) for _ in range(length))
+
+
+def per_character_human_readable_string(length: int) -> str:
+    return "".join(
+        crr.choice(
+            list(set(utils.random_choices) - set(utils.not_human_readable_choices))
+        )
+        for _ in range(length)
+    )
+
+
+def per_character_numeric_string(length: int) -> str:
+    return "".join(crr.choice(list(string.digits)) for _ in range(length))
+
+
+def measure(fn: Callable[[int], str], length: int, count: int, repeat: int) -> float:
+    best_time = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            fn(length)
+        best_time = min(best_time, time.perf_counter() - start)
+    return best_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cases: List[Dict] = [
+        {
+            "name": "random (length 10)",
+            "length": 10,
+            "before": per_character_random_string,
+            "after": utils.generate_secure_random_string,
+        },
+        {
+            "name": "human readable (length 4)",
+            "length": 4,
+            "before": per_character_human_readable_string,
+            "after": utils.generate_secure_human_readable_string,
+        },
+        {
+            "name": "numeric (length 6)",
+            "length": 6,
+            "before": per_character_numeric_string,
+            "after": utils.generate_secure_numeric_string,
+        },
+    ]
+
+    print(f"Generating {args.count} strings (best of {args.repeat}):")
+    for case in cases:
+        before = measure(case["before"], case["length"], args.count, args.repeat)
+        after = measure(case["after"], case["length"], args.count, args.repeat)
+        print(
+            f"  {case['name']:<26} per character {before * 1000:8.1f} ms"
+            f"  batched {after * 1000:8.1f} ms  ({before / after:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compares index size and primary key lookup latency for activation tables keyed by text
+(varchar(36)) and by native uuid columns. Needs PostgreSQL, as the difference is in how
+PostgreSQL stores the keys.
+
+Run from the repository root, with the DATABASE_* environment variables pointing at a
+scratch database:
+
+    python -m benchmarks.benchmark_uuid_keys --activations 10000000
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Tuple
+
+from flask_batteries_included.sqldb import db
+
+from dhos_activation_auth_api.app import create_app
+
+KEY_TYPES = {"text": "varchar(36)", "uuid": "uuid"}
+
+
+def populate(key_type: str, count: int) -> str:
+    table = f"benchmark_{key_type}_keys"
+    column_type = KEY_TYPES[key_type]
+    db.session.execute(db.text(f"DROP TABLE IF EXISTS {table}"))
+    db.session.execute(
+        db.text(
+            f"CREATE TABLE {table} (uuid {column_type} PRIMARY KEY, "
+            f"patient_id {column_type} NOT NULL, code varchar(36) NOT NULL)"
+        )
+    )
+    # Ten activations per patient, as for patients who are re-sent their activation.
+    db.session.execute(
+        db.text(
+            f"INSERT INTO {table} "
+            f"SELECT md5(random()::text || i)::uuid::{column_type}, "
+            f"md5((i / 10)::text)::uuid::{column_type}, md5(i::text) "
+            f"FROM generate_series(1, :count) AS i"
+        ),
+        {"count": count},
+    )
+    db.session.execute(
+        db.text(f"CREATE INDEX ix_{table}_patient_id ON {table} (patient_id)")
+    )
+    db.session.execute(db.text(f"ANALYZE {table}"))
+    db.session.commit()
+    return table
+
+
+def index_sizes(table: str) -> Tuple[int, int]:
+    primary_key, patient_id = db.session.execute(
+        db.text(
+            f"SELECT pg_relation_size('{table}_pkey'), "
+            f"pg_relation_size('ix_{table}_patient_id')"
+        )
+    ).one()
+    return primary_key, patient_id
+
+
+def lookup_latency(table: str, lookups: int) -> float:
+    keys: List[str] = [
+        str(k)
+        for (k,) in db.session.execute(
+            db.text(f"SELECT uuid FROM {table} TABLESAMPLE SYSTEM (1) LIMIT :lookups"),
+            {"lookups": lookups},
+        )
+    ]
+    random.shuffle(keys)
+    query = db.text(
+        f"SELECT a.code FROM {table} a JOIN {table} b ON a.patient_id = b.patient_id "
+        "WHERE b.uuid = :uuid"
+    )
+    start = time.perf_counter()
+    for key in keys:
+        db.session.execute(query, {"uuid": key}).all()
+    return (time.perf_counter() - start) / len(keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--activations", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    app = create_app(testing=False, use_pgsql=True)
+    results: Dict[str, Tuple[int, int, float]] = {}
+    with app.app_context():
+        for key_type in KEY_TYPES:
+            table = populate(key_type, args.activations)
+            results[key_type] = (
+                *index_sizes(table),
+                lookup_latency(table, args.lookups),
+            )
+            db.session.execute(db.text(f"DROP TABLE {table}"))
+            db.session.commit()
+
+    print(f"{args.activations} activations, {args.lookups} lookups:")
+    for key_type, (primary_key, patient_id, latency) in results.items():
+        print(
+            f"  {key_type:<5} primary key {primary_key / 2**20:8.1f} MiB"
+            f"  patient_id index {patient_id / 2**20:8.1f} MiB"
+            f"  lookup and join {latency * 1e6:8.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
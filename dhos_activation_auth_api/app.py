@@ -10,7 +10,13 @@ from flask_batteries_included.sqldb import db, init_db
 from dhos_activation_auth_api import blueprint_api
 from dhos_activation_auth_api.blueprint_development import development_blueprint
 from dhos_activation_auth_api.config import init_config
+from dhos_activation_auth_api.helpers.cache import init_cache
 from dhos_activation_auth_api.helpers.cli import add_cli_command
+from dhos_activation_auth_api.helpers.db_pool import init_db_pool
+from dhos_activation_auth_api.helpers.hashing import init_hashing_executor
+from dhos_activation_auth_api.helpers.random_pool import init_random_pool
+from dhos_activation_auth_api.helpers.replica import init_read_replica
+from dhos_activation_auth_api.helpers.transactions import init_transaction_profiles
 
 
 def create_app(
@@ -36,8 +42,37 @@ def create_app(
     init_config(app)
 
     # Configure the SQL database
+    init_db_pool(app)
     init_db(app=app, testing=testing)
 
+    # Read-only mode and timeouts for the transactions of controller functions.
+    init_transaction_profiles(app)
+
+    # Optional read replica for read-only endpoints.
+    init_read_replica(app)
+
+    # Per-process cache of clinician authorisation details used by SEND Entry logins.
+    init_cache(
+        app,
+        name="clinician_auth",
+        max_size=app.config["CLINICIAN_AUTH_CACHE_MAX_SIZE"],
+        ttl_seconds=app.config["CLINICIAN_AUTH_CACHE_TTL_SECONDS"],
+    )
+
+    # Per-process cache of device counts per location, for capacity dashboards.
+    init_cache(
+        app,
+        name="device_summary",
+        max_size=app.config["DEVICE_SUMMARY_CACHE_MAX_SIZE"],
+        ttl_seconds=app.config["DEVICE_SUMMARY_CACHE_TTL_SECONDS"],
+    )
+
+    # Thread pool for hashing batches of OTPs and authorisation codes in parallel.
+    init_hashing_executor(app, max_workers=app.config["HASHING_EXECUTOR_WORKERS"])
+
+    # Pool of codes and OTPs generated off the request path.
+    init_random_pool(app, max_size=app.config["RANDOM_STRING_POOL_SIZE"])
+
     # Initialise k-b-i library to allow publishing to RabbitMQ.
     kombu_batteries_included.init()
 
@@ -1,4 +1,5 @@
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 
 from flask import Blueprint, Response, g, jsonify, make_response, request
 from flask_batteries_included.helpers import schema
@@ -7,6 +8,8 @@ from flask_batteries_included.helpers.security import protected_route
 from flask_batteries_included.helpers.security.endpoint_security import scopes_present
 
 from dhos_activation_auth_api.blueprint_api import controller
+from dhos_activation_auth_api.helpers.conditional import conditional_response
+from dhos_activation_auth_api.helpers.streaming import stream_json_array
 from dhos_activation_auth_api.models.clinician import Clinician
 from dhos_activation_auth_api.models.device import Device
 
@@ -49,6 +52,82 @@ def create_patient_activation(patient_id: str) -> Response:
     return jsonify(controller.create_patient_activation(patient_id))
 
 
+@api_blueprint.route("/dhos/v1/patient/activation", methods=["POST"])
+@protected_route(scopes_present(required_scopes="write:gdm_activation"))
+def create_patient_activations() -> Response:
+    """---
+    post:
+      summary: Create patient activations in bulk
+      description: >-
+        Create a new activation for each of the specified patients, as when creating
+        a single patient activation, in a single transaction. Responds with the
+        one-time-pin and activation code for each patient, in the order of the
+        patient UUIDs provided.
+      tags: [patient-auth]
+      requestBody:
+        description: The UUIDs of the patients for which to create activations
+        required: true
+        content:
+          application/json:
+            schema: PatientActivationBatchRequest
+      responses:
+        '200':
+          description: The created patient activations
+          content:
+            application/json:
+              schema:
+                type: array
+                items: PatientActivationBatchResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    activation_details = schema.post(required={"patient_ids": [str]})
+    return jsonify(
+        controller.create_patient_activations(activation_details["patient_ids"])
+    )
+
+
+@api_blueprint.route("/dhos/v1/patient/activation/status", methods=["POST"])
+@protected_route(scopes_present(required_scopes="read:gdm_activation"))
+def get_patient_activation_statuses() -> Response:
+    """---
+    post:
+      summary: Get the activation status of patients in bulk
+      description: >-
+        Responds with when each of the specified patients most recently completed an
+        activation, or null for patients who never have.
+      tags: [patient-auth]
+      requestBody:
+        description: The UUIDs of the patients to look up
+        required: true
+        content:
+          application/json:
+            schema: PatientActivationBatchRequest
+      responses:
+        '200':
+          description: The activation status of each patient
+          content:
+            application/json:
+              schema:
+                type: array
+                items: PatientActivationStatus
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    status_details = schema.post(required={"patient_ids": [str]})
+    return jsonify(
+        controller.get_patient_activation_statuses(status_details["patient_ids"])
+    )
+
+
 @api_blueprint.route("/dhos/v1/patient/<patient_id>/activation", methods=["GET"])
 @protected_route(scopes_present(required_scopes="read:gdm_activation"))
 def get_patient_activations(patient_id: str) -> Response:
@@ -67,9 +146,49 @@ def get_patient_activations(patient_id: str) -> Response:
           schema:
             type: string
             example: ab3d9aa3-d5aa-406a-87b2-cd67ad872724
+        - name: activated_after
+          in: query
+          required: false
+          description: Only return activations completed at or after this time
+          schema:
+            type: string
+            format: date-time
+            example: '2020-01-01T00:00:00.000Z'
+        - name: activated_before
+          in: query
+          required: false
+          description: Only return activations completed before this time
+          schema:
+            type: string
+            format: date-time
+            example: '2021-01-01T00:00:00.000Z'
+        - name: limit
+          in: query
+          required: false
+          description: >-
+            Maximum number of activations to return. When set, the response includes
+            an `X-Next-Cursor` header if there may be further activations.
+          schema:
+            type: integer
+            minimum: 1
+            example: 20
+        - name: cursor
+          in: query
+          required: false
+          description: >-
+            Opaque cursor from the `X-Next-Cursor` header of a previous response, used
+            to fetch the next page of activations
+          schema:
+            type: string
+            example: MjAyMC0wMS0wMVQwMDowMDowMHwyYzRmMWQyNA==
       responses:
         '200':
           description: A list of patient activations
+          headers:
+            X-Next-Cursor:
+              description: Cursor from which to fetch the next page of activations
+              schema:
+                type: string
           content:
             application/json:
               schema:
@@ -82,7 +201,27 @@ def get_patient_activations(patient_id: str) -> Response:
             application/json:
               schema: Error
     """
-    return jsonify(controller.get_patient_activations(patient_id))
+    cursor: Optional[str] = RequestArg.string("cursor", default=None)
+    limit: Optional[int] = RequestArg.integer("limit", default=None)
+    activated_after: Optional[datetime] = RequestArg.iso8601_datetime(
+        "activated_after", default=None
+    )
+    activated_before: Optional[datetime] = RequestArg.iso8601_datetime(
+        "activated_before", default=None
+    )
+    activations: List[Dict] = controller.get_patient_activations(
+        patient_id,
+        cursor=cursor,
+        limit=limit,
+        activated_after=activated_after,
+        activated_before=activated_before,
+    )
+    response: Response = jsonify(activations)
+    if limit is not None and len(activations) == limit:
+        response.headers["X-Next-Cursor"] = controller.patient_activation_cursor(
+            activations[-1]
+        )
+    return response
 
 
 # This endpoint is protected by an authorisation code, not a JWT
@@ -287,6 +426,79 @@ def create_device() -> Response:
     return jsonify(controller.create_device(device_details, device_type))
 
 
+@api_blueprint.route("/dhos/v1/device/summary", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:send_device"))
+def get_device_summary() -> Response:
+    """---
+    get:
+      summary: Get device counts per location
+      description: >-
+        Responds with the number of active and inactive devices at each location,
+        ordered by location.
+      tags: [device-auth]
+      parameters:
+        - name: location_id
+          in: query
+          required: false
+          description: 'Comma-separated UUIDs of locations, for filtering the summary'
+          schema:
+            type: string
+            example: 2c4f1d24-2952-4d4e-b1d1-3637e33cc161
+      responses:
+        '200':
+          description: Device counts per location
+          content:
+            application/json:
+              schema:
+                type: array
+                items: DeviceLocationSummary
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    if request.is_json:
+        raise ValueError("Request should not contain a JSON body")
+    location_id: Optional[str] = RequestArg.string("location_id", default=None)
+    return jsonify(controller.get_device_summary(location_id))
+
+
+@api_blueprint.route("/dhos/v1/device/search", methods=["POST"])
+@protected_route(scopes_present(required_scopes="read:send_device"))
+def search_devices() -> Response:
+    """---
+    post:
+      summary: Get devices by UUID
+      description: >-
+        Get details of the known devices with the specified UUIDs. UUIDs which do
+        not match a known device are listed separately, rather than failing the
+        whole request.
+      tags: [device-auth]
+      requestBody:
+        description: The UUIDs of the devices to return
+        required: true
+        content:
+          application/json:
+            schema: DeviceSearchRequest
+      responses:
+        '200':
+          description: Details of the devices found, and the UUIDs not found
+          content:
+            application/json:
+              schema: DeviceSearchResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    search_details = schema.post(required={"uuids": [str]})
+    return jsonify(controller.search_devices(search_details["uuids"]))
+
+
 @api_blueprint.route("/dhos/v1/device/<device_id>", methods=["GET"])
 @protected_route(scopes_present(required_scopes="read:send_device"))
 def get_device_by_id(device_id: str) -> Response:
@@ -306,9 +518,16 @@ def get_device_by_id(device_id: str) -> Response:
       responses:
         '200':
           description: Details of the device
+          headers:
+            ETag:
+              description: Version of the device, for use in `If-None-Match`
+              schema:
+                type: string
           content:
             application/json:
               schema: Device
+        '304':
+          description: The device has not changed since the `If-None-Match` ETag
         default:
           description: >-
               Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
@@ -318,7 +537,10 @@ def get_device_by_id(device_id: str) -> Response:
     """
     if request.is_json:
         raise ValueError("Request should not contain a JSON body")
-    return jsonify(controller.get_device(device_id))
+    return conditional_response(
+        controller.get_device_etag(device_id),
+        lambda: jsonify(controller.get_device(device_id)),
+    )
 
 
 @api_blueprint.route("/dhos/v1/device/<device_id>", methods=["PATCH"])
@@ -395,6 +617,48 @@ def create_device_activation(device_id: str) -> Response:
     return jsonify(controller.create_device_activation(device_id))
 
 
+@api_blueprint.route("/dhos/v1/device/provision", methods=["POST"])
+@protected_route(scopes_present(required_scopes="write:send_device"))
+def provision_devices() -> Response:
+    """---
+    post:
+      summary: Provision devices in bulk
+      description: >-
+        Create several devices at a location, each with a new activation, in a single
+        transaction. Responds with the activation code for each device, in the order
+        of the descriptions provided.
+      tags: [device-auth]
+      requestBody:
+        description: The location and descriptions of the devices to create
+        required: true
+        content:
+          application/json:
+            schema: DeviceProvisionRequest
+      responses:
+        '200':
+          description: The created devices and their activation codes
+          content:
+            application/json:
+              schema:
+                type: array
+                items: DeviceProvisionResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    provision_details = schema.post(
+        required={"location_id": str, "descriptions": [str]}
+    )
+    return jsonify(
+        controller.provision_devices(
+            provision_details["location_id"], provision_details["descriptions"]
+        )
+    )
+
+
 # This endpoint is is protected by an authorisation code, not a JWT
 @api_blueprint.route("/dhos/v1/device/<device_id>/jwt", methods=["GET"])
 def get_device_jwt(device_id: str) -> Response:
@@ -465,14 +729,63 @@ def get_devices() -> Response:
           schema:
             type: boolean
             example: true
+        - name: limit
+          in: query
+          required: false
+          description: >-
+            Maximum number of devices to return. When set, the response includes an
+            `X-Next-Cursor` header if there may be further devices.
+          schema:
+            type: integer
+            minimum: 1
+            example: 100
+        - name: cursor
+          in: query
+          required: false
+          description: >-
+            Opaque cursor from the `X-Next-Cursor` header of a previous response, used
+            to fetch the next page of devices
+          schema:
+            type: string
+            example: MjAyMC0wMS0wMVQwMDowMDowMHwyYzRmMWQyNA==
+        - name: stream
+          in: query
+          required: false
+          description: >-
+            Whether to stream every matching device from the cursor onwards, rather than
+            returning a page. Cannot be combined with `limit`.
+          schema:
+            type: boolean
+            example: false
+        - name: include
+          in: query
+          required: false
+          description: >-
+            Comma-separated additional details to include with each device. The only
+            option is `activation_status`, which includes whether the device has been
+            activated and whether it has an unused activation.
+          schema:
+            type: string
+            example: activation_status
       responses:
         '200':
           description: A list of devices
+          headers:
+            ETag:
+              description: Version of the device list, for use in `If-None-Match`
+              schema:
+                type: string
+            X-Next-Cursor:
+              description: Cursor from which to fetch the next page of devices
+              schema:
+                type: string
           content:
             application/json:
               schema:
                 type: array
                 items: Device
+        '304':
+          description: The device list has not changed since the `If-None-Match` ETag
         default:
           description: >-
               Error, e.g. 400 Bad Request, 503 Service Unavailable
@@ -485,7 +798,155 @@ def get_devices() -> Response:
     device_type: Optional[str] = request.args.get("type", None)
     active: bool = RequestArg.active(default="true")
     location_id: Optional[str] = RequestArg.string("location_id", default=None)
-    return jsonify(controller.get_devices(device_type, active, location_id))
+    cursor: Optional[str] = RequestArg.string("cursor", default=None)
+    limit: Optional[int] = RequestArg.integer("limit", default=None)
+
+    include: Optional[str] = RequestArg.string("include", default=None)
+    stream: bool = RequestArg.boolean("stream", default="false")
+    if stream and limit is not None:
+        raise ValueError("Cannot combine stream and limit")
+
+    includes = set(include.split(",")) if include else set()
+    unknown_includes = includes - {"activation_status"}
+    if unknown_includes:
+        raise ValueError(f"Unknown include: {','.join(sorted(unknown_includes))}")
+    include_activation_status = "activation_status" in includes
+
+    def build_response() -> Response:
+        if stream:
+            return stream_json_array(
+                controller.stream_devices(
+                    active,
+                    location_id,
+                    cursor,
+                    include_activation_status=include_activation_status,
+                )
+            )
+        devices: List[Dict] = controller.get_devices(
+            device_type,
+            active,
+            location_id,
+            cursor=cursor,
+            limit=limit,
+            include_activation_status=include_activation_status,
+        )
+        response: Response = jsonify(devices)
+        if limit is not None and len(devices) == limit:
+            response.headers["X-Next-Cursor"] = controller.device_cursor(devices[-1])
+        return response
+
+    return conditional_response(
+        controller.get_devices_etag(
+            active, location_id, cursor, include_activation_status
+        ),
+        build_response,
+    )
+
+
+@api_blueprint.route("/dhos/v1/device", methods=["PATCH"])
+@protected_route(scopes_present(required_scopes="write:send_device"))
+def update_device_statuses() -> Response:
+    """---
+    patch:
+      summary: Activate or deactivate devices in bulk
+      description: >-
+        Activate or deactivate every device at a location, or every device with one
+        of the specified UUIDs. Exactly one of `location_id` and `uuids` must be
+        provided. Responds with the UUIDs of the devices whose status changed.
+      tags: [device-auth]
+      requestBody:
+        description: The status to set, and the devices to set it on
+        required: true
+        content:
+          application/json:
+            schema: DeviceStatusUpdate
+      responses:
+        '200':
+          description: The devices whose status changed
+          content:
+            application/json:
+              schema: DeviceStatusUpdateResponse
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    status_details = schema.post(
+        required={"active": bool}, optional={"location_id": str, "uuids": [str]}
+    )
+    device_ids: List[str] = controller.update_device_statuses(
+        status_details["active"],
+        status_details["location_id"],
+        status_details["uuids"] or None,
+    )
+    return jsonify({"device_ids": device_ids})
+
+
+@api_blueprint.route("/dhos/v1/device/changes", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:send_device"))
+def get_device_changes() -> Response:
+    """---
+    get:
+      summary: Get changes to devices
+      description: >-
+        Responds with the devices created, updated or deactivated since the provided
+        cursor, in the order they were modified, along with a cursor from which to
+        request subsequent changes. Clients keeping a local copy of the device list
+        should store the returned cursor and poll with it, rather than fetching the
+        whole list. Changes are not filtered by location, so that clients see
+        devices which have been moved away from a location. The most recent few
+        seconds of changes are held back until they are certain to be complete.
+      tags: [device-auth]
+      parameters:
+        - name: cursor
+          in: query
+          required: false
+          description: >-
+            Opaque cursor from a previous response, from which to return changes
+          schema:
+            type: string
+            example: MjAyMC0wMS0wMVQwMDowMDowMHwyYzRmMWQyNA==
+        - name: modified_since
+          in: query
+          required: false
+          description: >-
+            Return changes made at or after this time, when starting without a
+            cursor. Cannot be combined with `cursor`.
+          schema:
+            type: string
+            format: date-time
+            example: '2020-01-01T00:00:00.000Z'
+        - name: limit
+          in: query
+          required: false
+          description: Maximum number of devices to return
+          schema:
+            type: integer
+            minimum: 1
+            example: 100
+      responses:
+        '200':
+          description: Changed devices and a cursor for subsequent changes
+          content:
+            application/json:
+              schema: DeviceChanges
+        default:
+          description: >-
+              Error, e.g. 400 Bad Request, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    if request.is_json:
+        raise ValueError("Request should not contain a JSON body")
+    cursor: Optional[str] = RequestArg.string("cursor", default=None)
+    modified_since: Optional[datetime] = RequestArg.iso8601_datetime(
+        "modified_since", default=None
+    )
+    limit: Optional[int] = RequestArg.integer("limit", default=None)
+    return jsonify(controller.get_device_changes(cursor, modified_since, limit))
 
 
 # SHARED
@@ -518,6 +979,15 @@ def validate_activation(activation_code: str) -> Response:
           schema:
             type: string
             example: send_entry
+        - name: include_jwt
+          in: query
+          required: false
+          description: >-
+            Whether to also respond with a JWT, saving a request for one using the
+            authorisation code
+          schema:
+            type: boolean
+            example: true
       requestBody:
         description: The one time PIN that confirms the activation
         required: false
@@ -537,19 +1007,24 @@ def validate_activation(activation_code: str) -> Response:
                   - $ref: '#/components/schemas/ValidatePatientActivationResponse'
         default:
           description: >-
-              Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
+              Error, e.g. 400 Bad Request, 403 Forbidden, 404 Not Found, 503 Service Unavailable
           content:
             application/json:
               schema: Error
     """
     device_type: Optional[str] = request.args.get("type", None)
+    include_jwt: bool = RequestArg.boolean("include_jwt", default="false")
     if not device_type or device_type == "gdm":
         _json = schema.post(required={"otp": str})
         return jsonify(
-            controller.update_patient_activation(activation_code, _json["otp"])
+            controller.update_patient_activation(
+                activation_code, _json["otp"], include_jwt=include_jwt
+            )
         )
     elif device_type == "send_entry":
         return jsonify(
-            controller.update_device_activation(activation_code, device_type)
+            controller.update_device_activation(
+                activation_code, device_type, include_jwt=include_jwt
+            )
         )
     raise ValueError(f"Invalid device type: {device_type}")
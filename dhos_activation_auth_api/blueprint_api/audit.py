@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import kombu_batteries_included
 
@@ -68,3 +68,27 @@ def record_sendentry_device_update(
         },
     }
     kombu_batteries_included.publish_message(routing_key="dhos.34837004", body=audit)
+
+
+def record_sendentry_devices_update(
+    device_ids: List[str], clinician_id: str, updated_fields: Dict[str, Any]
+) -> None:
+    audit = {
+        "event_type": "SEND entry devices update",
+        "event_data": {
+            "device_ids": device_ids,
+            "clinician_id": clinician_id,
+            "updated_fields": updated_fields,
+        },
+    }
+    kombu_batteries_included.publish_message(routing_key="dhos.34837004", body=audit)
+
+
+def record_sendentry_clinicians_deactivated(
+    clinician_ids: List[str], reason: str
+) -> None:
+    audit = {
+        "event_type": "SEND entry clinicians deactivated",
+        "event_data": {"clinician_ids": clinician_ids, "reason": reason},
+    }
+    kombu_batteries_included.publish_message(routing_key="dhos.34837004", body=audit)
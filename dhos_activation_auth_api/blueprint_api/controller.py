@@ -1,6 +1,17 @@
 import uuid
-from datetime import date, datetime
-from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 from flask import current_app as app
 from flask_batteries_included.config import (
@@ -12,9 +23,12 @@ from flask_batteries_included.helpers.error_handler import (
     EntityNotFoundException,
 )
 from flask_batteries_included.helpers.security.jwt import current_jwt_user
+from flask_batteries_included.helpers.timestamp import join_timestamp
 from flask_batteries_included.sqldb import db, generate_uuid
+from flask_sqlalchemy import BaseQuery
 from jose import jwt as jose_jwt
 from she_logging import logger
+from sqlalchemy.exc import IntegrityError
 
 from dhos_activation_auth_api.blueprint_api import audit
 from dhos_activation_auth_api.blueprint_api.scopes import (
@@ -22,18 +36,35 @@ from dhos_activation_auth_api.blueprint_api.scopes import (
     get_send_entry_clinician_scope,
     get_send_entry_device_scope,
 )
+from dhos_activation_auth_api.helpers.cache import get_cache
+from dhos_activation_auth_api.helpers.hashing import hash_many_credentials
+from dhos_activation_auth_api.helpers.random_pool import (
+    generate_secure_human_readable_string,
+    generate_secure_numeric_string,
+    generate_secure_random_string,
+)
+from dhos_activation_auth_api.helpers.replica import reads_from_replica
+from dhos_activation_auth_api.helpers.transactions import (
+    READ_ONLY,
+    READ_WRITE,
+    stream_with_profile,
+    transaction_profile,
+)
 from dhos_activation_auth_api.helpers.utils import (
     calculate_end_of_day_expiry,
     check_device_activation_valid,
     check_patient_activation_valid,
+    decode_keyset_cursor,
+    decode_nullable_keyset_cursor,
+    encode_keyset_cursor,
     generate_seconds_from_now_expiry,
-    generate_secure_human_readable_string,
-    generate_secure_numeric_string,
-    generate_secure_random_string,
-    hash_ascii_with_salt,
+    hash_credential,
+    is_legacy_credential_hash,
     is_static_device_id,
     is_static_patient_id,
+    verify_credential,
 )
+from dhos_activation_auth_api.models.cache_generation import CacheGeneration
 from dhos_activation_auth_api.models.clinician import Clinician
 from dhos_activation_auth_api.models.device import Device
 from dhos_activation_auth_api.models.device_activation import DeviceActivation
@@ -41,9 +72,23 @@ from dhos_activation_auth_api.models.group import Group
 from dhos_activation_auth_api.models.patient import Patient
 from dhos_activation_auth_api.models.patient_activation import PatientActivation
 from dhos_activation_auth_api.models.product import Product
+from dhos_activation_auth_api.models.types import validate_identifier
+
+CLINICIAN_CACHE_GENERATION = "clinician"
+# Only incremented when devices are deleted, which other device writes don't need to do
+# as they change the devices' modified timestamps.
+DEVICE_CACHE_GENERATION = "device"
+
+# How many times to generate activation codes when one turns out to be in use already.
+ACTIVATION_CODE_ATTEMPTS = 3
+# The unique index on the codes of unused device activations.
+UNUSED_ACTIVATION_CODE_INDEX = "ix_device_activation_code_unused"
+
+T = TypeVar("T")
 
 
 def create_patient_activation(patient_id: str) -> Dict:
+    validate_identifier("patient_id", patient_id)
     existing_activation: Optional[
         PatientActivation
     ] = PatientActivation.query.filter_by(patient_id=patient_id, used=False).first()
@@ -61,19 +106,20 @@ def create_patient_activation(patient_id: str) -> Dict:
         existing_activation.modified = datetime.utcnow()
 
         otp = generate_secure_human_readable_string(app.config["OTP_LENGTH"]).lower()
-        otp_salt = generate_secure_random_string(app.config["SALT_LENGTH"])
-        hashed_otp = hash_ascii_with_salt(otp, otp_salt)
 
         # Add new OTP
-        existing_activation.otp_salt = otp_salt
-        existing_activation.hashed_otp = hashed_otp
+        existing_activation.otp_salt = None
+        existing_activation.hashed_otp = hash_credential(otp)
+
+        # Read the code before committing, as committing expires the activation.
+        activation_code: str = existing_activation.code
 
         db.session.add(existing_activation)
         db.session.commit()
 
         return {
             "otp": otp,
-            "activation_code": existing_activation.code,
+            "activation_code": activation_code,
             "expires_at": calculate_end_of_day_expiry(
                 datetime.utcnow(), app.config["ACTIVATION_EXPIRY_END_OF_NTH_DAY"]
             ),
@@ -93,8 +139,7 @@ def create_patient_activation(patient_id: str) -> Dict:
         )
         # Create lowercase OTP
         otp = generate_secure_human_readable_string(app.config["OTP_LENGTH"]).lower()
-        otp_salt = generate_secure_random_string(app.config["SALT_LENGTH"])
-        hashed_otp = hash_ascii_with_salt(otp, otp_salt)
+        hashed_otp = hash_credential(otp)
 
         # Save to database
 
@@ -108,7 +153,6 @@ def create_patient_activation(patient_id: str) -> Dict:
             uuid=generate_uuid(),
             patient_id=patient_id,
             code=internal_code,
-            otp_salt=otp_salt,
             hashed_otp=hashed_otp,
         )
 
@@ -125,19 +169,273 @@ def create_patient_activation(patient_id: str) -> Dict:
         }
 
 
-def get_patient_activations(patient_id: str) -> List[Dict]:
-    completed_activations = (
-        PatientActivation.query.filter(
-            PatientActivation.patient_id == patient_id, PatientActivation.used == True
+@transaction_profile(READ_WRITE)
+def create_patient_activations(patient_ids: List[str]) -> List[Dict]:
+    """
+    Creates or regenerates an activation for each patient, as create_patient_activation
+    does for one. Existing activations and patients are read with one query each, OTPs
+    are hashed in parallel, and the rows are written with one statement per table, all
+    in one transaction. Activations are returned in the order the patients were given.
+    """
+    requested: List[str] = list(dict.fromkeys(patient_ids))
+    max_batch_size: int = app.config["MAX_PATIENT_ACTIVATION_BATCH_SIZE"]
+    if not 1 <= len(requested) <= max_batch_size:
+        raise ValueError(
+            f"Can only create between 1 and {max_batch_size} activations at once"
         )
-        .order_by(PatientActivation.activated_timestamp.desc())
-        .all()
+    for patient_id in requested:
+        validate_identifier("patient_id", patient_id)
+
+    activations: Dict[str, Dict] = {}
+    batched: List[str] = requested
+    if is_not_production_environment():
+        # Static patients are only seen in lower environments, so keep their special
+        # handling rather than batching them, but in the same transaction.
+        static_patient_ids: List[str] = [
+            p for p in requested if is_static_patient_id(p)
+        ]
+        batched = [p for p in requested if not is_static_patient_id(p)]
+        static_activations: Dict[str, PatientActivation] = {}
+        if static_patient_ids:
+            for static_activation in PatientActivation.query.filter(
+                PatientActivation.patient_id.in_(static_patient_ids),
+                PatientActivation.used.is_(False),
+            ):
+                static_activations.setdefault(
+                    static_activation.patient_id, static_activation
+                )
+        for patient_id in static_patient_ids:
+            activations[patient_id] = {
+                "patient_id": patient_id,
+                **_stage_static_activation(
+                    patient_id, static_activations.get(patient_id)
+                ),
+            }
+
+    existing_activations: Dict[str, Tuple[str, str]] = {}
+    existing_patient_ids: Set[str] = set()
+    if batched:
+        for activation_uuid, patient_id, code in db.session.query(
+            PatientActivation.uuid, PatientActivation.patient_id, PatientActivation.code
+        ).filter(
+            PatientActivation.patient_id.in_(batched),
+            PatientActivation.used.is_(False),
+        ):
+            existing_activations.setdefault(patient_id, (activation_uuid, code))
+        existing_patient_ids = {
+            patient_id
+            for (patient_id,) in db.session.query(Patient.patient_id).filter(
+                Patient.patient_id.in_(batched)
+            )
+        }
+
+    otps: List[str] = [
+        generate_secure_human_readable_string(app.config["OTP_LENGTH"]).lower()
+        for _ in batched
+    ]
+    hashed_otps = hash_many_credentials(otps)
+
+    now = datetime.utcnow()
+    user_id: str = current_jwt_user()
+    identifier = {
+        "created": now,
+        "created_by_": user_id,
+        "modified": now,
+        "modified_by_": user_id,
+    }
+    new_patients: List[Dict] = []
+    new_activations: List[Dict] = []
+    regenerated_activations: List[Dict] = []
+    expires_at: datetime = calculate_end_of_day_expiry(
+        now, app.config["ACTIVATION_EXPIRY_END_OF_NTH_DAY"]
     )
+    for patient_id, otp, hashed_otp in zip(batched, otps, hashed_otps):
+        if patient_id in existing_activations:
+            # Existing activations keep their code but get a new OTP and a longer life.
+            activation_uuid, code = existing_activations[patient_id]
+            regenerated_activations.append(
+                {
+                    "activation_uuid": activation_uuid,
+                    "otp_salt": None,
+                    "hashed_otp": hashed_otp,
+                    "attempts_count": 0,
+                    "modified": now,
+                    "modified_by_": user_id,
+                }
+            )
+        else:
+            code = generate_secure_random_string(
+                app.config["AUTHORISATION_CODE_LENGTH"]
+            )
+            new_activations.append(
+                {
+                    "uuid": generate_uuid(),
+                    "patient_id": patient_id,
+                    "code": code,
+                    "otp_salt": None,
+                    "hashed_otp": hashed_otp,
+                    "used": False,
+                    "attempts_count": 0,
+                    **identifier,
+                }
+            )
+            if patient_id not in existing_patient_ids:
+                new_patients.append(
+                    {"uuid": generate_uuid(), "patient_id": patient_id, **identifier}
+                )
+        activations[patient_id] = {
+            "patient_id": patient_id,
+            "otp": otp,
+            "activation_code": code,
+            "expires_at": expires_at,
+        }
+
+    if new_patients:
+        db.session.execute(Patient.__table__.insert(), new_patients)
+    if new_activations:
+        db.session.execute(PatientActivation.__table__.insert(), new_activations)
+    if regenerated_activations:
+        activation_table = PatientActivation.__table__
+        db.session.execute(
+            activation_table.update()
+            .where(activation_table.c.uuid == db.bindparam("activation_uuid"))
+            .values(
+                otp_salt=db.bindparam("otp_salt"),
+                hashed_otp=db.bindparam("hashed_otp"),
+                attempts_count=db.bindparam("attempts_count"),
+                modified=db.bindparam("modified"),
+                modified_by_=db.bindparam("modified_by_"),
+            ),
+            regenerated_activations,
+        )
+    db.session.commit()
 
-    return [item.to_dict() for item in completed_activations]
+    return [activations[patient_id] for patient_id in requested]
 
 
-def update_patient_activation(code: str, otp: str) -> Dict:
+@reads_from_replica
+@transaction_profile(READ_ONLY)
+def get_patient_activations(
+    patient_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    activated_after: Optional[datetime] = None,
+    activated_before: Optional[datetime] = None,
+) -> List[Dict]:
+    """
+    Returns the patient's completed activations, most recent first, optionally within a
+    range of activation times and a page at a time.
+    """
+    completed_activations = PatientActivation.query.filter(
+        PatientActivation.patient_id == patient_id, PatientActivation.used == True
+    )
+
+    if activated_after is not None:
+        completed_activations = completed_activations.filter(
+            PatientActivation.activated_timestamp >= _naive_utc(activated_after)
+        )
+    if activated_before is not None:
+        completed_activations = completed_activations.filter(
+            PatientActivation.activated_timestamp < _naive_utc(activated_before)
+        )
+
+    if cursor is not None:
+        # Keyset pagination: continue from the last (activated_timestamp, uuid) already
+        # returned, in descending order with activations missing a timestamp first.
+        cursor_activated, cursor_uuid = decode_nullable_keyset_cursor(cursor)
+        if cursor_activated is None:
+            completed_activations = completed_activations.filter(
+                db.or_(
+                    PatientActivation.activated_timestamp.isnot(None),
+                    PatientActivation.uuid < cursor_uuid,
+                )
+            )
+        else:
+            completed_activations = completed_activations.filter(
+                db.or_(
+                    PatientActivation.activated_timestamp < cursor_activated,
+                    db.and_(
+                        PatientActivation.activated_timestamp == cursor_activated,
+                        PatientActivation.uuid < cursor_uuid,
+                    ),
+                )
+            )
+
+    # NULLs sort first, as PostgreSQL does by default for descending order, so the
+    # (patient_id, activated_timestamp DESC) index serves the query on any database.
+    completed_activations = completed_activations.order_by(
+        PatientActivation.activated_timestamp.desc().nullsfirst(),
+        PatientActivation.uuid.desc(),
+    )
+
+    if limit is not None:
+        max_page_size: int = app.config["MAX_ACTIVATION_PAGE_SIZE"]
+        if not 1 <= limit <= max_page_size:
+            raise ValueError(f"limit must be between 1 and {max_page_size}")
+        completed_activations = completed_activations.limit(limit)
+
+    return [item.to_dict() for item in completed_activations.all()]
+
+
+def patient_activation_cursor(activation: Dict) -> str:
+    activated: Optional[datetime] = activation["activation_completed"]
+    return encode_keyset_cursor(
+        None if activated is None else _naive_utc(activated), activation["uuid"]
+    )
+
+
+def _naive_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@reads_from_replica
+@transaction_profile(READ_ONLY)
+def get_patient_activation_statuses(patient_ids: List[str]) -> List[Dict]:
+    """
+    Returns when each patient most recently completed an activation, or None if they
+    never have, ranking each patient's activations in a single query.
+    """
+    requested: List[str] = list(dict.fromkeys(patient_ids))
+    max_batch_size: int = app.config["MAX_PATIENT_ACTIVATION_BATCH_SIZE"]
+    if len(requested) > max_batch_size:
+        raise ValueError(f"Cannot look up more than {max_batch_size} patients at once")
+
+    latest: Dict[str, Optional[datetime]] = {}
+    if requested:
+        ranked = (
+            db.session.query(
+                PatientActivation.patient_id,
+                PatientActivation.activated_timestamp,
+                PatientActivation.activated_timezone,
+                db.func.row_number()
+                .over(
+                    partition_by=PatientActivation.patient_id,
+                    order_by=PatientActivation.activated_timestamp.desc(),
+                )
+                .label("rank"),
+            )
+            .filter(
+                PatientActivation.patient_id.in_(requested),
+                PatientActivation.used.is_(True),
+                PatientActivation.activated_timestamp.isnot(None),
+            )
+            .subquery()
+        )
+        latest = {
+            row.patient_id: join_timestamp(
+                row.activated_timestamp, row.activated_timezone
+            )
+            for row in db.session.query(ranked).filter(ranked.c.rank == 1)
+        }
+    return [
+        {"patient_id": patient_id, "activation_completed": latest.get(patient_id)}
+        for patient_id in requested
+    ]
+
+
+def update_patient_activation(code: str, otp: str, include_jwt: bool = False) -> Dict:
 
     # Get activation if not used and previous attempts count <= 10
     existing_activation: Optional[PatientActivation] = PatientActivation.query.filter(
@@ -147,10 +445,8 @@ def update_patient_activation(code: str, otp: str) -> Dict:
     ).first()
 
     # Check OTP - if no match, increment attempts count in the database and trigger entity not found exception
-    if (
-        existing_activation is not None
-        and existing_activation.hashed_otp
-        != hash_ascii_with_salt(otp, existing_activation.otp_salt)
+    if existing_activation is not None and not verify_credential(
+        otp, existing_activation.hashed_otp, existing_activation.otp_salt
     ):
         logger.debug("Incorrect hash supplied")
 
@@ -172,13 +468,10 @@ def update_patient_activation(code: str, otp: str) -> Dict:
     authorisation_code = generate_secure_random_string(
         app.config["AUTHORISATION_CODE_LENGTH"]
     )
-    authorisation_code_salt = generate_secure_random_string(app.config["SALT_LENGTH"])
-    hashed_authorisation_code = hash_ascii_with_salt(
-        authorisation_code, authorisation_code_salt
+    existing_activation.patient.hashed_authorisation_code = hash_credential(
+        authorisation_code
     )
-
-    existing_activation.patient.hashed_authorisation_code = hashed_authorisation_code
-    existing_activation.patient.authorisation_code_salt = authorisation_code_salt
+    existing_activation.patient.authorisation_code_salt = None
 
     # Mark activation as used unless in non-prod and patient ID is static
     if is_production_environment() or not is_static_patient_id(
@@ -190,37 +483,91 @@ def update_patient_activation(code: str, otp: str) -> Dict:
     # default activated date to current server time
     existing_activation.activated_timestamp = datetime.utcnow()
     existing_activation.activated_timezone = 0
-    db.session.add(existing_activation)
-    db.session.commit()
-
-    return {
+    response = {
         "authorisation_code": authorisation_code,
         "patient_id": existing_activation.patient.patient_id,
     }
+    db.session.add(existing_activation)
+    db.session.commit()
+
+    if include_jwt:
+        # The authorisation code was generated above, so there is no need to hash it
+        # again to check it as get_patient_jwt would.
+        response.update(_generate_patient_jwt(response["patient_id"]))
+    return response
+
+
+# Credentials are checked on the primary, as a replica may not yet have the hash
+# written by a recent activation.
+@transaction_profile(READ_ONLY)
+def _find_patient(patient_id: str) -> Optional[Patient]:
+    return Patient.query.filter_by(patient_id=patient_id).first()
 
 
 def get_patient_jwt(patient_id: str, code: str) -> Dict:
-    patient: Optional[Patient] = Patient.query.filter_by(patient_id=patient_id).first()
+    patient: Optional[Patient] = _find_patient(patient_id)
 
     if not patient:
         logger.info("Patient not found with UUID %s", patient_id)
         raise EntityNotFoundException("Invalid combination of patient_id and code")
 
-    hashed_authorisation_code = hash_ascii_with_salt(
-        code, patient.authorisation_code_salt
-    )
-
-    if patient.hashed_authorisation_code != hashed_authorisation_code:
+    if not verify_credential(
+        code, patient.hashed_authorisation_code, patient.authorisation_code_salt
+    ):
         logger.info("Patient provided incorrect authorisation code")
-        logger.debug(
-            "Could not match authorisation hash",
-            extra={
-                "provided_hash": hashed_authorisation_code,
-                "expected_hash": patient.hashed_authorisation_code,
-            },
-        )
         raise EntityNotFoundException("Invalid combination of patient_id and code")
 
+    if is_legacy_credential_hash(patient.hashed_authorisation_code):
+        _rehash_legacy_authorisation_code(
+            Patient, patient.uuid, patient.hashed_authorisation_code, code
+        )
+
+    return _generate_patient_jwt(patient_id)
+
+
+def _rehash_legacy_authorisation_code(
+    model: Any, uuid: str, legacy_hash: bytes, authorisation_code: str
+) -> None:
+    """
+    Replaces a verified authorisation code's legacy hash with one in the current format.
+    This only changes how the code is stored, so the modified fields are left alone. The
+    row is left unchanged if its hash is no longer the one that was verified, as when it
+    has been activated again since.
+    """
+    table = model.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.uuid == uuid, table.c.hashed_authorisation_code == legacy_hash)
+        .values(
+            hashed_authorisation_code=hash_credential(authorisation_code),
+            authorisation_code_salt=None,
+            modified=table.c.modified,
+            modified_by_=table.c.modified_by_,
+        )
+    )
+    db.session.commit()
+
+
+def _update_returning(
+    table: Any, criteria: List[Any], values: Dict[str, Any], returning: Any
+) -> List[str]:
+    """
+    Updates the rows of `table` matching `criteria` with one UPDATE, returning the
+    `returning` column of each row it changed. Databases without UPDATE ... RETURNING
+    (SQLite, as used by the unit tests) select the rows with the same criteria first,
+    within the same transaction.
+    """
+    update = table.update().where(*criteria).values(**values)
+    if db.session().get_bind().dialect.full_returning:
+        return list(db.session.execute(update.returning(returning)).scalars())
+    updated: List[str] = list(
+        db.session.execute(db.select(returning).where(*criteria)).scalars()
+    )
+    db.session.execute(update)
+    return updated
+
+
+def _generate_patient_jwt(patient_id: str) -> Dict:
     key, alg, iss = _retrieve_key_alg_iss_for_signing()
 
     jwt_payload = {
@@ -258,6 +605,7 @@ def create_clinician(clinician: Dict) -> None:
     c.groups = groups
 
     db.session.add(c)
+    CacheGeneration.increment(CLINICIAN_CACHE_GENERATION)
     db.session.commit()
 
 
@@ -285,29 +633,44 @@ def update_clinician(clinician_id: str, clinician: Dict) -> None:
     clinician_db.groups = groups
 
     db.session.add(clinician_db)
+    CacheGeneration.increment(CLINICIAN_CACHE_GENERATION)
     db.session.commit()
 
 
 def _get_or_create_products(product_names: List[str]) -> List[Product]:
+    existing: Dict[str, Product] = {
+        product.name: product
+        for product in (
+            Product.query.filter(Product.name.in_(product_names)).all()
+            if product_names
+            else []
+        )
+    }
     products = []
     for product_name in product_names:
-        product: Optional[Product] = Product.query.filter(
-            Product.name == product_name
-        ).first()
+        product: Optional[Product] = existing.get(product_name)
         if product is None:
             product = Product(uuid=generate_uuid(), name=product_name)
             db.session.add(product)
+            existing[product_name] = product
         products.append(product)
     return products
 
 
 def _get_or_create_groups(group_names: List[str]) -> List[Group]:
+    existing: Dict[str, Group] = {
+        group.name: group
+        for group in (
+            Group.query.filter(Group.name.in_(group_names)).all() if group_names else []
+        )
+    }
     groups = []
     for group_name in group_names:
-        group: Optional[Group] = Group.query.filter(Group.name == group_name).first()
+        group: Optional[Group] = existing.get(group_name)
         if group is None:
             group = Group(uuid=generate_uuid(), name=group_name)
             db.session.add(group)
+            existing[group_name] = group
         groups.append(group)
     return groups
 
@@ -319,12 +682,53 @@ def clinician_has_send_entry_access(clinician: Clinician) -> bool:
     return False
 
 
-def create_clinician_jwt(
-    send_entry_identifier: str, device_uuid: str
-) -> Dict[str, str]:
+class ClinicianAuthSnapshot(NamedTuple):
+    clinician_id: str
+    login_active: bool
+    contract_expiry_eod_date: Optional[date]
+    send_entry_access: bool
+    generation: int
+
+
+def _get_clinician_auth_snapshot(
+    send_entry_identifier: str,
+) -> Optional[ClinicianAuthSnapshot]:
+    """
+    Returns the details needed to authorise a SEND Entry login, from the per-process
+    cache where possible. Cached snapshots are discarded as soon as any clinician is
+    written, as tracked by the clinician cache generation in the database.
+    """
+    generation: int = CacheGeneration.current(CLINICIAN_CACHE_GENERATION)
+    cache = get_cache("clinician_auth")
+    snapshot: Optional[ClinicianAuthSnapshot] = cache.get(
+        send_entry_identifier, is_valid=lambda s: s.generation == generation
+    )
+    if snapshot is not None:
+        return snapshot
+
     clinician: Optional[Clinician] = Clinician.query.filter_by(
         send_entry_identifier=send_entry_identifier
     ).first()
+    if clinician is None:
+        return None
+
+    snapshot = ClinicianAuthSnapshot(
+        clinician_id=clinician.clinician_id,
+        login_active=clinician.login_active,
+        contract_expiry_eod_date=clinician.contract_expiry_eod_date_,
+        send_entry_access=clinician_has_send_entry_access(clinician),
+        generation=generation,
+    )
+    cache.set(send_entry_identifier, snapshot)
+    return snapshot
+
+
+def create_clinician_jwt(
+    send_entry_identifier: str, device_uuid: str
+) -> Dict[str, str]:
+    clinician: Optional[ClinicianAuthSnapshot] = _get_clinician_auth_snapshot(
+        send_entry_identifier
+    )
 
     if clinician is None:
         logger.info(
@@ -338,16 +742,14 @@ def create_clinician_jwt(
         )
         raise EntityNotFoundException("Invalid clinician identifier")
 
-    if (
-        clinician.contract_expiry_eod_date_ is not None
-        and date.today() > clinician.contract_expiry_eod_date_
-        and clinician.login_active
-    ):
-        # Clinician is a temporary user whose access has expired. Mark the login as inactive.
-        clinician.login_active = False
-        db.session.commit()
+    # Clinicians whose contract has expired are treated as inactive even if the
+    # scheduled deactivation job has not yet caught up with them.
+    contract_expired: bool = (
+        clinician.contract_expiry_eod_date is not None
+        and date.today() > clinician.contract_expiry_eod_date
+    )
 
-    if clinician.login_active is False:
+    if not clinician.login_active or contract_expired:
         audit.record_sendentry_login_failure(
             device_id=device_uuid,
             reason="Clinician contract expired",
@@ -356,7 +758,7 @@ def create_clinician_jwt(
         )
         raise PermissionError("Clinician is not active")
 
-    if not clinician_has_send_entry_access(clinician):
+    if not clinician.send_entry_access:
         logger.info(
             "Unauthorized clinician attempted to access SEND Entry using identifier '%s'",
             send_entry_identifier,
@@ -385,6 +787,45 @@ def create_clinician_jwt(
     return {"jwt": jose_jwt.encode(claims=jwt_payload, key=key, algorithm=alg)}
 
 
+@transaction_profile(READ_WRITE)
+def deactivate_expired_clinicians() -> List[str]:
+    """
+    Deactivates the login of every clinician whose contract expired before today, using
+    a single set-based UPDATE that returns the clinicians it deactivated. Intended to be
+    run periodically so that expired accounts are deactivated even if the clinician
+    never attempts to log in.
+    """
+    clinicians = Clinician.__table__
+    expired_clinician_ids: List[str] = _update_returning(
+        clinicians,
+        criteria=[
+            clinicians.c.contract_expiry_eod_date < date.today(),
+            clinicians.c.login_active.is_(True),
+        ],
+        values={
+            "login_active": False,
+            "modified": datetime.utcnow(),
+            "modified_by_": "dhos-activation-auth-api",
+        },
+        returning=clinicians.c.clinician_id,
+    )
+    if not expired_clinician_ids:
+        db.session.rollback()
+        logger.info("No clinicians with expired contracts to deactivate")
+        return []
+
+    CacheGeneration.increment(CLINICIAN_CACHE_GENERATION)
+    db.session.commit()
+
+    logger.info(
+        "Deactivated %d clinicians with expired contracts", len(expired_clinician_ids)
+    )
+    audit.record_sendentry_clinicians_deactivated(
+        clinician_ids=expired_clinician_ids, reason="Clinician contract expired"
+    )
+    return expired_clinician_ids
+
+
 def _retrieve_key_alg_iss_for_signing() -> Tuple[str, str, str]:
     issuer = app.config["HS_ISSUER"]
 
@@ -403,21 +844,29 @@ def _reset_static_activation(
     Creates or resets a static activation for a static patient. This is required because
     static patients have a special activation code that never changes and is reusable.
     """
+    response: Dict = _stage_static_activation(patient_id, activation)
+    db.session.commit()
+    return response
+
+
+def _stage_static_activation(
+    patient_id: str, activation: Optional[PatientActivation]
+) -> Dict:
+    """
+    Adds a static patient's activation to the session, as _reset_static_activation
+    does, without committing.
+    """
     logger.debug("Resetting static activation for patient with UUID %s", patient_id)
     static_id: str = patient_id[-1]
     otp = (static_id * app.config["OTP_LENGTH"])[: app.config["OTP_LENGTH"]]
 
     if activation is None:
         logger.debug("Creating new activation for patient with UUID %s", patient_id)
-        otp_salt = generate_secure_random_string(app.config["SALT_LENGTH"])
-        hashed_otp = hash_ascii_with_salt(otp, otp_salt)
-
         # Create the activation.
         activation = PatientActivation(
             uuid=generate_uuid(),
             code=static_id,
-            otp_salt=otp_salt,
-            hashed_otp=hashed_otp,
+            hashed_otp=hash_credential(otp),
             patient_id=patient_id,
             activated_timezone=0,
             activated_timestamp=datetime.utcnow(),
@@ -441,22 +890,16 @@ def _reset_static_activation(
         if existing_user is None:
             # Add the patient to the database.
             logger.debug("Creating database entry for patient with UUID %s", patient_id)
-            authorisation_code_salt = static_id * app.config["SALT_LENGTH"]
-            hashed_authorisation_code = hash_ascii_with_salt(
-                static_id, authorisation_code_salt
-            )
             patient = Patient(
                 uuid=generate_uuid(),
                 patient_id=patient_id,
-                hashed_authorisation_code=hashed_authorisation_code,
-                authorisation_code_salt=authorisation_code_salt,
+                hashed_authorisation_code=hash_credential(static_id),
                 created_by_="dhos-activation-auth-api",
                 modified_by_="dhos-activation-auth-api",
             )
             db.session.add(patient)
 
     db.session.add(activation)
-    db.session.commit()
 
     return {
         "otp": otp,
@@ -469,51 +912,431 @@ def _reset_static_activation(
 
 def create_device(device_details: Dict, device_type: Optional[str]) -> Dict:
     # TODO as more products are added, device_type will be used (remove leading underscore)
-    if "uuid" not in device_details:
+    if "uuid" in device_details:
+        # Only accepted outside production.
+        validate_identifier("uuid", device_details["uuid"])
+    else:
         device_details["uuid"] = str(uuid.uuid4())
     device = Device(**device_details)
     db.session.add(device)
+    # Serialise after the INSERT populates the audit columns but before committing, as
+    # committing expires the device and reading it again would need another SELECT.
+    db.session.flush()
+    response: Dict = device.to_dict()
     db.session.commit()
-    return device.to_dict()
+    return response
 
 
+@reads_from_replica
+@transaction_profile(READ_ONLY)
 def get_device(device_id: str) -> Dict:
-    device = Device.query.filter_by(uuid=device_id).first_or_404()
-    return device.to_dict()
+    device = (
+        db.session.query(*Device.dict_columns())
+        .filter(Device.uuid == device_id)
+        .first_or_404()
+    )
+    return Device.row_to_dict(device)
+
+
+@reads_from_replica
+@transaction_profile(READ_ONLY)
+def search_devices(device_ids: List[str]) -> Dict:
+    """
+    Returns the devices with the given UUIDs in a single query, listing separately any
+    UUIDs that do not match a device.
+    """
+    requested: List[str] = list(dict.fromkeys(device_ids))
+    max_search_size: int = app.config["MAX_DEVICE_PAGE_SIZE"]
+    if len(requested) > max_search_size:
+        raise ValueError(f"Cannot search for more than {max_search_size} devices")
+
+    found: Dict[str, Dict] = {}
+    if requested:
+        found = {
+            d.uuid: Device.row_to_dict(d)
+            for d in db.session.query(*Device.dict_columns())
+            .filter(Device.uuid.in_(requested))
+            .all()
+        }
+    return {
+        "devices": [found[uuid] for uuid in requested if uuid in found],
+        "missing": [uuid for uuid in requested if uuid not in found],
+    }
+
+
+class DeviceSummarySnapshot(NamedTuple):
+    locations: List[Dict]
+    fingerprint: Tuple[int, Optional[datetime]]
+
+
+def _device_summary_fingerprint() -> Tuple[int, Optional[datetime]]:
+    """
+    Returns the device cache generation, which changes when devices are deleted, and when
+    any device was last modified, which changes whenever a device is created or written.
+    Both are read in one query, the latter from the end of ix_device_modified_uuid.
+    """
+    generation = (
+        db.select(CacheGeneration.generation)
+        .where(CacheGeneration.name == DEVICE_CACHE_GENERATION)
+        .scalar_subquery()
+    )
+    current_generation, last_modified = db.session.query(
+        db.func.coalesce(generation, 0), db.func.max(Device.modified)
+    ).one()
+    return current_generation, last_modified
+
+
+@transaction_profile(READ_ONLY)
+def get_device_summary(location_id: Optional[str]) -> List[Dict]:
+    """
+    Returns the number of active and inactive devices at each location, from the
+    per-process cache where enabled. Cached summaries are discarded once the device
+    fingerprint changes; a write that commits with an earlier modified timestamp than
+    one already cached can go unnoticed until the cache TTL expires.
+    """
+    location_ids: Optional[Tuple[str, ...]] = (
+        tuple(sorted(set(location_id.split(",")))) if location_id else None
+    )
+    use_cache: bool = app.config["DEVICE_SUMMARY_CACHE_TTL_SECONDS"] > 0
+    if use_cache:
+        fingerprint = _device_summary_fingerprint()
+        cache = get_cache("device_summary")
+        snapshot: Optional[DeviceSummarySnapshot] = cache.get(
+            location_ids, is_valid=lambda s: s.fingerprint == fingerprint
+        )
+        if snapshot is not None:
+            return snapshot.locations
+
+    counts = db.session.query(
+        Device.location_id, Device.active, db.func.count(Device.uuid)
+    )
+    if location_ids is not None:
+        counts = counts.filter(Device.location_id.in_(location_ids))
+
+    summary: Dict[str, Dict] = {}
+    for row_location_id, active, count in counts.group_by(
+        Device.location_id, Device.active
+    ).order_by(Device.location_id):
+        location = summary.setdefault(
+            row_location_id,
+            {"location_id": row_location_id, "active": 0, "inactive": 0},
+        )
+        location["active" if active else "inactive"] = count
+    locations: List[Dict] = list(summary.values())
+
+    if use_cache:
+        cache.set(location_ids, DeviceSummarySnapshot(locations, fingerprint))
+    return locations
+
+
+@reads_from_replica
+@transaction_profile(READ_ONLY)
+def get_device_etag(device_id: str) -> str:
+    modified: datetime = (
+        db.session.query(Device.modified)
+        .filter(Device.uuid == device_id)
+        .first_or_404()
+        .modified
+    )
+    return f"{device_id}-{modified.isoformat()}"
 
 
 def update_device(device_id: str, _json: Dict) -> Dict:
-    device = Device.query.filter_by(uuid=device_id).first_or_404()
-    for key in _json:
-        setattr(device, key, _json[key])
-    db.session.add(device)
+    """
+    Updates the device with one UPDATE ... RETURNING the columns of the response.
+    Databases without UPDATE ... RETURNING (SQLite, as used by the unit tests) find the
+    device first, then update it.
+    """
+    response: Dict
+    if db.session().get_bind().dialect.full_returning:
+        devices = Device.__table__
+        row = db.session.execute(
+            devices.update()
+            .where(devices.c.uuid == device_id)
+            .values(**_json)
+            .returning(*Device.dict_columns())
+        ).first()
+        if row is None:
+            db.session.rollback()
+            raise EntityNotFoundException(f"Device not found: {device_id}")
+        response = Device.row_to_dict(row)
+    else:
+        device = Device.query.filter_by(uuid=device_id).first_or_404()
+        for key in _json:
+            setattr(device, key, _json[key])
+        db.session.add(device)
+        # As in create_device, serialise before committing to avoid reloading it.
+        db.session.flush()
+        response = device.to_dict()
     db.session.commit()
 
     audit.record_sendentry_device_update(
-        device_id=device.uuid,
+        device_id=response["uuid"],
         clinician_id=current_jwt_user(),
         updated_fields=_json,
     )
-    return device.to_dict()
+    return response
 
 
-def get_devices(
-    _device_type: Optional[str], active: bool, location_id: Optional[str]
-) -> List[Dict]:
-    # TODO as more products are added, device_type will be used (remove leading underscore)
+@transaction_profile(READ_WRITE)
+def update_device_statuses(
+    active: bool, location_id: Optional[str], device_ids: Optional[List[str]]
+) -> List[str]:
+    """
+    Activates or deactivates every device at a location, or with one of the given UUIDs,
+    using a single set-based UPDATE. Returns the UUIDs of the devices that changed.
+    """
+    if (location_id is None) == (device_ids is None):
+        raise ValueError("Exactly one of location_id and uuids must be provided")
+
+    devices = Device.__table__
+    criteria: List[Any] = [devices.c.active.isnot(active)]
+    if location_id is not None:
+        criteria.append(devices.c.location_id == location_id)
+    else:
+        max_update_size: int = app.config["MAX_DEVICE_PAGE_SIZE"]
+        if device_ids is not None and len(device_ids) > max_update_size:
+            raise ValueError(f"Cannot update more than {max_update_size} devices")
+        criteria.append(devices.c.uuid.in_(device_ids))
+
+    clinician_id: str = current_jwt_user()
+    # Bulk updates bypass the ORM, so the audit columns are set explicitly.
+    changed_device_ids: List[str] = _update_returning(
+        devices,
+        criteria=criteria,
+        values={
+            "active": active,
+            "modified": datetime.utcnow(),
+            "modified_by_": clinician_id,
+        },
+        returning=devices.c.uuid,
+    )
+    if not changed_device_ids:
+        db.session.rollback()
+        return []
+    db.session.commit()
+
+    audit.record_sendentry_devices_update(
+        device_ids=changed_device_ids,
+        clinician_id=clinician_id,
+        updated_fields={"active": active},
+    )
+    return changed_device_ids
 
-    devices = Device.query.filter(Device.active.is_(active))
+
+def _filter_device_list(
+    devices: BaseQuery,
+    active: bool,
+    location_id: Optional[str],
+    cursor: Optional[str],
+) -> BaseQuery:
+    devices = devices.filter(Device.active.is_(active))
 
     if location_id is not None:
         location_ids = location_id.split(",")
         devices = devices.filter(Device.location_id.in_(location_ids))
 
-    return [d.to_dict() for d in devices.all()]
+    if cursor is not None:
+        # Keyset pagination: continue from the last (created, uuid) already returned.
+        cursor_created, cursor_uuid = decode_keyset_cursor(cursor)
+        devices = devices.filter(
+            db.or_(
+                Device.created > cursor_created,
+                db.and_(Device.created == cursor_created, Device.uuid > cursor_uuid),
+            )
+        )
+
+    return devices
+
+
+def _activation_status_columns() -> Tuple:
+    """
+    Columns deriving each device's activation status within the device query, without
+    selecting its authorisation code hash.
+    """
+    return (
+        Device.hashed_authorisation_code.isnot(None).label("activated"),
+        db.exists()
+        .where(
+            db.and_(
+                DeviceActivation.device_id == Device.uuid,
+                DeviceActivation.used.is_(False),
+            )
+        )
+        .label("pending_activation"),
+    )
+
+
+def _device_list_row_to_dict(row: Any, include_activation_status: bool) -> Dict:
+    device = Device.row_to_dict(row)
+    if include_activation_status:
+        device["activation_status"] = {
+            "activated": bool(row.activated),
+            "pending_activation": bool(row.pending_activation),
+        }
+    return device
+
+
+def _device_list_query(
+    active: bool,
+    location_id: Optional[str],
+    cursor: Optional[str],
+    include_activation_status: bool = False,
+) -> BaseQuery:
+    columns = Device.dict_columns()
+    if include_activation_status:
+        columns += _activation_status_columns()
+    devices = db.session.query(*columns)
+    return _filter_device_list(devices, active, location_id, cursor).order_by(
+        Device.created, Device.uuid
+    )
+
+
+@reads_from_replica
+@transaction_profile(READ_ONLY)
+def get_devices_etag(
+    active: bool,
+    location_id: Optional[str],
+    cursor: Optional[str] = None,
+    include_activation_status: bool = False,
+) -> str:
+    """
+    Returns an ETag for the device list, which changes whenever a device joins, leaves or
+    is modified within it. Devices are never deleted, so a device leaving the list always
+    changes its count. Aggregating avoids loading the devices themselves.
+    """
+    columns: Tuple = (db.func.count(Device.uuid), db.func.max(Device.modified))
+    if include_activation_status:
+        # Creating an activation doesn't modify the device.
+        columns += (
+            db.session.query(db.func.max(DeviceActivation.modified)).scalar_subquery(),
+        )
+    count, *last_modified = _filter_device_list(
+        db.session.query(*columns), active, location_id, cursor
+    ).one()
+    return "-".join([str(count)] + [t.isoformat() if t else "" for t in last_modified])
+
+
+@reads_from_replica
+@transaction_profile(READ_ONLY)
+def get_devices(
+    _device_type: Optional[str],
+    active: bool,
+    location_id: Optional[str],
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_activation_status: bool = False,
+) -> List[Dict]:
+    # TODO as more products are added, device_type will be used (remove leading underscore)
+    devices = _device_list_query(active, location_id, cursor, include_activation_status)
+
+    if limit is not None:
+        max_page_size: int = app.config["MAX_DEVICE_PAGE_SIZE"]
+        if not 1 <= limit <= max_page_size:
+            raise ValueError(f"limit must be between 1 and {max_page_size}")
+        devices = devices.limit(limit)
+
+    return [
+        _device_list_row_to_dict(d, include_activation_status) for d in devices.all()
+    ]
+
+
+def stream_devices(
+    active: bool,
+    location_id: Optional[str],
+    cursor: Optional[str] = None,
+    include_activation_status: bool = False,
+) -> Iterator[Dict]:
+    """
+    Returns an iterator over devices which reads them in batches from a server-side
+    cursor, so that memory use does not grow with the number of devices matched. The
+    devices are read as the iterator is consumed, under the read-only profile.
+    """
+    devices = (
+        _device_list_query(active, location_id, cursor, include_activation_status)
+        .execution_options(stream_results=True)
+        .yield_per(app.config["DEVICE_STREAM_BATCH_SIZE"])
+    )
+    return stream_with_profile(
+        READ_ONLY,
+        lambda: (
+            _device_list_row_to_dict(d, include_activation_status) for d in devices
+        ),
+    )
+
+
+def device_cursor(device: Dict) -> str:
+    return encode_keyset_cursor(device["created"], device["uuid"])
+
+
+@transaction_profile(READ_ONLY)
+def get_device_changes(
+    cursor: Optional[str], modified_since: Optional[datetime], limit: Optional[int]
+) -> Dict:
+    """
+    Returns devices created, updated or deactivated since the cursor (or since
+    `modified_since`), in order of modification, along with a cursor from which to
+    request subsequent changes.
+    """
+    if cursor is not None and modified_since is not None:
+        raise ValueError("Cannot combine cursor and modified_since")
+
+    max_page_size: int = app.config["MAX_DEVICE_PAGE_SIZE"]
+    if limit is None:
+        limit = max_page_size
+    if not 1 <= limit <= max_page_size:
+        raise ValueError(f"limit must be between 1 and {max_page_size}")
+
+    # Only return changes old enough that any transaction which could still commit an
+    # earlier modified timestamp has finished, so that a client never skips past one.
+    settled_before = datetime.utcnow() - timedelta(
+        seconds=app.config["DEVICE_CHANGES_SETTLE_SECONDS"]
+    )
+    changes = db.session.query(*Device.dict_columns()).filter(
+        Device.modified <= settled_before
+    )
+
+    if modified_since is not None:
+        if modified_since.tzinfo is not None:
+            modified_since = modified_since.astimezone(timezone.utc)
+        cursor = encode_keyset_cursor(modified_since, "")
+
+    if cursor is not None:
+        cursor_modified, cursor_uuid = decode_keyset_cursor(cursor)
+        changes = changes.filter(
+            db.or_(
+                Device.modified > cursor_modified,
+                db.and_(Device.modified == cursor_modified, Device.uuid > cursor_uuid),
+            )
+        )
+
+    devices: List[Dict] = [
+        Device.row_to_dict(d)
+        for d in changes.order_by(Device.modified, Device.uuid).limit(limit).all()
+    ]
+
+    if devices:
+        cursor = encode_keyset_cursor(devices[-1]["modified"], devices[-1]["uuid"])
+    elif cursor is None:
+        cursor = encode_keyset_cursor(settled_before, "")
+
+    return {"devices": devices, "cursor": cursor, "more": len(devices) == limit}
 
 
 def create_device_activation(device_id: str) -> Dict:
-    Device.query.filter_by(uuid=device_id).first_or_404()
+    db.session.query(Device.uuid).filter(Device.uuid == device_id).first_or_404()
 
+    code: str = _retry_on_duplicate_code(lambda: _store_activation_code(device_id))
+
+    return {
+        "code": code,
+        "expires_at": calculate_end_of_day_expiry(
+            datetime.utcnow(), app.config["ACTIVATION_EXPIRY_END_OF_NTH_DAY"]
+        ),
+    }
+
+
+def _store_activation_code(device_id: str) -> str:
     existing_activation = DeviceActivation.query.filter_by(
         device_id=device_id, used=False
     ).first()
@@ -540,19 +1363,133 @@ def create_device_activation(device_id: str) -> Dict:
         db.session.add(activation)
     db.session.commit()
 
-    return {
-        "code": code,
-        "expires_at": calculate_end_of_day_expiry(
-            datetime.utcnow(), app.config["ACTIVATION_EXPIRY_END_OF_NTH_DAY"]
-        ),
+    return code
+
+
+def _retry_on_duplicate_code(write: Callable[[], T]) -> T:
+    """
+    Runs `write`, which generates activation codes and commits them. If another request
+    issued one of the same codes first, the unique index on unused codes rejects the
+    commit, so the transaction is rolled back and `write` runs again with new codes.
+    Other integrity errors are raised straight away.
+    """
+    attempt = 1
+    while True:
+        try:
+            return write()
+        except IntegrityError as e:
+            db.session.rollback()
+            if attempt == ACTIVATION_CODE_ATTEMPTS or not _is_duplicate_code(e):
+                raise
+            attempt += 1
+            logger.warning("Activation code already in use, generating new codes")
+
+
+def _is_duplicate_code(error: IntegrityError) -> bool:
+    constraint_name: Optional[str] = getattr(
+        getattr(error.orig, "diag", None), "constraint_name", None
+    )
+    if constraint_name is not None:
+        return constraint_name == UNUSED_ACTIVATION_CODE_INDEX
+    # SQLite reports the columns of the index rather than its name.
+    return "UNIQUE constraint failed: device_activation.code" in str(error.orig)
+
+
+def _generate_unused_activation_codes(count: int) -> List[str]:
+    """
+    Generates `count` distinct activation codes, none of which matches an existing unused
+    activation, checking each batch of candidates with a single query.
+    """
+    length: int = app.config["SEND_ENTRY_ACTIVATION_CODE_LENGTH"]
+    codes: Set[str] = set()
+    while len(codes) < count:
+        candidates: Set[str] = {
+            generate_secure_numeric_string(length) for _ in range(count - len(codes))
+        } - codes
+        in_use: Set[str] = {
+            code
+            for (code,) in db.session.query(DeviceActivation.code).filter(
+                DeviceActivation.code.in_(candidates), DeviceActivation.used.is_(False)
+            )
+        }
+        codes |= candidates - in_use
+    return list(codes)
+
+
+@transaction_profile(READ_WRITE)
+def provision_devices(location_id: str, descriptions: List[str]) -> List[Dict]:
+    """
+    Creates a device with an activation for each description, using one multi-row INSERT
+    for the devices and another for the activations, all in a single transaction. The
+    transaction is retried with new codes if another request issued one of them first.
+    """
+    max_provision_size: int = app.config["MAX_DEVICE_PROVISION_SIZE"]
+    if not 1 <= len(descriptions) <= max_provision_size:
+        raise ValueError(
+            f"Can only provision between 1 and {max_provision_size} devices at once"
+        )
+
+    now = datetime.utcnow()
+    user_id: str = current_jwt_user()
+    identifier = {
+        "created": now,
+        "created_by_": user_id,
+        "modified": now,
+        "modified_by_": user_id,
     }
+    devices: List[Dict] = [
+        {
+            "uuid": generate_uuid(),
+            "location_id": location_id,
+            "description": description,
+            "active": True,
+            **identifier,
+        }
+        for description in descriptions
+    ]
+
+    def insert_devices() -> List[Dict]:
+        codes: List[str] = _generate_unused_activation_codes(len(devices))
+        activations: List[Dict] = [
+            {
+                "uuid": generate_uuid(),
+                "device_id": device["uuid"],
+                "code": code,
+                "used": False,
+                **identifier,
+            }
+            for device, code in zip(devices, codes)
+        ]
+        db.session.execute(Device.__table__.insert(), devices)
+        db.session.execute(DeviceActivation.__table__.insert(), activations)
+        db.session.commit()
+        return activations
 
+    activations: List[Dict] = _retry_on_duplicate_code(insert_devices)
 
-def update_device_activation(activation_code: str, _device_type: Optional[str]) -> Dict:
+    expires_at: datetime = calculate_end_of_day_expiry(
+        now, app.config["ACTIVATION_EXPIRY_END_OF_NTH_DAY"]
+    )
+    return [
+        {
+            "device_id": device["uuid"],
+            "description": device["description"],
+            "code": activation["code"],
+            "expires_at": expires_at,
+        }
+        for device, activation in zip(devices, activations)
+    ]
+
+
+def update_device_activation(
+    activation_code: str, _device_type: Optional[str], include_jwt: bool = False
+) -> Dict:
     # TODO as more products are added, device_type will be used (remove leading underscore)
-    activation: Optional[DeviceActivation] = DeviceActivation.query.filter_by(
-        code=activation_code, used=False
-    ).first()
+    activation: Optional[DeviceActivation] = (
+        DeviceActivation.query.options(db.joinedload(DeviceActivation.device))
+        .filter_by(code=activation_code, used=False)
+        .first()
+    )
     if activation is None:
         logger.info("Invalid activation code supplied")
 
@@ -565,38 +1502,53 @@ def update_device_activation(activation_code: str, _device_type: Optional[str])
         # This is to satisfy type checking.
         raise EntityNotFoundException("Could not find relevant activation")
 
+    if include_jwt and not activation.device.active:
+        # Refuse before using up the activation, as get_device_jwt would refuse the JWT.
+        logger.info("Cannot issue JWT for inactive device: %s", activation.device.uuid)
+        audit.record_sendentry_device_auth_failure(
+            device_id=activation.device.uuid, reason="Device is inactive"
+        )
+        raise PermissionError("Could not retrieve JWT")
+
     authorisation_code = generate_secure_random_string(
         app.config["AUTHORISATION_CODE_LENGTH"]
     )
 
-    authorisation_code_salt = generate_secure_random_string(app.config["SALT_LENGTH"])
-    hashed_auth_code = hash_ascii_with_salt(authorisation_code, authorisation_code_salt)
-
-    activation.device.hashed_authorisation_code = hashed_auth_code
-    activation.device.authorisation_code_salt = authorisation_code_salt
+    activation.device.hashed_authorisation_code = hash_credential(authorisation_code)
+    activation.device.authorisation_code_salt = None
 
     # Mark activation as used unless it's a static device in a non-production environment.
     if is_production_environment() or not is_static_device_id(activation.device.uuid):
         activation.used = True
 
-    db.session.add(activation)
-    db.session.commit()
-
-    return {
+    response = {
         "authorisation_code": authorisation_code,
         "device_id": activation.device.uuid,
     }
+    db.session.add(activation)
+    db.session.commit()
+
+    if include_jwt:
+        # The authorisation code was generated above, so there is no need to hash it
+        # again to check it as get_device_jwt would.
+        audit.record_sendentry_device_auth_success(device_id=response["device_id"])
+        response.update(_generate_device_jwt(response["device_id"]))
+    return response
+
+
+# Credentials are checked on the primary, as a replica may not yet have the hash
+# written by a recent activation.
+@transaction_profile(READ_ONLY)
+def _find_device(device_id: str) -> Optional[Device]:
+    return Device.query.filter_by(uuid=device_id).first()
 
 
 def get_device_jwt(device_id: str, authorisation_code: str) -> Dict:
-    device: Optional[Device] = Device.query.filter_by(uuid=device_id).first()
+    device: Optional[Device] = _find_device(device_id)
     if not device:
         raise PermissionError("Invalid device ID")
 
-    if (
-        device.hashed_authorisation_code is None
-        or device.authorisation_code_salt is None
-    ):
+    if device.hashed_authorisation_code is None:
         logger.info(
             "Cannot get device JWT, device has not been activated: %s", device_id
         )
@@ -606,8 +1558,11 @@ def get_device_jwt(device_id: str, authorisation_code: str) -> Dict:
         )
         raise PermissionError("Invalid device identifier")
 
-    this_hash = hash_ascii_with_salt(authorisation_code, device.authorisation_code_salt)
-    valid = this_hash == device.hashed_authorisation_code
+    valid = verify_credential(
+        authorisation_code,
+        device.hashed_authorisation_code,
+        device.authorisation_code_salt,
+    )
 
     if not valid or not device.active:
         logger.info("Validation of auth code failed for device: %s", device_id)
@@ -617,12 +1572,21 @@ def get_device_jwt(device_id: str, authorisation_code: str) -> Dict:
         )
         raise PermissionError("Could not retrieve JWT")
 
+    if is_legacy_credential_hash(device.hashed_authorisation_code):
+        _rehash_legacy_authorisation_code(
+            Device, device.uuid, device.hashed_authorisation_code, authorisation_code
+        )
+
     audit.record_sendentry_device_auth_success(device_id=device.uuid)
 
+    return _generate_device_jwt(device.uuid)
+
+
+def _generate_device_jwt(device_id: str) -> Dict:
     key, alg, iss = _retrieve_key_alg_iss_for_signing()
 
     jwt_payload = {
-        "metadata": {"device_id": device.uuid},
+        "metadata": {"device_id": device_id},
         "iss": iss,
         "aud": iss,
         "scope": get_send_entry_device_scope(),
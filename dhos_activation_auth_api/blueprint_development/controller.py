@@ -1,5 +1,8 @@
 from flask_batteries_included.sqldb import db
 
+from dhos_activation_auth_api.blueprint_api.controller import DEVICE_CACHE_GENERATION
+from dhos_activation_auth_api.models.cache_generation import CacheGeneration
+
 
 def reset_database() -> None:
     session = db.session
@@ -8,5 +11,10 @@ def reset_database() -> None:
     session.execute("TRUNCATE TABLE patient cascade")
     session.execute("TRUNCATE TABLE device_activation cascade")
     session.execute("TRUNCATE TABLE device cascade")
+    # Invalidate in-process caches on every replica. The device generation is only
+    # written here, so may not exist yet.
+    session.execute("UPDATE cache_generation SET generation = generation + 1")
+    if session.query(CacheGeneration).get(DEVICE_CACHE_GENERATION) is None:
+        session.add(CacheGeneration(name=DEVICE_CACHE_GENERATION, generation=1))
     session.commit()
     session.close()
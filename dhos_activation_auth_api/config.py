@@ -1,3 +1,4 @@
+import os
 from typing import Optional
 
 from environs import Env
@@ -14,7 +15,6 @@ class Configuration:
         "ACTIVATION_EXPIRY_END_OF_NTH_DAY", 5
     )
     AUTHORISATION_CODE_LENGTH: int = env.int("AUTHORISATION_CODE_LENGTH", 30)
-    SALT_LENGTH: int = env.int("SALT_LENGTH", 30)
     JWT_EXPIRY_IN_SECONDS: int = env.int("JWT_EXPIRY_IN_SECONDS", 900)
     SEND_ENTRY_DEVICE_JWT_EXPIRY_IN_SECONDS: int = env.int(
         "SEND_ENTRY_DEVICE_JWT_EXPIRY_IN_SECONDS", 86400
@@ -29,6 +29,40 @@ class Configuration:
     )
     RSA_PRIVATE_KEY: Optional[str] = env.str("RSA_PRIVATE_KEY", None)
     HS_KEY: Optional[str] = env.str("HS_KEY", None)
+    MAX_DEVICE_PAGE_SIZE: int = env.int("MAX_DEVICE_PAGE_SIZE", 500)
+    DEVICE_STREAM_BATCH_SIZE: int = env.int("DEVICE_STREAM_BATCH_SIZE", 500)
+    MAX_DEVICE_PROVISION_SIZE: int = env.int("MAX_DEVICE_PROVISION_SIZE", 5000)
+    DEVICE_CHANGES_SETTLE_SECONDS: int = env.int("DEVICE_CHANGES_SETTLE_SECONDS", 5)
+    MAX_ACTIVATION_PAGE_SIZE: int = env.int("MAX_ACTIVATION_PAGE_SIZE", 100)
+    MAX_PATIENT_ACTIVATION_BATCH_SIZE: int = env.int(
+        "MAX_PATIENT_ACTIVATION_BATCH_SIZE", 2000
+    )
+    HASHING_EXECUTOR_WORKERS: int = env.int(
+        "HASHING_EXECUTOR_WORKERS", os.cpu_count() or 1
+    )
+    # One pooled connection per server thread (waitress defaults to 4), with a little
+    # overflow for bursts. These read the same variables as flask-batteries-included,
+    # but aren't named after them as Flask-SQLAlchemy would apply them to SQLite too.
+    DATABASE_POOL_SIZE: int = env.int("SQLALCHEMY_POOL_SIZE", 4)
+    DATABASE_MAX_OVERFLOW: int = env.int("SQLALCHEMY_MAX_OVERFLOW", 2)
+    DATABASE_POOL_TIMEOUT: int = env.int("SQLALCHEMY_POOL_TIMEOUT", 10)
+    DATABASE_POOL_RECYCLE: int = env.int("SQLALCHEMY_POOL_RECYCLE", 600)
+    DATABASE_POOL_PRE_PING: bool = env.bool("SQLALCHEMY_POOL_PRE_PING", True)
+    READ_STATEMENT_TIMEOUT_MS: int = env.int("READ_STATEMENT_TIMEOUT_MS", 5000)
+    WRITE_STATEMENT_TIMEOUT_MS: int = env.int("WRITE_STATEMENT_TIMEOUT_MS", 30000)
+    LOCK_TIMEOUT_MS: int = env.int("LOCK_TIMEOUT_MS", 2000)
+    REPLICA_DATABASE_HOST: Optional[str] = env.str("REPLICA_DATABASE_HOST", None)
+    REPLICA_MAX_LAG_SECONDS: float = env.float("REPLICA_MAX_LAG_SECONDS", 5)
+    REPLICA_RETRY_AFTER_SECONDS: float = env.float("REPLICA_RETRY_AFTER_SECONDS", 10)
+    RANDOM_STRING_POOL_SIZE: int = env.int("RANDOM_STRING_POOL_SIZE", 256)
+    DEVICE_SUMMARY_CACHE_MAX_SIZE: int = env.int("DEVICE_SUMMARY_CACHE_MAX_SIZE", 256)
+    DEVICE_SUMMARY_CACHE_TTL_SECONDS: int = env.int(
+        "DEVICE_SUMMARY_CACHE_TTL_SECONDS", 60
+    )
+    CLINICIAN_AUTH_CACHE_MAX_SIZE: int = env.int("CLINICIAN_AUTH_CACHE_MAX_SIZE", 2048)
+    CLINICIAN_AUTH_CACHE_TTL_SECONDS: int = env.int(
+        "CLINICIAN_AUTH_CACHE_TTL_SECONDS", 300
+    )
 
 
 def init_config(app: Flask) -> None:
@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+from flask import Flask, current_app
+from prometheus_client import Counter, Gauge
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+CACHE_HITS = Counter("activation_auth_cache_hits", "In-process cache hits", ["cache"])
+CACHE_MISSES = Counter(
+    "activation_auth_cache_misses", "In-process cache misses", ["cache"]
+)
+CACHE_EVICTIONS = Counter(
+    "activation_auth_cache_evictions",
+    "In-process cache evictions",
+    ["cache", "reason"],
+)
+CACHE_HIT_RATIO = Gauge(
+    "activation_auth_cache_hit_ratio",
+    "Ratio of in-process cache hits to lookups since the cache was created",
+    ["cache"],
+)
+
+
+class LruTtlCache(Generic[K, V]):
+    """
+    A thread-safe, bounded, in-process cache. Entries are evicted when the cache is full
+    (least recently used first) or when they are older than `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("Cache max_size must be at least 1")
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        CACHE_HIT_RATIO.labels(cache=name).set_function(lambda: self.hit_ratio)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, key: K, is_valid: Optional[Callable[[V], bool]] = None
+    ) -> Optional[V]:
+        """
+        Returns the cached value for `key`, or None if there isn't one. If `is_valid` is
+        provided and returns False for the cached value, the entry is evicted as stale.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self._clock() - stored_at > self.ttl_seconds:
+                    self._evict(key, reason="expired")
+                elif is_valid is not None and not is_valid(value):
+                    self._evict(key, reason="stale")
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    CACHE_HITS.labels(cache=self.name).inc()
+                    return value
+            self.misses += 1
+            CACHE_MISSES.labels(cache=self.name).inc()
+            return None
+
+    def set(self, key: K, value: V) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                oldest_key = next(iter(self._entries))
+                self._evict(oldest_key, reason="capacity")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self, key: K, reason: str) -> None:
+        del self._entries[key]
+        CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+
+
+def init_cache(app: Flask, name: str, max_size: int, ttl_seconds: float) -> None:
+    app.extensions[f"{name}_cache"] = LruTtlCache(
+        name=name, max_size=max_size, ttl_seconds=ttl_seconds
+    )
+
+
+def get_cache(name: str) -> LruTtlCache:
+    return current_app.extensions[f"{name}_cache"]
@@ -3,6 +3,7 @@ from flask import Flask
 from flask_batteries_included.helpers.apispec import generate_openapi_spec
 
 from dhos_activation_auth_api import blueprint_api
+from dhos_activation_auth_api.blueprint_api import controller
 from dhos_activation_auth_api.models.api_spec import dhos_activation_auth_api_spec
 
 
@@ -13,3 +14,9 @@ def add_cli_command(app: Flask) -> None:
         generate_openapi_spec(
             dhos_activation_auth_api_spec, output, blueprint_api.api_blueprint
         )
+
+    @app.cli.command("deactivate-expired-clinicians")
+    def deactivate_expired_clinicians() -> None:
+        """Deactivate the logins of clinicians whose contracts have expired."""
+        clinician_ids = controller.deactivate_expired_clinicians()
+        click.echo(f"Deactivated {len(clinician_ids)} clinician(s)")
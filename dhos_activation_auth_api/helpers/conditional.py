@@ -0,0 +1,17 @@
+from typing import Callable
+
+from flask import Response, request
+
+
+def conditional_response(etag: str, build_response: Callable[[], Response]) -> Response:
+    """
+    Responds with 304 Not Modified if the request's If-None-Match header matches `etag`,
+    without calling `build_response`. Otherwise builds the response and tags it with
+    `etag` in place of the hash of its body.
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = build_response()
+    response.set_etag(etag)
+    return response
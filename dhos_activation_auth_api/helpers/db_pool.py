@@ -0,0 +1,70 @@
+import time
+from typing import Any
+
+from flask import Flask
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+DB_POOL_SIZE = Gauge(
+    "activation_auth_db_pool_size", "Connections kept open in the database pool"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "activation_auth_db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "activation_auth_db_pool_overflow",
+    "Database connections open beyond the pool size",
+)
+DB_POOL_WAIT = Histogram(
+    "activation_auth_db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the database pool",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "activation_auth_db_pool_timeouts",
+    "Times a request gave up waiting for a database connection",
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    A QueuePool that publishes its occupancy and how long callers wait for connections,
+    so that the pool can be sized against the number of server threads.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # There is one pool per process; if it's recreated, report on the new one.
+        DB_POOL_SIZE.set_function(self.size)
+        DB_POOL_CHECKED_OUT.set_function(self.checkedout)
+        DB_POOL_OVERFLOW.set_function(lambda: max(self.overflow(), 0))
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+def init_db_pool(app: Flask) -> None:
+    """
+    Configures the database connection pool from the app config. SQLite, as used by the
+    unit tests, doesn't use a QueuePool so is left alone.
+    """
+    if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": app.config["DATABASE_POOL_SIZE"],
+        "max_overflow": app.config["DATABASE_MAX_OVERFLOW"],
+        "pool_timeout": app.config["DATABASE_POOL_TIMEOUT"],
+        "pool_recycle": app.config["DATABASE_POOL_RECYCLE"],
+        "pool_pre_ping": app.config["DATABASE_POOL_PRE_PING"],
+    }
@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+
+from flask import Flask, current_app
+
+from dhos_activation_auth_api.helpers.utils import hash_credential
+
+
+def init_hashing_executor(app: Flask, max_workers: int) -> None:
+    """
+    Creates a per-process thread pool for key derivation. scrypt runs in native code
+    which releases the GIL, so batches of hashes are computed in parallel.
+    """
+    app.extensions["hashing_executor"] = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="hashing"
+    )
+
+
+def hash_many_credentials(secrets: Iterable[str]) -> List[bytes]:
+    """
+    Hashes each secret on the hashing executor, returning the hashes in the same order.
+    """
+    executor: ThreadPoolExecutor = current_app.extensions["hashing_executor"]
+    return list(executor.map(hash_credential, secrets))
@@ -0,0 +1,138 @@
+import os
+from collections import deque
+from threading import Event, Lock, Thread
+from typing import Deque, Dict, List, Optional, Tuple
+
+from flask import Flask, current_app
+from prometheus_client import Counter
+
+from dhos_activation_auth_api.helpers.utils import (
+    generate_secure_string,
+    human_readable_choices,
+    numeric_choices,
+    random_choices,
+)
+
+POOL_TAKES = Counter(
+    "activation_auth_random_pool_takes",
+    "Secure random strings taken from the pre-generated pool",
+    ["source"],
+)
+
+# Strings are generated in batches so the lock isn't taken once per string.
+REFILL_BATCH_SIZE = 64
+
+
+class SecureStringPool:
+    """
+    A thread-safe, bounded pool of pre-generated secure random strings for each
+    (alphabet, length) requested. A background thread tops up each pool once it falls
+    below half full; if a pool is empty, strings are generated synchronously instead.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._pools: Dict[Tuple[str, int], Deque[str]] = {}
+        self._lock = Lock()
+        self._refill_needed = Event()
+        self._thread: Optional[Thread] = None
+        self._pid = os.getpid()
+
+    def available(self, alphabet: str, length: int) -> int:
+        with self._lock:
+            return len(self._pools.get((alphabet, length), ()))
+
+    def take(self, alphabet: str, length: int) -> str:
+        if self.max_size < 1:
+            POOL_TAKES.labels(source="generated").inc()
+            return generate_secure_string(length, alphabet)
+
+        key = (alphabet, length)
+        value: Optional[str] = None
+        with self._lock:
+            self._reset_if_forked()
+            pool = self._pools.get(key)
+            if pool:
+                value = pool.popleft()
+                if len(pool) < self.max_size // 2:
+                    self._start_refill()
+
+        if value is None:
+            POOL_TAKES.labels(source="generated").inc()
+            # Generating before registering the pool means invalid lengths are rejected
+            # here rather than in the background thread.
+            value = generate_secure_string(length, alphabet)
+            with self._lock:
+                self._pools.setdefault(key, deque())
+                self._start_refill()
+            return value
+
+        POOL_TAKES.labels(source="pool").inc()
+        return value
+
+    def refill(self) -> None:
+        """
+        Tops up every pool to `max_size`.
+        """
+        with self._lock:
+            keys = list(self._pools)
+        for key in keys:
+            alphabet, length = key
+            while True:
+                with self._lock:
+                    missing = self.max_size - len(self._pools[key])
+                if missing <= 0:
+                    break
+                batch: List[str] = [
+                    generate_secure_string(length, alphabet)
+                    for _ in range(min(missing, REFILL_BATCH_SIZE))
+                ]
+                with self._lock:
+                    pool = self._pools[key]
+                    pool.extend(batch[: self.max_size - len(pool)])
+
+    def _reset_if_forked(self) -> None:
+        # A forked worker must not hand out the same strings as its parent, and the
+        # parent's refill thread doesn't survive the fork.
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._pools.clear()
+            self._refill_needed = Event()
+            self._thread = None
+
+    def _start_refill(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = Thread(
+                target=self._refill_forever,
+                args=(self._refill_needed,),
+                name="random-pool-refill",
+                daemon=True,
+            )
+            self._thread.start()
+        self._refill_needed.set()
+
+    def _refill_forever(self, refill_needed: Event) -> None:
+        while True:
+            refill_needed.wait()
+            refill_needed.clear()
+            self.refill()
+
+
+def init_random_pool(app: Flask, max_size: int) -> None:
+    app.extensions["random_pool"] = SecureStringPool(max_size=max_size)
+
+
+def _pool() -> SecureStringPool:
+    return current_app.extensions["random_pool"]
+
+
+def generate_secure_random_string(length: int = 10) -> str:
+    return _pool().take(random_choices, length)
+
+
+def generate_secure_human_readable_string(length: int = 4) -> str:
+    return _pool().take(human_readable_choices, length)
+
+
+def generate_secure_numeric_string(length: int = 4) -> str:
+    return _pool().take(numeric_choices, length)
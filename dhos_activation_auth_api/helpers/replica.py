@@ -0,0 +1,170 @@
+import time
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Optional, TypeVar, cast
+
+from flask import Flask, current_app
+from flask_batteries_included.sqldb import db
+from prometheus_client import Counter
+from she_logging import logger
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from dhos_activation_auth_api.helpers.transactions import database_timeout_reason
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+REPLICA_READS = Counter(
+    "activation_auth_replica_reads",
+    "Read-only controller calls, by the database that served them",
+    ["database"],
+)
+
+
+class ReplicaRouter:
+    """
+    Decides whether reads can go to the read replica. The replica is skipped for
+    `retry_after_seconds` after it fails, or when it lags the primary by more than
+    `max_lag_seconds`, which is checked at most every `retry_after_seconds`.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        max_lag_seconds: float,
+        retry_after_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.engine = engine
+        self.max_lag_seconds = max_lag_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._unavailable_until = 0.0
+        self._lag_checked_at: Optional[float] = None
+
+    def available(self) -> bool:
+        with self._lock:
+            now = self._clock()
+            if now < self._unavailable_until:
+                return False
+            if (
+                self._lag_checked_at is not None
+                and now - self._lag_checked_at < self.retry_after_seconds
+            ):
+                return True
+            self._lag_checked_at = now
+
+        try:
+            lag = self.replication_lag()
+        except DBAPIError as e:
+            # A query that timed out would be just as slow on the primary.
+            if database_timeout_reason(e) is not None:
+                raise
+            logger.warning("Could not check read replica lag", exc_info=True)
+            self.mark_unavailable()
+            return False
+        if lag > self.max_lag_seconds:
+            logger.warning("Read replica is %.1f seconds behind the primary", lag)
+            self.mark_unavailable()
+            return False
+        return True
+
+    def replication_lag(self) -> float:
+        """
+        Returns how many seconds the replica is behind the primary. Only PostgreSQL
+        standbys can report this; other databases are assumed to be up to date.
+        """
+        if self.engine.dialect.name != "postgresql":
+            return 0.0
+        with self.engine.connect() as connection:
+            lag: Optional[float] = connection.execute(
+                db.text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()"
+                    " THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+                    " END"
+                )
+            ).scalar()
+        return float(lag or 0)
+
+    def mark_unavailable(self) -> None:
+        with self._lock:
+            self._unavailable_until = self._clock() + self.retry_after_seconds
+
+
+def init_read_replica(app: Flask) -> None:
+    """
+    Creates the read replica engine, if a replica is configured. The replica is reached
+    with the same credentials as the primary unless a full URI is given.
+    """
+    uri: Optional[str] = app.config.get("REPLICA_DATABASE_URI")
+    if uri is None and app.config["REPLICA_DATABASE_HOST"]:
+        uri = str(
+            make_url(app.config["SQLALCHEMY_DATABASE_URI"]).set(
+                host=app.config["REPLICA_DATABASE_HOST"]
+            )
+        )
+    if uri is None:
+        app.extensions.pop("replica_router", None)
+        return
+
+    engine_options = {
+        k: v
+        for k, v in app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}).items()
+        # The pool metrics report on the primary's pool.
+        if k != "poolclass"
+    }
+    if uri.startswith("sqlite"):
+        engine_options = {}
+    app.extensions["replica_router"] = ReplicaRouter(
+        engine=create_engine(uri, **engine_options),
+        max_lag_seconds=app.config["REPLICA_MAX_LAG_SECONDS"],
+        retry_after_seconds=app.config["REPLICA_RETRY_AFTER_SECONDS"],
+    )
+
+
+def reads_from_replica(fn: F) -> F:
+    """
+    Runs a read-only controller function against the read replica, if one is configured
+    and available, falling back to the primary if the replica fails. Objects it returns
+    are detached, and functions that return generators mustn't use this, as they would
+    run after the switch back to the primary.
+    """
+
+    @wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        router: Optional[ReplicaRouter] = current_app.extensions.get("replica_router")
+        primary_session = db.session()
+        # A transaction already in progress may have written, so must stay on the
+        # primary to see its own writes.
+        if router is None or primary_session.in_transaction() or not router.available():
+            REPLICA_READS.labels(database="primary").inc()
+            return fn(*args, **kwargs)
+
+        # The primary session binds every table to the primary engine, so the replica
+        # is read through a session of its own for the duration of the call.
+        replica_session = Session(bind=router.engine, query_cls=db.Query)
+        db.session.registry.set(replica_session)
+        try:
+            result = fn(*args, **kwargs)
+        except DBAPIError as e:
+            # A query that timed out would be just as slow on the primary.
+            if database_timeout_reason(e) is not None:
+                raise
+            logger.warning(
+                "Read replica failed, reading from the primary", exc_info=True
+            )
+            router.mark_unavailable()
+        else:
+            REPLICA_READS.labels(database="replica").inc()
+            return result
+        finally:
+            replica_session.close()
+            db.session.registry.set(primary_session)
+
+        REPLICA_READS.labels(database="primary").inc()
+        return fn(*args, **kwargs)
+
+    return cast(F, wrapper)
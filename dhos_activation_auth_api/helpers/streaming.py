@@ -0,0 +1,23 @@
+from typing import Any, Iterable, Iterator
+
+from flask import Response, json, stream_with_context
+
+
+def stream_json_array(items: Iterable[Any]) -> Response:
+    """
+    Streams `items` as a JSON array, serialising one item at a time rather than building
+    the whole response body in memory.
+    """
+
+    def generate() -> Iterator[bytes]:
+        yield b"["
+        for index, item in enumerate(items):
+            if index:
+                yield b","
+            yield json.dumps(item).encode("utf-8")
+        yield b"]"
+
+    response = Response(stream_with_context(generate()), mimetype="application/json")
+    # Stops the ETag handler from reading the entire body to generate a hash.
+    response.direct_passthrough = True
+    return response
@@ -0,0 +1,208 @@
+from functools import wraps
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+import flask
+from flask import Flask, Response, current_app
+from flask_batteries_included.helpers.error_handler import catch_database_exception
+from flask_batteries_included.sqldb import db
+from prometheus_client import Counter
+from she_logging import logger
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+F = TypeVar("F", bound=Callable[..., Any])
+T = TypeVar("T")
+
+# Names of the transaction profiles that controller functions can run under.
+READ_ONLY = "read_only"
+READ_WRITE = "read_write"
+
+# PostgreSQL error codes raised when statement_timeout or lock_timeout is exceeded.
+STATEMENT_TIMEOUT_PGCODE = "57014"
+LOCK_TIMEOUT_PGCODE = "55P03"
+
+DATABASE_TIMEOUTS = Counter(
+    "activation_auth_database_timeouts",
+    "Requests abandoned because the database took too long",
+    ["reason"],
+)
+
+
+class TransactionProfile(NamedTuple):
+    read_only: bool
+    statement_timeout_ms: int
+    lock_timeout_ms: int
+
+
+def init_transaction_profiles(app: Flask) -> None:
+    app.extensions["transaction_profiles"] = {
+        READ_ONLY: TransactionProfile(
+            read_only=True,
+            statement_timeout_ms=app.config["READ_STATEMENT_TIMEOUT_MS"],
+            lock_timeout_ms=app.config["LOCK_TIMEOUT_MS"],
+        ),
+        READ_WRITE: TransactionProfile(
+            read_only=False,
+            statement_timeout_ms=app.config["WRITE_STATEMENT_TIMEOUT_MS"],
+            lock_timeout_ms=app.config["LOCK_TIMEOUT_MS"],
+        ),
+    }
+    if not event.contains(Session, "after_begin", apply_transaction_profile):
+        event.listen(Session, "after_begin", apply_transaction_profile)
+
+    # Replaces the flask-batteries-included handler, which reports every operational
+    # error as a failed database connection.
+    app.register_error_handler(OperationalError, catch_database_error)
+    app.register_error_handler(PoolTimeoutError, catch_database_error)
+
+
+def apply_transaction_profile(
+    session: Session, _transaction: Any, connection: Any
+) -> None:
+    """
+    Configures each transaction as it begins according to the profile of the controller
+    function that began it. Only PostgreSQL supports these settings; SQLite, as used by
+    the unit tests, runs without them.
+    """
+    profile: Optional[TransactionProfile] = session.info.get("transaction_profile")
+    if profile is None or connection.dialect.name != "postgresql":
+        return
+    if profile.read_only:
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+    # SET LOCAL only lasts until the end of the transaction, so the pooled connection
+    # goes back to the server defaults afterwards.
+    connection.exec_driver_sql(
+        f"SET LOCAL statement_timeout = {int(profile.statement_timeout_ms)}"
+    )
+    connection.exec_driver_sql(
+        f"SET LOCAL lock_timeout = {int(profile.lock_timeout_ms)}"
+    )
+
+
+def transaction_profile(name: str) -> Callable[[F], F]:
+    """
+    Runs a controller function's database transactions under the named profile. A
+    read-only function's transaction is ended when it returns, so that later writes in
+    the same request start a read-write transaction, and objects it returns stay loaded.
+    If a transaction is already in progress, the function joins it unchanged.
+    """
+
+    def decorator(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            profile: TransactionProfile = current_app.extensions[
+                "transaction_profiles"
+            ][name]
+            session = db.session()
+            if session.in_transaction():
+                return fn(*args, **kwargs)
+
+            previous: Optional[TransactionProfile] = session.info.get(
+                "transaction_profile"
+            )
+            session.info["transaction_profile"] = profile
+            try:
+                result = fn(*args, **kwargs)
+                if profile.read_only and session.in_transaction():
+                    _end_read_only_transaction(session)
+            except Exception:
+                if profile.read_only:
+                    session.rollback()
+                raise
+            finally:
+                session.info["transaction_profile"] = previous
+            return result
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def stream_with_profile(name: str, items: Callable[[], Iterable[T]]) -> Iterator[T]:
+    """
+    Iterates over `items()` with its transactions run under the named profile, as
+    transaction_profile does for functions. This is for results that are read lazily,
+    such as streamed responses, which are only fetched after the controller function has
+    returned. A read-only transaction is ended when iteration finishes or is abandoned.
+    """
+    profile: TransactionProfile = current_app.extensions["transaction_profiles"][name]
+    session = db.session()
+    if session.in_transaction():
+        yield from items()
+        return
+
+    previous: Optional[TransactionProfile] = session.info.get("transaction_profile")
+    session.info["transaction_profile"] = profile
+    try:
+        yield from items()
+        if profile.read_only and session.in_transaction():
+            _end_read_only_transaction(session)
+    except BaseException:
+        # Includes GeneratorExit, when the client stops reading the stream.
+        if profile.read_only:
+            session.rollback()
+        raise
+    finally:
+        session.info["transaction_profile"] = previous
+
+
+def _end_read_only_transaction(session: Session) -> None:
+    # Nothing was written, so committing just ends the transaction. Objects that were
+    # read aren't expired, so using them doesn't query the database again.
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+
+def database_timeout_reason(error: BaseException) -> Optional[str]:
+    """
+    Returns why a database error was a timeout, or None if it wasn't one.
+    """
+    if isinstance(error, PoolTimeoutError):
+        return "pool"
+    if isinstance(error, DBAPIError):
+        pgcode: Optional[str] = getattr(error.orig, "pgcode", None)
+        if pgcode == STATEMENT_TIMEOUT_PGCODE:
+            return "statement"
+        if pgcode == LOCK_TIMEOUT_PGCODE:
+            return "lock"
+    return None
+
+
+# Reason -> (status code, message). A slow statement is a gateway timeout; waiting for
+# a lock or a pooled connection means the service is busy, so is worth retrying.
+_TIMEOUT_RESPONSES: Dict[str, Tuple[int, str]] = {
+    "statement": (504, "Database query timed out"),
+    "lock": (503, "Database is busy, please retry"),
+    "pool": (503, "Database is busy, please retry"),
+}
+
+
+def catch_database_error(error: Exception) -> Tuple[Response, int]:
+    reason: Optional[str] = database_timeout_reason(error)
+    if reason is None:
+        return catch_database_exception(error)
+
+    DATABASE_TIMEOUTS.labels(reason=reason).inc()
+    code, message = _TIMEOUT_RESPONSES[reason]
+    logger.warning("%s (%s timeout): %s", message, reason, error)
+    response: Response = flask.jsonify({"message": message})
+    if code == 503:
+        response.headers["Retry-After"] = "1"
+    return response, code
@@ -1,9 +1,12 @@
+import base64
+import binascii
+import hmac
 import string
 from datetime import datetime, timedelta
 from typing import Any, List, Optional, Tuple, Union
 
-import Cryptodome.Random.random as crr
 from Cryptodome.Protocol.KDF import scrypt
+from Cryptodome.Random import get_random_bytes
 from flask_batteries_included.config import is_production_environment
 
 from dhos_activation_auth_api.models.device_activation import DeviceActivation
@@ -11,6 +14,10 @@ from dhos_activation_auth_api.models.patient_activation import PatientActivation
 
 random_choices: str = string.ascii_uppercase + string.digits
 not_human_readable_choices: List[str] = ["O", "0", "L", "1", "I"]
+human_readable_choices: str = "".join(
+    c for c in random_choices if c not in not_human_readable_choices
+)
+numeric_choices: str = string.digits
 
 
 def _activation_expired(modified: datetime, number_of_days: int) -> bool:
@@ -19,40 +26,133 @@ def _activation_expired(modified: datetime, number_of_days: int) -> bool:
     return now > expiry_time
 
 
-def generate_secure_random_string(length: int = 10) -> str:
+def generate_secure_string(length: int, alphabet: str) -> str:
+    """
+    Generates a string of `length` characters drawn uniformly from `alphabet`. Random
+    bytes are drawn from the OS in blocks rather than one call per character, and bytes
+    that would bias the result towards the start of the alphabet are rejected.
+    """
     if length < 3:
         raise ValueError("Cannot generate a secure random string of length < 3")
 
-    letters: List[Any] = [crr.choice(random_choices) for _ in range(length)]
-    return "".join(letters)
+    alphabet_size = len(alphabet)
+    # The largest multiple of the alphabet size that fits in a byte; bytes at or above
+    # it are discarded so every character is equally likely.
+    limit = 256 - 256 % alphabet_size
+    # Over-draw by the expected rejection rate so one block nearly always suffices.
+    block_size = length * 256 // limit + 8
+    letters: List[str] = []
+    while len(letters) < length:
+        letters.extend(
+            alphabet[b % alphabet_size]
+            for b in get_random_bytes(block_size)
+            if b < limit
+        )
+    return "".join(letters[:length])
 
 
-def generate_secure_human_readable_string(length: int = 4) -> str:
-    if length < 3:
-        raise ValueError("Cannot generate a secure random string of length < 3")
+def generate_secure_random_string(length: int = 10) -> str:
+    return generate_secure_string(length, random_choices)
 
-    safe_choices = set(random_choices) - set(not_human_readable_choices)
 
-    letters: List[Any] = [crr.choice(list(safe_choices)) for _ in range(length)]
-    return "".join(letters)
+def generate_secure_human_readable_string(length: int = 4) -> str:
+    return generate_secure_string(length, human_readable_choices)
 
 
 def generate_secure_numeric_string(length: int = 4) -> str:
-    if length < 3:
-        raise ValueError("Cannot generate a secure random string of length < 3")
+    return generate_secure_string(length, numeric_choices)
+
+
+def encode_keyset_cursor(timestamp: Optional[datetime], uuid: str) -> str:
+    """
+    Encodes the sort key of the last item in a page as an opaque cursor, from which the
+    next page can be requested. A missing timestamp is encoded as an empty string.
+    """
+    encoded_timestamp = (
+        "" if timestamp is None else timestamp.replace(tzinfo=None).isoformat()
+    )
+    raw = f"{encoded_timestamp}|{uuid}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
 
-    letters: List[Any] = [crr.choice(list(string.digits)) for _ in range(length)]
-    return "".join(letters)
+
+def decode_keyset_cursor(cursor: str) -> Tuple[datetime, str]:
+    timestamp, uuid = decode_nullable_keyset_cursor(cursor)
+    if timestamp is None:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return timestamp, uuid
+
+
+def decode_nullable_keyset_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """
+    Decodes a cursor whose sort key may have a missing timestamp, for lists ordered by
+    a nullable column.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, uuid = raw.split("|", 1)
+        return (datetime.fromisoformat(timestamp) if timestamp else None), uuid
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+# Credential hashes are stored as a version byte, followed by the salt and the derived
+# key. Hashes from before the format was versioned are a bare 256-byte key, with the
+# salt stored as a string in a separate column.
+CREDENTIAL_HASH_VERSION = 1
+CREDENTIAL_SALT_BYTES = 16
+CREDENTIAL_KEY_BYTES = 32
 
 
 def hash_ascii_with_salt(
     ascii_string: str, salt: str
 ) -> Union[bytes, Tuple[bytes, ...]]:
+    """
+    Derives a legacy (unversioned) credential hash, only needed to verify credentials
+    stored before the versioned format was introduced.
+    """
     code_bytes: Any = bytes(ascii_string, "ascii")
     salt_bytes: Any = bytes(salt, "ascii")
     return scrypt(code_bytes, salt_bytes, 256, 16384, 8, 1)
 
 
+def derive_credential_key(secret: str, salt: bytes) -> bytes:
+    code_bytes: Any = bytes(secret, "ascii")
+    salt_bytes: Any = salt
+    key: Any = scrypt(code_bytes, salt_bytes, CREDENTIAL_KEY_BYTES, 16384, 8, 1)
+    return key
+
+
+def hash_credential(secret: str) -> bytes:
+    salt = get_random_bytes(CREDENTIAL_SALT_BYTES)
+    return bytes([CREDENTIAL_HASH_VERSION]) + salt + derive_credential_key(secret, salt)
+
+
+def is_legacy_credential_hash(stored_hash: bytes) -> bool:
+    return (
+        len(stored_hash) != 1 + CREDENTIAL_SALT_BYTES + CREDENTIAL_KEY_BYTES
+        or stored_hash[0] != CREDENTIAL_HASH_VERSION
+    )
+
+
+def verify_credential(
+    secret: str, stored_hash: Optional[bytes], legacy_salt: Optional[str] = None
+) -> bool:
+    """
+    Checks a secret against a stored credential hash in either the current or the
+    legacy format. Legacy hashes need the salt from their separate column.
+    """
+    if stored_hash is None:
+        return False
+    if is_legacy_credential_hash(stored_hash):
+        if legacy_salt is None:
+            return False
+        legacy_hash: Any = hash_ascii_with_salt(secret, legacy_salt)
+        return hmac.compare_digest(legacy_hash, stored_hash)
+    salt = stored_hash[1 : 1 + CREDENTIAL_SALT_BYTES]
+    key = stored_hash[1 + CREDENTIAL_SALT_BYTES :]
+    return hmac.compare_digest(derive_credential_key(secret, salt), key)
+
+
 def generate_seconds_from_now_expiry(exp_time_in_seconds: int) -> datetime:
     td = timedelta(seconds=exp_time_in_seconds)
     now = datetime.utcnow()
@@ -83,6 +83,71 @@ class ActivationResponse(Identifier):
     )
 
 
+@openapi_schema(dhos_activation_auth_api_spec)
+class PatientActivationBatchRequest(Schema):
+    class Meta:
+        title = "Patient activation batch request"
+        unknown = EXCLUDE
+        ordered = True
+
+    patient_ids = fields.List(
+        fields.String(),
+        required=True,
+        description="UUIDs of the patients",
+        example=["ab3d9aa3-d5aa-406a-87b2-cd67ad872724"],
+    )
+
+
+@openapi_schema(dhos_activation_auth_api_spec)
+class PatientActivationBatchResponse(Schema):
+    class Meta:
+        title = "Patient activation batch response"
+        unknown = EXCLUDE
+        ordered = True
+
+    patient_id = fields.String(
+        required=True,
+        description="UUID of the patient",
+        example="ab3d9aa3-d5aa-406a-87b2-cd67ad872724",
+    )
+    otp = fields.String(
+        required=True,
+        description="The one time PIN for the activation",
+        example="UG6L2",
+    )
+    activation_code = fields.String(
+        required=True,
+        description="The activation code to use when validating the activation",
+        example="d84J7dGhJa5YI8435798w4dHf8skjd",
+    )
+    expires_at = fields.String(
+        required=True,
+        description="ISO8601 timestamp at which the activation expires",
+        example="2018-03-26T23:59:59.000Z",
+    )
+
+
+@openapi_schema(dhos_activation_auth_api_spec)
+class PatientActivationStatus(Schema):
+    class Meta:
+        title = "Patient activation status"
+        unknown = EXCLUDE
+        ordered = True
+
+    patient_id = fields.String(
+        required=True,
+        description="UUID of the patient",
+        example="ab3d9aa3-d5aa-406a-87b2-cd67ad872724",
+    )
+    activation_completed = fields.String(
+        required=True,
+        allow_none=True,
+        description="ISO8601 timestamp at which the patient most recently validated an"
+        " activation, or null if they never have",
+        example="2018-03-26T23:59:59.000Z",
+    )
+
+
 @openapi_schema(dhos_activation_auth_api_spec)
 class ActivationHistory(Identifier):
     class Meta:
@@ -129,6 +194,11 @@ class ValidatePatientActivationResponse(Identifier):
         description="UUID of patient this activation relates to",
         example="ab3d9aa3-d5aa-406a-87b2-cd67ad872724",
     )
+    jwt = fields.String(
+        required=False,
+        description="JWT for the patient, only included when requested",
+        example="eyJhbGciOiJIUzUxMiIsInR5cCI6IkpXVCJ9...",
+    )
 
 
 @openapi_schema(dhos_activation_auth_api_spec)
@@ -276,6 +346,48 @@ class DeviceUpdate(Schema):
     )
 
 
+@openapi_schema(dhos_activation_auth_api_spec)
+class DeviceStatusUpdate(Schema):
+    class Meta:
+        title = "Device status update"
+        unknown = EXCLUDE
+        ordered = True
+
+    active = fields.Boolean(
+        required=True,
+        description="Whether the devices should be active",
+        example=False,
+    )
+
+    location_id = fields.String(
+        required=False,
+        description="UUID of the location whose devices to update",
+        example="2c4f1d24-2952-4d4e-b1d1-3637e33cc161",
+    )
+
+    uuids = fields.List(
+        fields.String(),
+        required=False,
+        description="UUIDs of the devices to update",
+        example=["cc71c130-dbc8-4961-a462-a491523a9f8c"],
+    )
+
+
+@openapi_schema(dhos_activation_auth_api_spec)
+class DeviceStatusUpdateResponse(Schema):
+    class Meta:
+        title = "Device status update response"
+        unknown = EXCLUDE
+        ordered = True
+
+    device_ids = fields.List(
+        fields.String(),
+        required=True,
+        description="UUIDs of the devices whose status changed",
+        example=["cc71c130-dbc8-4961-a462-a491523a9f8c"],
+    )
+
+
 @openapi_schema(dhos_activation_auth_api_spec)
 class DeviceActivationResponse(Schema):
     class Meta:
@@ -302,6 +414,59 @@ class DeviceActivationResponse(Schema):
     )
 
 
+@openapi_schema(dhos_activation_auth_api_spec)
+class DeviceProvisionRequest(Schema):
+    class Meta:
+        title = "Device provision request"
+        unknown = EXCLUDE
+        ordered = True
+
+    location_id = fields.String(
+        required=True,
+        description="UUID of the location at which to provision the devices",
+        example="2c4f1d24-2952-4d4e-b1d1-3637e33cc161",
+    )
+
+    descriptions = fields.List(
+        fields.String(),
+        required=True,
+        description="Free text descriptions of the devices, one per device to create",
+        example=["Ward 2A tablet 1", "Ward 2A tablet 2"],
+    )
+
+
+@openapi_schema(dhos_activation_auth_api_spec)
+class DeviceProvisionResponse(Schema):
+    class Meta:
+        title = "Device provision response"
+        unknown = EXCLUDE
+        ordered = True
+
+    device_id = fields.String(
+        required=True,
+        description="UUID of the created device",
+        example="cc71c130-dbc8-4961-a462-a491523a9f8c",
+    )
+
+    description = fields.String(
+        required=True,
+        description="free text description of the device",
+        example="Ward 2A tablet 1",
+    )
+
+    code = fields.String(
+        required=True,
+        description="the activation code for the device",
+        example="482019375",
+    )
+
+    expires_at = fields.String(
+        required=True,
+        description="ISO8601 timestamp at which the activation expires",
+        example="2018-03-26T23:59:59.000Z",
+    )
+
+
 @openapi_schema(dhos_activation_auth_api_spec)
 class ValidateDeviceActivationResponse(Schema):
     class Meta:
@@ -321,6 +486,32 @@ class ValidateDeviceActivationResponse(Schema):
         example="c4f1d24-2952-4d4e-b1d1-3637e33cc161",
     )
 
+    jwt = fields.String(
+        required=False,
+        description="JWT for the device, only included when requested",
+        example="eyJhbGciOiJIUzUxMiIsInR5cCI6IkpXVCJ9...",
+    )
+
+
+@openapi_schema(dhos_activation_auth_api_spec)
+class DeviceActivationStatus(Schema):
+    class Meta:
+        title = "Device activation status"
+        unknown = EXCLUDE
+        ordered = True
+
+    activated = fields.Boolean(
+        required=True,
+        description="Whether the device has ever been activated",
+        example=True,
+    )
+
+    pending_activation = fields.Boolean(
+        required=True,
+        description="Whether the device has an unused activation",
+        example=False,
+    )
+
 
 @openapi_schema(dhos_activation_auth_api_spec)
 class Device(Identifier, DeviceRequest):
@@ -328,3 +519,95 @@ class Device(Identifier, DeviceRequest):
         title = "Device response"
         unknown = EXCLUDE
         ordered = True
+
+    activation_status = fields.Nested(
+        DeviceActivationStatus,
+        required=False,
+        description="Only included when requested with `include=activation_status`",
+    )
+
+
+@openapi_schema(dhos_activation_auth_api_spec)
+class DeviceLocationSummary(Schema):
+    class Meta:
+        title = "Device location summary"
+        unknown = EXCLUDE
+        ordered = True
+
+    location_id = fields.String(
+        required=True,
+        description="UUID of the location",
+        example="2c4f1d24-2952-4d4e-b1d1-3637e33cc161",
+    )
+
+    active = fields.Integer(
+        required=True, description="Number of active devices at the location", example=8
+    )
+
+    inactive = fields.Integer(
+        required=True,
+        description="Number of inactive devices at the location",
+        example=2,
+    )
+
+
+@openapi_schema(dhos_activation_auth_api_spec)
+class DeviceSearchRequest(Schema):
+    class Meta:
+        title = "Device search request"
+        unknown = EXCLUDE
+        ordered = True
+
+    uuids = fields.List(
+        fields.String(),
+        required=True,
+        description="UUIDs of the devices to return",
+        example=["2c4f1d24-2952-4d4e-b1d1-3637e33cc161"],
+    )
+
+
+@openapi_schema(dhos_activation_auth_api_spec)
+class DeviceSearchResponse(Schema):
+    class Meta:
+        title = "Device search response"
+        unknown = EXCLUDE
+        ordered = True
+
+    devices = fields.List(
+        fields.Nested(Device),
+        required=True,
+        description="The devices found, in the order requested",
+    )
+
+    missing = fields.List(
+        fields.String(),
+        required=True,
+        description="Requested UUIDs for which no device exists",
+        example=["cc71c130-dbc8-4961-a462-a491523a9f8c"],
+    )
+
+
+@openapi_schema(dhos_activation_auth_api_spec)
+class DeviceChanges(Schema):
+    class Meta:
+        title = "Device changes"
+        unknown = EXCLUDE
+        ordered = True
+
+    devices = fields.List(
+        fields.Nested(Device),
+        required=True,
+        description="Devices created, updated or deactivated since the cursor",
+    )
+
+    cursor = fields.String(
+        required=True,
+        description="Cursor from which to request subsequent changes",
+        example="MjAyMC0wMS0wMVQwMDowMDowMHwyYzRmMWQyNA==",
+    )
+
+    more = fields.Boolean(
+        required=True,
+        description="Whether further changes are available immediately",
+        example=False,
+    )
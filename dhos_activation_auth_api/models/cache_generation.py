@@ -0,0 +1,35 @@
+from typing import Optional
+
+from flask_batteries_included.sqldb import db
+
+
+class CacheGeneration(db.Model):
+    """
+    A counter per cached entity type, incremented whenever that entity is written. Each
+    replica compares the generation it cached against the current value in the database,
+    so in-process caches stay consistent without a shared cache.
+    """
+
+    __tablename__ = "cache_generation"
+
+    name = db.Column(db.String(50), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def current(cls, name: str) -> int:
+        generation: Optional[int] = (
+            db.session.query(cls.generation).filter(cls.name == name).scalar()
+        )
+        return generation or 0
+
+    @classmethod
+    def increment(cls, name: str) -> None:
+        """
+        Increments the generation as part of the current transaction, so that it only
+        becomes visible to other replicas when the write that caused it is committed.
+        """
+        updated: int = cls.query.filter(cls.name == name).update(
+            {cls.generation: cls.generation + 1}, synchronize_session=False
+        )
+        if not updated:
+            db.session.add(cls(name=name, generation=1))
@@ -6,19 +6,21 @@ from flask_batteries_included.helpers.timestamp import (
 )
 from flask_batteries_included.sqldb import ModelIdentifier, db
 
+from dhos_activation_auth_api.models.types import UUIDString, uuid_primary_key
+
 clinician_group_table = db.Table(
     "clinician_group",
-    db.Column("group_id", db.String, db.ForeignKey("group.uuid"), nullable=False),
+    db.Column("group_id", UUIDString, db.ForeignKey("group.uuid"), nullable=False),
     db.Column(
-        "clinician_id", db.String, db.ForeignKey("clinician.uuid"), nullable=False
+        "clinician_id", UUIDString, db.ForeignKey("clinician.uuid"), nullable=False
     ),
 )
 
 clinician_product_table = db.Table(
     "clinician_product",
-    db.Column("product_id", db.String, db.ForeignKey("product.uuid"), nullable=False),
+    db.Column("product_id", UUIDString, db.ForeignKey("product.uuid"), nullable=False),
     db.Column(
-        "clinician_id", db.String, db.ForeignKey("clinician.uuid"), nullable=False
+        "clinician_id", UUIDString, db.ForeignKey("clinician.uuid"), nullable=False
     ),
 )
 
@@ -27,12 +29,13 @@ class Clinician(ModelIdentifier, db.Model):
 
     __tablename__ = "clinician"
 
+    uuid = uuid_primary_key()
     clinician_id = db.Column(db.String(36), unique=True, nullable=False, index=True)
     login_active = db.Column(db.Boolean, nullable=False)
     send_entry_identifier = db.Column(db.String(50), nullable=True)
 
     contract_expiry_eod_date_ = db.Column(
-        "contract_expiry_eod_date", db.Date(), nullable=True
+        "contract_expiry_eod_date", db.Date(), nullable=True, index=True
     )
 
     products = db.relationship(
@@ -1,15 +1,27 @@
-from typing import Dict
+from datetime import timezone
+from typing import Any, Dict, Tuple
 
 from flask_batteries_included.sqldb import ModelIdentifier, db
 
+from dhos_activation_auth_api.models.types import uuid_primary_key
+
 
 class Device(ModelIdentifier, db.Model):
+    __table_args__ = (
+        # Supports keyset pagination of the device list.
+        db.Index("ix_device_created_uuid", "created", "uuid"),
+        # Supports the feed of device changes.
+        db.Index("ix_device_modified_uuid", "modified", "uuid"),
+        # Supports listing the devices at a location, which ward dashboards poll.
+        db.Index("ix_device_location_id_active", "location_id", "active"),
+    )
+
+    uuid = uuid_primary_key()
     location_id = db.Column(db.String(), nullable=False, unique=False)
     description = db.Column(db.String(), nullable=False, unique=False)
-    hashed_authorisation_code = db.Column(
-        db.LargeBinary(256), nullable=True, unique=True
-    )
-    authorisation_code_salt = db.Column(db.String(), nullable=True, unique=True)
+    hashed_authorisation_code = db.Column(db.LargeBinary(), nullable=True)
+    # Only set for legacy hashes; current hashes include their salt.
+    authorisation_code_salt = db.Column(db.String(), nullable=True)
     active = db.Column(db.Boolean(), nullable=False, unique=False, default=True)
 
     @classmethod
@@ -20,13 +32,42 @@ class Device(ModelIdentifier, db.Model):
             "updatable": {"description": str, "location_id": str, "active": bool},
         }
 
-    def to_dict(self) -> Dict:
+    @classmethod
+    def dict_columns(cls) -> Tuple:
+        """
+        The columns needed by `row_to_dict`, so that read endpoints can select just these
+        rather than loading the whole device including its authorisation code hash.
+        """
+        return (
+            cls.uuid,
+            cls.created,
+            cls.created_by_,
+            cls.modified,
+            cls.modified_by_,
+            cls.location_id,
+            cls.description,
+            cls.active,
+        )
+
+    @staticmethod
+    def row_to_dict(row: Any) -> Dict:
         return {
-            **self.pack_identifier(),
-            "location_id": self.location_id,
-            "description": self.description,
-            "active": self.active,
+            "uuid": row.uuid,
+            "created": row.created.replace(tzinfo=timezone.utc)
+            if row.created
+            else None,
+            "created_by": row.created_by_,
+            "modified": row.modified.replace(tzinfo=timezone.utc)
+            if row.modified
+            else None,
+            "modified_by": row.modified_by_,
+            "location_id": row.location_id,
+            "description": row.description,
+            "active": row.active,
         }
 
+    def to_dict(self) -> Dict:
+        return self.row_to_dict(self)
+
     def __repr__(self) -> str:
         return f"Device(uuid={self.uuid}, location_id={self.location_id}, description={self.description})"
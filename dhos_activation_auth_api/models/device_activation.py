@@ -4,11 +4,28 @@ from typing import Dict, Optional
 from flask_batteries_included.helpers.timestamp import join_timestamp
 from flask_batteries_included.sqldb import ModelIdentifier, db
 
+from dhos_activation_auth_api.models.types import UUIDString, uuid_primary_key
 
-class DeviceActivation(ModelIdentifier, db.Model):
 
-    device_id = db.Column(db.String(36), db.ForeignKey("device.uuid"))
-    device = db.relationship("Device", backref="activation", lazy=False, uselist=False)
+class DeviceActivation(ModelIdentifier, db.Model):
+    __table_args__ = (
+        # Supports finding a device's unused activation.
+        db.Index("ix_device_activation_device_id_used", "device_id", "used"),
+        # Supports validating an activation code.
+        db.Index("ix_device_activation_code_used", "code", "used"),
+        # An unused activation code identifies a single device activation.
+        db.Index(
+            "ix_device_activation_code_unused",
+            "code",
+            unique=True,
+            postgresql_where=db.text("NOT used"),
+            sqlite_where=db.text("NOT used"),
+        ),
+    )
+
+    uuid = uuid_primary_key()
+    device_id = db.Column(UUIDString, db.ForeignKey("device.uuid"))
+    device = db.relationship("Device", backref="activation", uselist=False)
 
     code = db.Column(db.String(36), nullable=False)
     used = db.Column(db.Boolean, nullable=False, default=False)
@@ -1,7 +1,10 @@
 from flask_batteries_included.sqldb import ModelIdentifier, db
 
+from dhos_activation_auth_api.models.types import uuid_primary_key
+
 
 class Group(ModelIdentifier, db.Model):
     __tablename__ = "group"
 
+    uuid = uuid_primary_key()
     name = db.Column(db.String(20), unique=True, nullable=False)
@@ -2,14 +2,18 @@ from typing import Dict
 
 from flask_batteries_included.sqldb import ModelIdentifier, db
 
+from dhos_activation_auth_api.models.types import UUIDString, uuid_primary_key
+
 
 class Patient(ModelIdentifier, db.Model):
 
-    patient_id = db.Column(db.String(36), unique=True, nullable=False)
+    uuid = uuid_primary_key()
+    patient_id = db.Column(UUIDString, unique=True, nullable=False)
     email_address = db.Column(db.String, unique=True, nullable=True)
     phone_number = db.Column(db.String, unique=True, nullable=True)
 
-    hashed_authorisation_code = db.Column(db.LargeBinary(256), nullable=True)
+    hashed_authorisation_code = db.Column(db.LargeBinary, nullable=True)
+    # Only set for legacy hashes; current hashes include their salt.
     authorisation_code_salt = db.Column(db.String, nullable=True)
 
     def to_dict(self) -> Dict:
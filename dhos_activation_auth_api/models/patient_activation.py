@@ -4,18 +4,20 @@ from typing import Dict, Optional
 from flask_batteries_included.helpers.timestamp import join_timestamp
 from flask_batteries_included.sqldb import ModelIdentifier, db
 
+from dhos_activation_auth_api.models.types import UUIDString, uuid_primary_key
+
 
 class PatientActivation(ModelIdentifier, db.Model):
 
-    patient_id = db.Column(
-        db.String(36), db.ForeignKey("patient.patient_id"), index=True
-    )
+    uuid = uuid_primary_key()
+    patient_id = db.Column(UUIDString, db.ForeignKey("patient.patient_id"))
     patient = db.relationship(
         "Patient", backref="activation", lazy=False, uselist=False
     )
 
     code = db.Column(db.String(36), nullable=False, index=True)
-    hashed_otp = db.Column(db.LargeBinary(256), nullable=False)
+    hashed_otp = db.Column(db.LargeBinary, nullable=False)
+    # Only set for legacy hashes; current hashes include their salt.
     otp_salt = db.Column(db.String, nullable=True)
 
     used = db.Column(db.Boolean, nullable=False, default=False)
@@ -24,6 +26,15 @@ class PatientActivation(ModelIdentifier, db.Model):
     activated_timestamp = db.Column(db.DateTime, unique=False, nullable=True)
     activated_timezone = db.Column(db.Integer, unique=False, nullable=True)
 
+    __table_args__ = (
+        # Supports finding a patient's activations, most recently activated first.
+        db.Index(
+            "ix_patient_activation_patient_id_activated_timestamp",
+            patient_id,
+            activated_timestamp.desc(),
+        ),
+    )
+
     def get_activated_timestamp(self) -> Optional[datetime]:
         if self.activated_timestamp is None:
             return None
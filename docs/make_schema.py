@@ -4,6 +4,7 @@ import subprocess
 import sadisplay
 
 from dhos_activation_auth_api.models import (
+    cache_generation,
     clinician,
     device,
     device_activation,
@@ -15,6 +16,7 @@ from dhos_activation_auth_api.models import (
 
 desc = sadisplay.describe(
     [
+        cache_generation.CacheGeneration,
         clinician.Clinician,
         device.Device,
         device_activation.DeviceActivation,
@@ -0,0 +1,41 @@
+"""index patient activation latest
+
+Revision ID: 3d9f1b7a6e24
+Revises: 6b81e4d2a0f9
+Create Date: 2026-10-19 14:06:58.618305
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3d9f1b7a6e24"
+down_revision = "6b81e4d2a0f9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_patient_activation_patient_id_activated_timestamp",
+        "patient_activation",
+        ["patient_id", sa.text("activated_timestamp DESC")],
+        unique=False,
+    )
+    # Superseded by the composite index, which leads with patient_id.
+    op.drop_index(
+        op.f("ix_patient_activation_patient_id"), table_name="patient_activation"
+    )
+
+
+def downgrade():
+    op.create_index(
+        op.f("ix_patient_activation_patient_id"),
+        "patient_activation",
+        ["patient_id"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_patient_activation_patient_id_activated_timestamp",
+        table_name="patient_activation",
+    )
@@ -0,0 +1,29 @@
+"""add cache generation
+
+Revision ID: 5c0b8e3d7f21
+Revises: d41f5e7c2a90
+Create Date: 2026-10-19 11:47:05.118344
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c0b8e3d7f21"
+down_revision = "d41f5e7c2a90"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_generation = op.create_table(
+        "cache_generation",
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(cache_generation, [{"name": "clinician", "generation": 0}])
+
+
+def downgrade():
+    op.drop_table("cache_generation")
@@ -0,0 +1,161 @@
+"""native uuid keys
+
+Converts primary and foreign keys from text to native uuid columns. The static patient
+and device IDs used in non-production environments are converted to reserved UUIDs,
+matching UUIDString in the models. Any other value that isn't a UUID stops the
+migration, as it couldn't be read back unchanged.
+
+Revision ID: 5e8a0c3f6d17
+Revises: 9c2e7d41b8a3
+Create Date: 2026-10-19 14:26:57.803512
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5e8a0c3f6d17"
+down_revision = "9c2e7d41b8a3"
+branch_labels = None
+depends_on = None
+
+# Table name -> (column name, original type).
+KEY_COLUMNS = {
+    "device": [("uuid", sa.String(36))],
+    "device_activation": [("uuid", sa.String(36)), ("device_id", sa.String(36))],
+    "patient": [("uuid", sa.String(36)), ("patient_id", sa.String(36))],
+    "patient_activation": [("uuid", sa.String(36)), ("patient_id", sa.String(36))],
+    "clinician": [("uuid", sa.String(36))],
+    "group": [("uuid", sa.String(36))],
+    "product": [("uuid", sa.String(36))],
+    "clinician_group": [("group_id", sa.String()), ("clinician_id", sa.String())],
+    "clinician_product": [("product_id", sa.String()), ("clinician_id", sa.String())],
+}
+
+# Columns that identify a row, which mustn't hold the UUID that UUIDString uses for
+# values that aren't UUIDs.
+IDENTIFYING_COLUMNS = [
+    ("device", "uuid"),
+    ("device_activation", "uuid"),
+    ("patient", "uuid"),
+    ("patient", "patient_id"),
+    ("patient_activation", "uuid"),
+    ("clinician", "uuid"),
+    ("group", "uuid"),
+    ("product", "uuid"),
+]
+
+UUID_REGEX = (
+    "^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+)
+STATIC_PATIENT_REGEX = "^static_patient_uuid_[1-9]$"
+STATIC_DEVICE_REGEX = "^static_device_uuid_D[1-9]$"
+STATIC_PATIENT_PREFIX = "00000000-0000-0000-0001-00000000000"
+STATIC_DEVICE_PREFIX = "00000000-0000-0000-0002-00000000000"
+INVALID_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+def _to_uuid(column):
+    return (
+        f"CASE WHEN {column} ~ '{STATIC_PATIENT_REGEX}' "
+        f"THEN ('{STATIC_PATIENT_PREFIX}' || right({column}, 1))::uuid "
+        f"WHEN {column} ~ '{STATIC_DEVICE_REGEX}' "
+        f"THEN ('{STATIC_DEVICE_PREFIX}' || right({column}, 1))::uuid "
+        f"ELSE {column}::uuid END"
+    )
+
+
+def _from_uuid(column):
+    return (
+        f"CASE WHEN {column}::text LIKE '{STATIC_PATIENT_PREFIX}_' "
+        f"THEN 'static_patient_uuid_' || right({column}::text, 1) "
+        f"WHEN {column}::text LIKE '{STATIC_DEVICE_PREFIX}_' "
+        f"THEN 'static_device_uuid_D' || right({column}::text, 1) "
+        f"ELSE {column}::text END"
+    )
+
+
+def _check_convertible(connection):
+    for table, columns in KEY_COLUMNS.items():
+        for column, _ in columns:
+            invalid = connection.execute(
+                sa.text(
+                    f'SELECT count(*) FROM "{table}" WHERE {column} IS NOT NULL '
+                    f"AND {column} !~ :uuid AND {column} !~ :patient "
+                    f"AND {column} !~ :device"
+                ),
+                {
+                    "uuid": UUID_REGEX,
+                    "patient": STATIC_PATIENT_REGEX,
+                    "device": STATIC_DEVICE_REGEX,
+                },
+            ).scalar()
+            if invalid:
+                raise RuntimeError(
+                    f"{table}.{column} has {invalid} values that are neither UUIDs nor "
+                    "static IDs, so can't be converted to native UUIDs"
+                )
+
+
+def _drop_foreign_keys(connection):
+    """
+    Drops the foreign keys between the key columns, returning them so that they can be
+    recreated. Their names are looked up, as earlier migrations let them be generated.
+    """
+    inspector = sa.inspect(connection)
+    foreign_keys = []
+    for table in KEY_COLUMNS:
+        for foreign_key in inspector.get_foreign_keys(table):
+            foreign_keys.append((table, foreign_key))
+            op.drop_constraint(foreign_key["name"], table, type_="foreignkey")
+    return foreign_keys
+
+
+def _create_foreign_keys(foreign_keys):
+    for table, foreign_key in foreign_keys:
+        op.create_foreign_key(
+            foreign_key["name"],
+            table,
+            foreign_key["referred_table"],
+            foreign_key["constrained_columns"],
+            foreign_key["referred_columns"],
+            **foreign_key.get("options", {}),
+        )
+
+
+def upgrade():
+    connection = op.get_bind()
+    _check_convertible(connection)
+    foreign_keys = _drop_foreign_keys(connection)
+    for table, columns in KEY_COLUMNS.items():
+        for column, original_type in columns:
+            op.alter_column(
+                table,
+                column,
+                existing_type=original_type,
+                type_=postgresql.UUID(as_uuid=False),
+                postgresql_using=_to_uuid(column),
+            )
+    _create_foreign_keys(foreign_keys)
+    for table, column in IDENTIFYING_COLUMNS:
+        op.create_check_constraint(
+            f"ck_{table}_{column}_valid", table, f"{column} <> '{INVALID_UUID}'"
+        )
+
+
+def downgrade():
+    connection = op.get_bind()
+    for table, column in IDENTIFYING_COLUMNS:
+        op.drop_constraint(f"ck_{table}_{column}_valid", table, type_="check")
+    foreign_keys = _drop_foreign_keys(connection)
+    for table, columns in KEY_COLUMNS.items():
+        for column, original_type in columns:
+            op.alter_column(
+                table,
+                column,
+                existing_type=postgresql.UUID(as_uuid=False),
+                type_=original_type,
+                postgresql_using=_from_uuid(column),
+            )
+    _create_foreign_keys(foreign_keys)
@@ -0,0 +1,27 @@
+"""index device activation code used
+
+Revision ID: 6b81e4d2a0f9
+Revises: f2a6d03c5e17
+Create Date: 2026-10-19 13:59:58.775903
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "6b81e4d2a0f9"
+down_revision = "f2a6d03c5e17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_device_activation_code_used",
+        "device_activation",
+        ["code", "used"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_device_activation_code_used", table_name="device_activation")
@@ -0,0 +1,24 @@
+"""index device created uuid
+
+Revision ID: 9a7e2c41b6d3
+Revises: 5c0b8e3d7f21
+Create Date: 2026-10-19 14:03:52.771905
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9a7e2c41b6d3"
+down_revision = "5c0b8e3d7f21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_device_created_uuid", "device", ["created", "uuid"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_device_created_uuid", table_name="device")
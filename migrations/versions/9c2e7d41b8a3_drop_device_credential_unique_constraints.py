@@ -0,0 +1,32 @@
+"""drop device credential unique constraints
+
+Credential hashes are now 49 bytes (a version byte, 16-byte salt and 32-byte key) rather
+than 256 bytes with a separate salt string. Existing hashes are rewritten in the new
+format the next time they are verified, so no data is migrated here.
+
+Revision ID: 9c2e7d41b8a3
+Revises: 3d9f1b7a6e24
+Create Date: 2026-10-19 14:21:43.540961
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9c2e7d41b8a3"
+down_revision = "3d9f1b7a6e24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_constraint("device_hashed_authorisation_code_key", "device", type_="unique")
+    op.drop_constraint("device_auth_code_salt", "device", type_="unique")
+
+
+def downgrade():
+    op.create_unique_constraint(
+        "device_auth_code_salt", "device", ["authorisation_code_salt"]
+    )
+    op.create_unique_constraint(
+        "device_hashed_authorisation_code_key", "device", ["hashed_authorisation_code"]
+    )
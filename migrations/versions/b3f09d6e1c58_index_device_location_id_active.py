@@ -0,0 +1,27 @@
+"""index device location_id active
+
+Revision ID: b3f09d6e1c58
+Revises: 9a7e2c41b6d3
+Create Date: 2026-10-19 13:41:41.530112
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b3f09d6e1c58"
+down_revision = "9a7e2c41b6d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_device_location_id_active",
+        "device",
+        ["location_id", "active"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_device_location_id_active", table_name="device")
@@ -0,0 +1,81 @@
+"""unique unused device activation code
+
+An unused activation code must identify a single device activation. Codes already
+issued more than once are reissued first: the most recently modified activation keeps
+the code, and the others get new codes of the same length. Each reissued activation is
+logged, as its device needs the new code to activate.
+
+Revision ID: c8d2f4a61e37
+Revises: 5e8a0c3f6d17
+Create Date: 2026-10-19 15:09:48.204731
+
+"""
+import logging
+import secrets
+import string
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c8d2f4a61e37"
+down_revision = "5e8a0c3f6d17"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade():
+    connection = op.get_bind()
+    duplicates = connection.execute(
+        sa.text(
+            """
+            SELECT uuid, device_id, code FROM (
+                SELECT uuid, device_id, code, row_number() OVER (
+                    PARTITION BY code ORDER BY modified DESC, uuid
+                ) AS position
+                FROM device_activation
+                WHERE NOT used
+            ) AS ranked
+            WHERE position > 1
+            """
+        )
+    ).fetchall()
+    if duplicates:
+        in_use = {
+            code
+            for (code,) in connection.execute(
+                sa.text("SELECT code FROM device_activation WHERE NOT used")
+            )
+        }
+        for activation_uuid, device_id, code in duplicates:
+            new_code = code
+            while new_code in in_use:
+                new_code = "".join(
+                    secrets.choice(string.digits) for _ in range(len(code))
+                )
+            in_use.add(new_code)
+            connection.execute(
+                sa.text("UPDATE device_activation SET code = :code WHERE uuid = :uuid"),
+                {"code": new_code, "uuid": activation_uuid},
+            )
+            logger.warning(
+                "Reissued duplicate activation code for device activation %s (device"
+                " %s); the previous code no longer activates this device",
+                activation_uuid,
+                device_id,
+            )
+
+    op.create_index(
+        "ix_device_activation_code_unused",
+        "device_activation",
+        ["code"],
+        unique=True,
+        postgresql_where=sa.text("NOT used"),
+        sqlite_where=sa.text("NOT used"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_device_activation_code_unused", table_name="device_activation")
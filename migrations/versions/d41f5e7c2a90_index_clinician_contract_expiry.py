@@ -0,0 +1,27 @@
+"""index clinician contract expiry
+
+Revision ID: d41f5e7c2a90
+Revises: 80154c6d2d2a
+Create Date: 2026-10-19 09:12:31.402817
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d41f5e7c2a90"
+down_revision = "80154c6d2d2a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        op.f("ix_clinician_contract_expiry_eod_date"),
+        "clinician",
+        ["contract_expiry_eod_date"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_clinician_contract_expiry_eod_date"), table_name="clinician")
@@ -0,0 +1,24 @@
+"""index device modified uuid
+
+Revision ID: e8c14a2f97b0
+Revises: b3f09d6e1c58
+Create Date: 2026-10-19 13:49:22.904126
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e8c14a2f97b0"
+down_revision = "b3f09d6e1c58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_device_modified_uuid", "device", ["modified", "uuid"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_device_modified_uuid", table_name="device")
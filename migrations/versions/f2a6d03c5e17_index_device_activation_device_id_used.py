@@ -0,0 +1,29 @@
+"""index device activation device id used
+
+Revision ID: f2a6d03c5e17
+Revises: e8c14a2f97b0
+Create Date: 2026-10-19 13:55:39.316084
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f2a6d03c5e17"
+down_revision = "e8c14a2f97b0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_device_activation_device_id_used",
+        "device_activation",
+        ["device_id", "used"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_device_activation_device_id_used", table_name="device_activation"
+    )
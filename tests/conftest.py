@@ -1,10 +1,11 @@
 import copy
 import uuid
-from typing import Any, Dict, Generator, Optional, Tuple, Type
+from typing import Any, Dict, Generator, List, Optional, Tuple, Type
 
 import pytest
 from flask import Flask, g
 from flask.ctx import AppContext
+from flask_batteries_included.sqldb import db
 from mock import Mock
 from pytest_mock import MockerFixture, MockFixture
 
@@ -109,3 +110,16 @@ def device_jwt_uuid(app_context: AppContext, mocker: MockFixture) -> str:
     )
     # flask.g.jwt_scopes = "read:send_device read:send_entry_identifier read:send_location"
     return device_uuid
+
+
+@pytest.fixture
+def sql_statements(app_context: AppContext) -> Generator[List[str], None, None]:
+    """Use this fixture to record the SQL statements executed against the database"""
+    statements: List[str] = []
+
+    def before_cursor_execute(*args: Any) -> None:
+        statements.append(args[2])
+
+    db.event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    db.event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
@@ -1,6 +1,9 @@
 from flask import Flask
 from flask.testing import FlaskClient
+from jose import jwt
+from pytest_mock import MockFixture
 
+from dhos_activation_auth_api.helpers import utils
 from dhos_activation_auth_api.helpers.utils import generate_secure_random_string
 from dhos_activation_auth_api.models.device import Device, db
 from dhos_activation_auth_api.models.device_activation import DeviceActivation
@@ -88,3 +91,90 @@ class TestActivateDevice:
         assert response.json is not None
         assert "authorisation_code" in response.json
         assert "device_id" in response.json
+
+    def test_device_activation_includes_jwt(
+        self, client: FlaskClient, app: Flask, mocker: MockFixture
+    ) -> None:
+        uuid = "12345"
+        activation_code = generate_secure_random_string(
+            app.config["AUTHORISATION_CODE_LENGTH"]
+        )
+        db.session.add(
+            Device(uuid=uuid, location_id="L1", description="some description")
+        )
+        db.session.add(
+            DeviceActivation(uuid="12345", device_id=uuid, code=activation_code)
+        )
+        db.session.commit()
+        hash_spy = mocker.spy(utils, "derive_credential_key")
+
+        response = client.post(
+            f"/dhos/v1/activation/{activation_code}?type=send_entry&include_jwt=true"
+        )
+
+        assert response.status_code == 200
+        assert response.json is not None
+        # Only the new authorisation code is hashed; it isn't hashed again to check it.
+        assert hash_spy.call_count == 1
+        decoded = jwt.decode(
+            response.json["jwt"],
+            app.config["HS_KEY"],
+            algorithms="HS512",
+            audience=app.config["PROXY_URL"] + "/",
+        )
+        assert decoded["metadata"]["device_id"] == uuid
+
+        jwt_response = client.get(
+            f"/dhos/v1/device/{uuid}/jwt",
+            headers={"x-authorisation-code": response.json["authorisation_code"]},
+        )
+        assert jwt_response.status_code == 200
+
+    def test_device_activation_excludes_jwt_by_default(
+        self, client: FlaskClient, app: Flask
+    ) -> None:
+        uuid = "12345"
+        activation_code = generate_secure_random_string(
+            app.config["AUTHORISATION_CODE_LENGTH"]
+        )
+        db.session.add(
+            Device(uuid=uuid, location_id="L1", description="some description")
+        )
+        db.session.add(
+            DeviceActivation(uuid="12345", device_id=uuid, code=activation_code)
+        )
+        db.session.commit()
+
+        response = client.post(f"/dhos/v1/activation/{activation_code}?type=send_entry")
+
+        assert response.status_code == 200
+        assert response.json is not None
+        assert "jwt" not in response.json
+
+    def test_device_activation_with_jwt_refused_for_inactive_device(
+        self, client: FlaskClient, app: Flask
+    ) -> None:
+        uuid = "12345"
+        activation_code = generate_secure_random_string(
+            app.config["AUTHORISATION_CODE_LENGTH"]
+        )
+        db.session.add(
+            Device(
+                uuid=uuid,
+                location_id="L1",
+                description="some description",
+                active=False,
+            )
+        )
+        db.session.add(
+            DeviceActivation(uuid="12345", device_id=uuid, code=activation_code)
+        )
+        db.session.commit()
+
+        response = client.post(
+            f"/dhos/v1/activation/{activation_code}?type=send_entry&include_jwt=true"
+        )
+
+        assert response.status_code == 403
+        # The activation hasn't been used up.
+        assert DeviceActivation.query.get("12345").used is False
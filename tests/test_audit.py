@@ -91,3 +91,34 @@ class TestAudit:
             updated_fields=updated_fields,
         )
         mock_publish.assert_called_with(routing_key="dhos.34837004", body=expected)
+
+    def test_record_sendentry_clinicians_deactivated(self, mock_publish: Mock) -> None:
+        clinician_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        reason = "Clinician contract expired"
+        expected = {
+            "event_type": "SEND entry clinicians deactivated",
+            "event_data": {"clinician_ids": clinician_ids, "reason": reason},
+        }
+        audit.record_sendentry_clinicians_deactivated(
+            clinician_ids=clinician_ids, reason=reason
+        )
+        mock_publish.assert_called_with(routing_key="dhos.34837004", body=expected)
+
+    def test_record_sendentry_devices_update(self, mock_publish: Mock) -> None:
+        device_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        clinician_id = str(uuid.uuid4())
+        updated_fields = {"active": False}
+        expected = {
+            "event_type": "SEND entry devices update",
+            "event_data": {
+                "device_ids": device_ids,
+                "clinician_id": clinician_id,
+                "updated_fields": updated_fields,
+            },
+        }
+        audit.record_sendentry_devices_update(
+            device_ids=device_ids,
+            clinician_id=clinician_id,
+            updated_fields=updated_fields,
+        )
+        mock_publish.assert_called_with(routing_key="dhos.34837004", body=expected)
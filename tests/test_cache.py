@@ -0,0 +1,73 @@
+from typing import List
+
+import pytest
+
+from dhos_activation_auth_api.helpers.cache import LruTtlCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLruTtlCache:
+    @pytest.fixture
+    def clock(self) -> FakeClock:
+        return FakeClock()
+
+    @pytest.fixture
+    def cache(self, clock: FakeClock) -> LruTtlCache[str, int]:
+        return LruTtlCache(name="test", max_size=2, ttl_seconds=10, clock=clock)
+
+    def test_get_miss_then_hit(self, cache: LruTtlCache[str, int]) -> None:
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+        assert cache.hit_ratio == 0.5
+
+    def test_entries_expire_after_ttl(
+        self, cache: LruTtlCache[str, int], clock: FakeClock
+    ) -> None:
+        cache.set("a", 1)
+        clock.now = 10
+        assert cache.get("a") == 1
+        clock.now = 10.1
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_evicted(
+        self, cache: LruTtlCache[str, int]
+    ) -> None:
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # Touch "a" so that "b" becomes the least recently used entry.
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_invalid_entries_evicted(self, cache: LruTtlCache[str, int]) -> None:
+        seen: List[int] = []
+
+        def is_valid(value: int) -> bool:
+            seen.append(value)
+            return value > 1
+
+        cache.set("a", 1)
+        assert cache.get("a", is_valid=is_valid) is None
+        assert seen == [1]
+        assert len(cache) == 0
+
+    def test_hit_ratio_without_lookups(self, cache: LruTtlCache[str, int]) -> None:
+        assert cache.hit_ratio == 0.0
+
+    def test_max_size_must_be_positive(self) -> None:
+        with pytest.raises(ValueError):
+            LruTtlCache(name="test", max_size=0, ttl_seconds=10)
@@ -1,5 +1,5 @@
 from datetime import date, datetime, timedelta
-from typing import Dict
+from typing import Dict, List
 
 import pytest
 from flask import Flask
@@ -10,6 +10,8 @@ from pytest_mock import MockFixture
 from werkzeug.test import TestResponse
 
 from dhos_activation_auth_api.blueprint_api import controller
+from dhos_activation_auth_api.helpers.cache import get_cache
+from dhos_activation_auth_api.models.cache_generation import CacheGeneration
 from dhos_activation_auth_api.models.clinician import Clinician
 
 
@@ -111,10 +113,11 @@ class TestClinicianJwt:
         with pytest.raises(PermissionError):
             controller.create_clinician_jwt(identifier, "device_uuid")
 
+        # The login path is read-only, deactivation is left to the scheduled job.
         obj = Clinician.query.filter_by(send_entry_identifier=identifier).first()
 
         assert obj is not None
-        assert obj.login_active is False
+        assert obj.login_active is True
 
     @pytest.mark.usefixtures("mock_retrieve_jwt_claims")
     def test_get_clinician_jwt_nonexistent_identifier(
@@ -193,3 +196,55 @@ class TestClinicianJwt:
         ).first()
         is_allowed = controller.clinician_has_send_entry_access(obj)
         assert is_allowed is False
+
+    @pytest.mark.usefixtures("mock_dhosredis")
+    def test_clinician_jwt_uses_cached_snapshot(
+        self, sample_clinician: Dict, sql_statements: List[str]
+    ) -> None:
+        controller.create_clinician(sample_clinician)
+        identifier = sample_clinician["send_entry_identifier"]
+        controller.create_clinician_jwt(identifier, device_uuid="device_uuid")
+
+        sql_statements.clear()
+        clinician_jwt = controller.create_clinician_jwt(
+            identifier, device_uuid="device_uuid"
+        )
+        assert "jwt" in clinician_jwt
+        # Only the cache generation is read from the database.
+        assert len(sql_statements) == 1
+        assert "cache_generation" in sql_statements[0]
+        assert get_cache("clinician_auth").hits == 1
+
+    @pytest.mark.usefixtures("mock_dhosredis")
+    def test_update_clinician_invalidates_cached_snapshot(
+        self, sample_clinician: Dict, sample_clinician_update: Dict
+    ) -> None:
+        controller.create_clinician(sample_clinician)
+        identifier = sample_clinician["send_entry_identifier"]
+        controller.create_clinician_jwt(identifier, device_uuid="device_uuid")
+
+        controller.update_clinician(
+            sample_clinician["clinician_id"],
+            {**sample_clinician_update, "login_active": False},
+        )
+
+        with pytest.raises(PermissionError):
+            controller.create_clinician_jwt(identifier, device_uuid="device_uuid")
+
+    @pytest.mark.usefixtures("mock_dhosredis")
+    def test_generation_change_from_another_replica_invalidates_snapshot(
+        self, sample_clinician: Dict
+    ) -> None:
+        controller.create_clinician(sample_clinician)
+        identifier = sample_clinician["send_entry_identifier"]
+        controller.create_clinician_jwt(identifier, device_uuid="device_uuid")
+
+        # Another replica writes the clinician directly and bumps the generation.
+        Clinician.query.filter_by(send_entry_identifier=identifier).update(
+            {Clinician.login_active: False}
+        )
+        CacheGeneration.increment(controller.CLINICIAN_CACHE_GENERATION)
+        db.session.commit()
+
+        with pytest.raises(PermissionError):
+            controller.create_clinician_jwt(identifier, device_uuid="device_uuid")
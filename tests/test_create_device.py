@@ -1,4 +1,8 @@
+from flask import Flask
 from flask.testing import FlaskClient
+from pytest_mock import MockerFixture
+
+from dhos_activation_auth_api.models.device import Device
 
 
 class TestCreateDevice:
@@ -21,3 +25,20 @@ class TestCreateDevice:
             "/dhos/v1/device", json=None, headers={"Authorization": "Bearer TOKEN"}
         )
         assert response.status_code == 400
+
+    def test_fails_when_uuid_cannot_be_stored(
+        self, app: Flask, client: FlaskClient, mocker: MockerFixture
+    ) -> None:
+        # On PostgreSQL, device UUIDs are stored as native UUIDs.
+        mocker.patch(
+            "dhos_activation_auth_api.models.types.stores_native_uuids",
+            return_value=True,
+        )
+        response = client.post(
+            "/dhos/v1/device",
+            json={"uuid": "not-a-uuid", "location_id": "L1", "description": "d"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+        with app.app_context():
+            assert Device.query.count() == 0
@@ -1,5 +1,7 @@
 from flask.testing import FlaskClient
+from pytest_mock import MockFixture
 
+from dhos_activation_auth_api.blueprint_api import controller
 from dhos_activation_auth_api.models.device import Device, db
 from dhos_activation_auth_api.models.device_activation import DeviceActivation
 
@@ -46,3 +48,21 @@ class TestCreateDeviceActivation:
         assert response.status_code == 200
         assert response.json is not None
         assert response.json["code"] == uuid[-1] * 9  # Should be static activation code
+
+    def test_regenerates_code_issued_concurrently(
+        self, client: FlaskClient, mocker: MockFixture
+    ) -> None:
+        for uuid in ["12345", "67890"]:
+            db.session.add(Device(uuid=uuid, location_id="L1", description=""))
+        db.session.add(DeviceActivation(uuid="other", device_id="67890", code="111"))
+        db.session.commit()
+        mocker.patch.object(
+            controller, "generate_secure_numeric_string", side_effect=["111", "222"]
+        )
+        response = client.post(
+            "/dhos/v1/device/12345/activation",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["code"] == "222"
@@ -0,0 +1,146 @@
+from typing import Dict, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from pytest_mock import MockerFixture
+
+from dhos_activation_auth_api.blueprint_api import controller
+from dhos_activation_auth_api.models.patient import Patient
+from dhos_activation_auth_api.models.patient_activation import PatientActivation
+
+
+@pytest.mark.usefixtures("app")
+class TestCreatePatientActivations:
+    def create_activations(
+        self, client: FlaskClient, body: Dict, expected_status: int = 200
+    ) -> List[Dict]:
+        response = client.post(
+            "/dhos/v1/patient/activation",
+            json=body,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == expected_status
+        assert response.json is not None
+        return response.json
+
+    def validate(self, client: FlaskClient, activation: Dict) -> int:
+        return client.post(
+            f"/dhos/v1/activation/{activation['activation_code']}",
+            json={"otp": activation["otp"]},
+        ).status_code
+
+    def test_creates_activations(self, app: Flask, client: FlaskClient) -> None:
+        activations = self.create_activations(
+            client, {"patient_ids": ["p1", "p2", "p1"]}
+        )
+        assert [a["patient_id"] for a in activations] == ["p1", "p2"]
+        for activation in activations:
+            assert activation["otp"]
+            assert activation["expires_at"]
+            assert self.validate(client, activation) == 200
+        with app.app_context():
+            assert Patient.query.count() == 2
+
+    def test_regenerates_existing_activations(
+        self, app: Flask, client: FlaskClient
+    ) -> None:
+        single = client.post(
+            "/dhos/v1/patient/p1/activation", headers={"Authorization": "Bearer TOKEN"}
+        ).json
+        assert single is not None
+
+        activations = self.create_activations(client, {"patient_ids": ["p1", "p2"]})
+
+        # The existing activation keeps its code, but the old OTP no longer works.
+        assert activations[0]["activation_code"] == single["activation_code"]
+        assert self.validate(client, {**activations[0], "otp": "wrong"}) == 404
+        assert self.validate(client, activations[0]) == 200
+        with app.app_context():
+            assert PatientActivation.query.count() == 2
+            assert Patient.query.count() == 2
+
+    def test_uses_set_based_writes(
+        self, client: FlaskClient, sql_statements: List[str]
+    ) -> None:
+        client.post(
+            "/dhos/v1/patient/p0/activation", headers={"Authorization": "Bearer TOKEN"}
+        )
+        sql_statements.clear()
+
+        self.create_activations(client, {"patient_ids": [f"p{i}" for i in range(10)]})
+
+        writes = [s for s in sql_statements if s.startswith(("INSERT", "UPDATE"))]
+        assert len(writes) == 3
+        assert len([s for s in sql_statements if s.startswith("SELECT")]) == 2
+
+    def test_static_patients_keep_static_activations(self, client: FlaskClient) -> None:
+        activations = self.create_activations(
+            client, {"patient_ids": ["static_patient_uuid_3", "p1"]}
+        )
+        static = next(
+            a for a in activations if a["patient_id"] == "static_patient_uuid_3"
+        )
+        assert static["activation_code"] == "3"
+
+    def test_static_patients_keep_request_order(self, client: FlaskClient) -> None:
+        activations = self.create_activations(
+            client, {"patient_ids": ["p1", "static_patient_uuid_3", "p2"]}
+        )
+        assert [a["patient_id"] for a in activations] == [
+            "p1",
+            "static_patient_uuid_3",
+            "p2",
+        ]
+        assert activations[1]["expires_at"]
+
+    def test_batch_is_atomic(
+        self, app: Flask, app_context: None, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(
+            controller, "hash_many_credentials", side_effect=RuntimeError("failed")
+        )
+        with pytest.raises(RuntimeError):
+            controller.create_patient_activations(["static_patient_uuid_3", "p1"])
+        db.session.rollback()
+        assert Patient.query.count() == 0
+        assert PatientActivation.query.count() == 0
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"patient_ids": []},
+            {"patient_ids": [f"p{i}" for i in range(2001)]},
+            {"patient_ids": [["p1"]]},
+            {},
+        ],
+    )
+    def test_rejects_invalid_request(self, client: FlaskClient, body: Dict) -> None:
+        self.create_activations(client, body, expected_status=400)
+
+    def test_rejects_ids_that_cannot_be_stored(
+        self, app: Flask, client: FlaskClient, mocker: MockerFixture
+    ) -> None:
+        # On PostgreSQL, patient IDs are stored as native UUIDs.
+        mocker.patch(
+            "dhos_activation_auth_api.models.types.stores_native_uuids",
+            return_value=True,
+        )
+        self.create_activations(
+            client,
+            {"patient_ids": ["a7c4c7b2-4b8e-4f9b-9f3e-2d8b7a6c5e41", "p2"]},
+            expected_status=400,
+        )
+        response = client.post(
+            "/dhos/v1/patient/p1/activation", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 400
+        with app.app_context():
+            assert Patient.query.count() == 0
+            assert PatientActivation.query.count() == 0
+
+        self.create_activations(
+            client,
+            {"patient_ids": ["a7c4c7b2-4b8e-4f9b-9f3e-2d8b7a6c5e41"]},
+        )
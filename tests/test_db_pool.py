@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from dhos_activation_auth_api.helpers.db_pool import InstrumentedQueuePool, init_db_pool
+
+
+def _sample(name: str) -> float:
+    value = REGISTRY.get_sample_value(name)
+    assert value is not None
+    return value
+
+
+class TestInstrumentedQueuePool:
+    def test_reports_checked_out_connections_and_waits(self, tmp_path: Path) -> None:
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=1,
+            pool_timeout=0.05,
+        )
+        waits = _sample("activation_auth_db_pool_wait_seconds_count")
+        timeouts = _sample("activation_auth_db_pool_timeouts_total")
+
+        first = engine.connect()
+        second = engine.connect()
+        assert _sample("activation_auth_db_pool_size") == 1
+        assert _sample("activation_auth_db_pool_checked_out") == 2
+        assert _sample("activation_auth_db_pool_overflow") == 1
+
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        assert _sample("activation_auth_db_pool_timeouts_total") == timeouts + 1
+        assert _sample("activation_auth_db_pool_wait_seconds_count") == waits + 3
+
+        first.close()
+        second.close()
+        assert _sample("activation_auth_db_pool_checked_out") == 0
+        engine.dispose()
+
+
+class TestInitDbPool:
+    def test_applies_pool_settings(self, app: Flask) -> None:
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql+psycopg2://u:p@db:5432/x"
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"executemany_mode": "values"}
+        app.config["DATABASE_POOL_SIZE"] = 8
+        init_db_pool(app)
+        options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["pool_size"] == 8
+        assert options["max_overflow"] == app.config["DATABASE_MAX_OVERFLOW"]
+        assert options["pool_pre_ping"] is True
+        assert options["executemany_mode"] == "values"
+
+    def test_leaves_sqlite_alone(self, app: Flask) -> None:
+        assert app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite")
+        assert "poolclass" not in app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+from typing import List, Optional
+from unittest.mock import Mock
+
+import pytest
+from flask import Flask
+from flask_batteries_included.sqldb import db
+from pytest_mock import MockFixture
+from sqlalchemy.dialects import postgresql
+
+from dhos_activation_auth_api.blueprint_api import controller
+from dhos_activation_auth_api.models.clinician import Clinician
+
+
+@pytest.mark.usefixtures("app_context")
+class TestDeactivateExpiredClinicians:
+    @pytest.fixture
+    def mock_audit(self, mocker: MockFixture) -> Mock:
+        return mocker.patch(
+            "dhos_activation_auth_api.blueprint_api.audit.record_sendentry_clinicians_deactivated"
+        )
+
+    def _add_clinician(
+        self, clinician_id: str, login_active: bool, expiry: Optional[date]
+    ) -> None:
+        obj = Clinician()
+        obj.uuid = f"uuid-{clinician_id}"
+        obj.clinician_id = clinician_id
+        obj.login_active = login_active
+        obj.send_entry_identifier = f"identifier-{clinician_id}"
+        obj.contract_expiry_eod_date_ = expiry
+        obj.products = []
+        db.session.add(obj)
+        db.session.commit()
+
+    def _login_active(self, clinician_id: str) -> bool:
+        obj = Clinician.query.filter_by(clinician_id=clinician_id).first()
+        assert obj is not None
+        return obj.login_active
+
+    def test_deactivates_only_expired_clinicians(self, mock_audit: Mock) -> None:
+        yesterday = date.today() - timedelta(days=1)
+        self._add_clinician("expired-1", True, yesterday)
+        self._add_clinician("expired-2", True, yesterday - timedelta(days=30))
+        self._add_clinician("expires-today", True, date.today())
+        self._add_clinician("no-expiry", True, None)
+        self._add_clinician("already-inactive", False, yesterday)
+
+        deactivated = controller.deactivate_expired_clinicians()
+
+        assert sorted(deactivated) == ["expired-1", "expired-2"]
+        assert self._login_active("expired-1") is False
+        assert self._login_active("expired-2") is False
+        assert self._login_active("expires-today") is True
+        assert self._login_active("no-expiry") is True
+        mock_audit.assert_called_once()
+        assert sorted(mock_audit.call_args.kwargs["clinician_ids"]) == [
+            "expired-1",
+            "expired-2",
+        ]
+
+    def test_deactivates_with_one_update(
+        self, mock_audit: Mock, sql_statements: List[str]
+    ) -> None:
+        self._add_clinician("expired-1", True, date.today() - timedelta(days=1))
+        sql_statements.clear()
+
+        assert controller.deactivate_expired_clinicians() == ["expired-1"]
+        updates = [s for s in sql_statements if s.startswith("UPDATE clinician")]
+        assert len(updates) == 1
+        # The expiry is checked by the UPDATE itself, not a list of IDs selected earlier.
+        assert "contract_expiry_eod_date <" in updates[0]
+        assert " IN (" not in updates[0]
+
+    def test_uses_update_returning_where_supported(self, mocker: MockFixture) -> None:
+        mocker.patch.object(db.session().get_bind().dialect, "full_returning", True)
+        execute = mocker.patch.object(db.session, "execute")
+        execute.return_value.scalars.return_value = ["expired-1"]
+        clinicians = Clinician.__table__
+
+        updated = controller._update_returning(
+            clinicians,
+            criteria=[clinicians.c.login_active.is_(True)],
+            values={"login_active": False},
+            returning=clinicians.c.clinician_id,
+        )
+
+        assert updated == ["expired-1"]
+        execute.assert_called_once()
+        statement = str(execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert statement.startswith("UPDATE clinician SET ")
+        assert statement.endswith(
+            "WHERE clinician.login_active IS true RETURNING clinician.clinician_id"
+        )
+
+    def test_no_audit_when_nothing_expired(self, mock_audit: Mock) -> None:
+        self._add_clinician("no-expiry", True, None)
+
+        assert controller.deactivate_expired_clinicians() == []
+        mock_audit.assert_not_called()
+
+    def test_cli_command(self, app: Flask, mock_audit: Mock) -> None:
+        self._add_clinician("expired-1", True, date.today() - timedelta(days=1))
+
+        result = app.test_cli_runner().invoke(args=["deactivate-expired-clinicians"])
+
+        assert result.exit_code == 0
+        assert "Deactivated 1 clinician(s)" in result.output
+        assert self._login_active("expired-1") is False
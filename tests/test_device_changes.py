@@ -0,0 +1,123 @@
+from typing import Dict, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+
+@pytest.mark.usefixtures("app")
+class TestDeviceChanges:
+    @pytest.fixture(autouse=True)
+    def no_settle_window(self, app: Flask) -> None:
+        app.config["DEVICE_CHANGES_SETTLE_SECONDS"] = 0
+
+    def create_device(self, client: FlaskClient, location_id: str = "L1") -> Dict:
+        response = client.post(
+            "/dhos/v1/device",
+            json={"location_id": location_id, "description": "Tablet"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        return response.json
+
+    def update_device(self, client: FlaskClient, device_id: str, update: Dict) -> None:
+        response = client.patch(
+            f"/dhos/v1/device/{device_id}",
+            json=update,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+
+    def get_changes(self, client: FlaskClient, query: str = "") -> Dict:
+        response = client.get(
+            f"/dhos/v1/device/changes{query}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        return response.json
+
+    def test_returns_all_devices_without_cursor(self, client: FlaskClient) -> None:
+        uuids: List[str] = [self.create_device(client)["uuid"] for _ in range(3)]
+        changes = self.get_changes(client)
+        assert [d["uuid"] for d in changes["devices"]] == uuids
+        assert changes["more"] is False
+
+    def test_returns_only_changes_since_cursor(self, client: FlaskClient) -> None:
+        first = self.create_device(client)
+        second = self.create_device(client)
+        cursor = self.get_changes(client)["cursor"]
+
+        assert self.get_changes(client, f"?cursor={cursor}")["devices"] == []
+
+        self.update_device(client, first["uuid"], {"location_id": "L2"})
+        self.update_device(client, second["uuid"], {"active": False})
+        third = self.create_device(client)
+
+        changes = self.get_changes(client, f"?cursor={cursor}")
+        assert [d["uuid"] for d in changes["devices"]] == [
+            first["uuid"],
+            second["uuid"],
+            third["uuid"],
+        ]
+        assert changes["devices"][0]["location_id"] == "L2"
+        assert changes["devices"][1]["active"] is False
+
+        # With nothing further changed, the cursor is returned unchanged.
+        empty = self.get_changes(client, f"?cursor={changes['cursor']}")
+        assert empty == {"devices": [], "cursor": changes["cursor"], "more": False}
+
+    def test_pages_through_changes(self, client: FlaskClient) -> None:
+        uuids: List[str] = [self.create_device(client)["uuid"] for _ in range(5)]
+        seen: List[str] = []
+        query = "?limit=2"
+        while True:
+            changes = self.get_changes(client, query)
+            seen += [d["uuid"] for d in changes["devices"]]
+            if not changes["more"]:
+                break
+            query = f"?limit=2&cursor={changes['cursor']}"
+        assert seen == uuids
+
+    def test_modified_since(self, client: FlaskClient) -> None:
+        old = self.create_device(client)
+        new = self.create_device(client)
+
+        changes = self.get_changes(client, "?modified_since=2000-01-01T00:00:00.000Z")
+        assert [d["uuid"] for d in changes["devices"]] == [old["uuid"], new["uuid"]]
+
+        changes = self.get_changes(client, f"?modified_since={new['modified']}")
+        assert changes["devices"][-1]["uuid"] == new["uuid"]
+
+        changes = self.get_changes(client, "?modified_since=2100-01-01T00:00:00.000Z")
+        assert changes["devices"] == []
+
+    def test_holds_back_unsettled_changes(
+        self, app: Flask, client: FlaskClient
+    ) -> None:
+        app.config["DEVICE_CHANGES_SETTLE_SECONDS"] = 60
+        self.create_device(client)
+        changes = self.get_changes(client)
+        assert changes["devices"] == []
+
+        # The held back device is returned once it has settled.
+        app.config["DEVICE_CHANGES_SETTLE_SECONDS"] = 0
+        changes = self.get_changes(client, f"?cursor={changes['cursor']}")
+        assert len(changes["devices"]) == 1
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "?cursor=Zm9v&modified_since=2020-01-01T00:00:00.000Z",
+            "?cursor=not-a-cursor",
+            "?limit=0",
+            "?limit=501",
+        ],
+    )
+    def test_rejects_invalid_query(self, client: FlaskClient, query: str) -> None:
+        response = client.get(
+            f"/dhos/v1/device/changes{query}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
@@ -0,0 +1,32 @@
+from typing import List
+
+import pytest
+from flask_batteries_included.sqldb import db
+
+from dhos_activation_auth_api.blueprint_api import controller
+
+
+@pytest.mark.usefixtures("app_context")
+class TestDeviceQueryPlan:
+    """
+    Guards against device listing queries regressing to full table scans, using SQLite's
+    EXPLAIN QUERY PLAN as a stand-in for the production planner.
+    """
+
+    def _query_plan(self, location_id: str, active: bool) -> List[str]:
+        query = controller._device_list_query(
+            active=active, location_id=location_id, cursor=None
+        )
+        sql = query.statement.compile(
+            dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+        return [row[-1] for row in db.session.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+    @pytest.mark.parametrize("active", [True, False])
+    @pytest.mark.parametrize("location_id", ["L1", "L1,L2,L3"])
+    def test_device_listing_by_location_uses_index(
+        self, location_id: str, active: bool
+    ) -> None:
+        plan = self._query_plan(location_id=location_id, active=active)
+        assert any("ix_device_location_id_active" in step for step in plan), plan
+        assert not any(step.startswith("SCAN device") for step in plan), plan
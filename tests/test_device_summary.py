@@ -0,0 +1,108 @@
+from typing import Dict, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+
+from dhos_activation_auth_api.blueprint_api.controller import DEVICE_CACHE_GENERATION
+from dhos_activation_auth_api.helpers.cache import get_cache
+from dhos_activation_auth_api.models.cache_generation import CacheGeneration
+from dhos_activation_auth_api.models.device import Device
+
+
+@pytest.mark.usefixtures("app")
+class TestDeviceSummary:
+    def create_device(self, client: FlaskClient, location_id: str) -> str:
+        response = client.post(
+            "/dhos/v1/device",
+            json={"location_id": location_id, "description": "Tablet"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        return response.json["uuid"]
+
+    def deactivate_device(self, client: FlaskClient, device_id: str) -> None:
+        response = client.patch(
+            f"/dhos/v1/device/{device_id}",
+            json={"active": False},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+
+    def get_summary(self, client: FlaskClient, query: str = "") -> List[Dict]:
+        response = client.get(
+            f"/dhos/v1/device/summary{query}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        return response.json
+
+    def test_counts_devices_per_location(self, client: FlaskClient) -> None:
+        for location_id in ["L2", "L1", "L1", "L1"]:
+            self.create_device(client, location_id)
+        self.deactivate_device(client, self.create_device(client, "L2"))
+        self.deactivate_device(client, self.create_device(client, "L3"))
+
+        assert self.get_summary(client) == [
+            {"location_id": "L1", "active": 3, "inactive": 0},
+            {"location_id": "L2", "active": 1, "inactive": 1},
+            {"location_id": "L3", "active": 0, "inactive": 1},
+        ]
+        assert self.get_summary(client, "?location_id=L3,L1") == [
+            {"location_id": "L1", "active": 3, "inactive": 0},
+            {"location_id": "L3", "active": 0, "inactive": 1},
+        ]
+
+    def test_no_devices(self, client: FlaskClient) -> None:
+        assert self.get_summary(client) == []
+
+    def test_serves_summary_from_cache(
+        self, client: FlaskClient, sql_statements: List[str]
+    ) -> None:
+        self.create_device(client, "L1")
+        self.get_summary(client)
+        sql_statements.clear()
+
+        assert self.get_summary(client) == [
+            {"location_id": "L1", "active": 1, "inactive": 0}
+        ]
+        assert get_cache("device_summary").hits == 1
+        # Only the fingerprint is read, not the counts per location.
+        assert len(sql_statements) == 1
+        assert "GROUP BY" not in sql_statements[0]
+
+    def test_device_writes_invalidate_cached_summary(self, client: FlaskClient) -> None:
+        device_id = self.create_device(client, "L1")
+        self.get_summary(client)
+
+        self.create_device(client, "L1")
+        assert self.get_summary(client) == [
+            {"location_id": "L1", "active": 2, "inactive": 0}
+        ]
+
+        self.deactivate_device(client, device_id)
+        assert self.get_summary(client) == [
+            {"location_id": "L1", "active": 1, "inactive": 1}
+        ]
+
+    def test_deleting_devices_invalidates_cached_summary(
+        self, app: Flask, client: FlaskClient
+    ) -> None:
+        self.create_device(client, "L1")
+        self.get_summary(client)
+
+        with app.app_context():
+            db.session.execute(Device.__table__.delete())
+            CacheGeneration.increment(DEVICE_CACHE_GENERATION)
+            db.session.commit()
+        assert self.get_summary(client) == []
+
+    def test_cache_can_be_disabled(self, app: Flask, client: FlaskClient) -> None:
+        app.config["DEVICE_SUMMARY_CACHE_TTL_SECONDS"] = 0
+        self.create_device(client, "L1")
+        self.get_summary(client)
+        self.get_summary(client)
+        assert len(get_cache("device_summary")) == 0
@@ -34,3 +34,51 @@ class TestGetDevice:
             headers={"Authorization": "Bearer TOKEN"},
         )
         assert get_response.status_code == 400
+
+    def test_returns_same_fields_as_create(self, client: FlaskClient) -> None:
+        post_response = client.post(
+            "/dhos/v1/device",
+            json={"location_id": "L1", "description": "here is a fun description"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert post_response.json is not None
+
+        get_response = client.get(
+            f"/dhos/v1/device/{post_response.json['uuid']}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+
+        assert get_response.status_code == 200
+        assert get_response.json == post_response.json
+
+    def test_returns_304_when_device_unchanged(self, client: FlaskClient) -> None:
+        post_response = client.post(
+            "/dhos/v1/device",
+            json={"location_id": "L1", "description": "here is a fun description"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert post_response.json is not None
+        device_uuid = post_response.json["uuid"]
+        get_response = client.get(
+            f"/dhos/v1/device/{device_uuid}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        etag = get_response.headers["ETag"]
+
+        not_modified_response = client.get(
+            f"/dhos/v1/device/{device_uuid}",
+            headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag},
+        )
+        assert not_modified_response.status_code == 304
+        assert not_modified_response.data == b""
+
+        client.patch(
+            f"/dhos/v1/device/{device_uuid}",
+            json={"description": "changed"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        modified_response = client.get(
+            f"/dhos/v1/device/{device_uuid}",
+            headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag},
+        )
+        assert modified_response.status_code == 200
+        assert modified_response.headers["ETag"] != etag
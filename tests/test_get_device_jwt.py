@@ -1,10 +1,17 @@
+from typing import Any
+
 import pytest
 from flask import Flask
 from flask.testing import FlaskClient
+from pytest_mock import MockFixture
 
+from dhos_activation_auth_api.blueprint_api import controller
 from dhos_activation_auth_api.helpers.utils import (
     generate_secure_random_string,
     hash_ascii_with_salt,
+    hash_credential,
+    is_legacy_credential_hash,
+    verify_credential,
 )
 from dhos_activation_auth_api.models.device import Device, db
 
@@ -80,15 +87,11 @@ class TestDeviceJWT:
         auth_code = generate_secure_random_string(
             app.config["AUTHORISATION_CODE_LENGTH"]
         )
-        auth_code_salt = generate_secure_random_string(app.config["SALT_LENGTH"])
-        hashed_auth_code = hash_ascii_with_salt(auth_code, auth_code_salt)
-
         device = Device(
             uuid=uuid,
             location_id="L1",
             description="some description",
-            hashed_authorisation_code=hashed_auth_code,
-            authorisation_code_salt=auth_code_salt,
+            hashed_authorisation_code=hash_credential(auth_code),
         )
 
         db.session.add(device)
@@ -110,15 +113,11 @@ class TestDeviceJWT:
         auth_code = generate_secure_random_string(
             app.config["AUTHORISATION_CODE_LENGTH"]
         )
-        auth_code_salt = generate_secure_random_string(app.config["SALT_LENGTH"])
-        hashed_auth_code = hash_ascii_with_salt(auth_code, auth_code_salt)
-
         device = Device(
             uuid=uuid,
             location_id="L1",
             description="some description",
-            hashed_authorisation_code=hashed_auth_code,
-            authorisation_code_salt=auth_code_salt,
+            hashed_authorisation_code=hash_credential(auth_code),
             active=False,
         )
 
@@ -130,3 +129,80 @@ class TestDeviceJWT:
             headers={"x-authorisation-code": auth_code},
         )
         assert response.status_code == 403
+
+    @pytest.mark.usefixtures("mock_dhosredis")
+    def test_legacy_hash_is_rehashed_on_verify(
+        self, client: FlaskClient, app: Flask
+    ) -> None:
+        uuid = "12345"
+        auth_code = generate_secure_random_string(
+            app.config["AUTHORISATION_CODE_LENGTH"]
+        )
+        auth_code_salt = generate_secure_random_string(30)
+        device = Device(
+            uuid=uuid,
+            location_id="L1",
+            description="some description",
+            hashed_authorisation_code=hash_ascii_with_salt(auth_code, auth_code_salt),
+            authorisation_code_salt=auth_code_salt,
+        )
+        db.session.add(device)
+        db.session.commit()
+        modified = device.modified
+
+        for _ in range(2):
+            response = client.get(
+                f"/dhos/v1/device/{uuid}/jwt",
+                headers={"x-authorisation-code": auth_code},
+            )
+            assert response.status_code == 200
+
+        db.session.expire_all()
+        device = Device.query.get(uuid)
+        assert not is_legacy_credential_hash(device.hashed_authorisation_code)
+        assert device.authorisation_code_salt is None
+        # Rewriting the hash isn't a change to the device.
+        assert device.modified == modified
+
+    @pytest.mark.usefixtures("mock_dhosredis")
+    def test_rehash_keeps_hash_changed_since_verify(
+        self, client: FlaskClient, app: Flask, mocker: MockFixture
+    ) -> None:
+        uuid = "12345"
+        auth_code = generate_secure_random_string(
+            app.config["AUTHORISATION_CODE_LENGTH"]
+        )
+        auth_code_salt = generate_secure_random_string(30)
+        device = Device(
+            uuid=uuid,
+            location_id="L1",
+            description="some description",
+            hashed_authorisation_code=hash_ascii_with_salt(auth_code, auth_code_salt),
+            authorisation_code_salt=auth_code_salt,
+        )
+        db.session.add(device)
+        db.session.commit()
+        new_hash = hash_credential("a-newer-code")
+
+        def reactivate_after_verify(*args: Any) -> bool:
+            valid = verify_credential(*args)
+            # The device is activated again before the legacy hash is replaced.
+            db.session.execute(
+                Device.__table__.update()
+                .where(Device.__table__.c.uuid == uuid)
+                .values(hashed_authorisation_code=new_hash)
+            )
+            db.session.commit()
+            return valid
+
+        mocker.patch.object(
+            controller, "verify_credential", side_effect=reactivate_after_verify
+        )
+        response = client.get(
+            f"/dhos/v1/device/{uuid}/jwt",
+            headers={"x-authorisation-code": auth_code},
+        )
+        assert response.status_code == 200
+
+        db.session.expire_all()
+        assert Device.query.get(uuid).hashed_authorisation_code == new_hash
@@ -1,5 +1,9 @@
+from typing import Dict, List
+
 import pytest
+from flask import Flask
 from flask.testing import FlaskClient
+from werkzeug.test import TestResponse
 
 
 @pytest.mark.usefixtures("app")
@@ -80,3 +84,217 @@ class TestGetDevices:
             headers={"Authorization": "Bearer TOKEN"},
         )
         assert response.status_code == 400
+
+    def _get_page(
+        self, client: FlaskClient, query: str, expected_status: int = 200
+    ) -> TestResponse:
+        response = client.get(
+            f"/dhos/v1/device?{query}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == expected_status
+        return response
+
+    def test_paginates_devices_with_cursor(self, client: FlaskClient) -> None:
+        self.create_devices(client)
+        seen: List[str] = []
+        query = "limit=3"
+        while True:
+            response = self._get_page(client, query)
+            assert response.json is not None
+            assert len(response.json) <= 3
+            seen.extend(d["uuid"] for d in response.json)
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if next_cursor is None:
+                break
+            query = f"limit=3&cursor={next_cursor}"
+
+        all_devices = self._get_page(client, "").json
+        assert all_devices is not None
+        assert seen == [d["uuid"] for d in all_devices]
+        assert len(seen) == 8
+
+    def test_last_page_has_no_next_cursor(self, client: FlaskClient) -> None:
+        self.create_devices(client)
+        response = self._get_page(client, "limit=20")
+        assert response.json is not None
+        assert len(response.json) == 8
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_limit_above_maximum_fails(self, app: Flask, client: FlaskClient) -> None:
+        self._get_page(client, f"limit={app.config['MAX_DEVICE_PAGE_SIZE'] + 1}", 400)
+
+    def test_invalid_cursor_fails(self, client: FlaskClient) -> None:
+        self._get_page(client, "cursor=not-a-cursor", 400)
+
+    def test_streams_devices(self, client: FlaskClient) -> None:
+        self.create_devices(client)
+        response = self._get_page(client, "stream=true&location_id=L1")
+        assert response.is_streamed
+        assert response.json is not None
+        assert len(response.json) == 4
+        for d in response.json:
+            assert d["location_id"] == "L1"
+
+    def test_streams_devices_from_cursor(self, client: FlaskClient) -> None:
+        self.create_devices(client)
+        first_page = self._get_page(client, "limit=5")
+        cursor = first_page.headers["X-Next-Cursor"]
+        response = self._get_page(client, f"stream=true&cursor={cursor}")
+        assert response.json is not None
+        assert len(response.json) == 3
+
+    def test_streams_no_devices(self, client: FlaskClient) -> None:
+        response = self._get_page(client, "stream=true")
+        assert response.json == []
+
+    def test_stream_with_limit_fails(self, client: FlaskClient) -> None:
+        self._get_page(client, "stream=true&limit=5", 400)
+
+    def test_does_not_load_authorisation_code_columns(
+        self, client: FlaskClient, sql_statements: List[str]
+    ) -> None:
+        self.create_devices(client, count=2)
+        sql_statements.clear()
+        self._get_page(client, "location_id=L1")
+        # Reading the streamed body runs its query and closes the stream.
+        assert self._get_page(client, "stream=true").data
+        device_selects = [
+            s for s in sql_statements if "FROM device" in s and "count(" not in s
+        ]
+        assert len(device_selects) == 2
+        for statement in device_selects:
+            assert "hashed_authorisation_code" not in statement
+            assert "authorisation_code_salt" not in statement
+
+    def test_returns_304_when_device_list_unchanged(
+        self, client: FlaskClient, sql_statements: List[str]
+    ) -> None:
+        self.create_devices(client)
+        etag = self._get_page(client, "location_id=L1").headers["ETag"]
+        sql_statements.clear()
+        response = client.get(
+            "/dhos/v1/device?location_id=L1",
+            headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == etag
+        # Only the aggregate query is needed to answer the request.
+        assert len([s for s in sql_statements if "FROM device" in s]) == 1
+
+    @pytest.mark.parametrize(
+        "change",
+        [{"description": "changed"}, {"location_id": "L3"}, {"active": False}],
+    )
+    def test_device_list_etag_changes_when_device_changes(
+        self, client: FlaskClient, change: Dict
+    ) -> None:
+        self.create_devices(client)
+        first_page = self._get_page(client, "location_id=L1")
+        assert first_page.json is not None
+        client.patch(
+            f"/dhos/v1/device/{first_page.json[0]['uuid']}",
+            json=change,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        response = client.get(
+            "/dhos/v1/device?location_id=L1",
+            headers={
+                "Authorization": "Bearer TOKEN",
+                "If-None-Match": first_page.headers["ETag"],
+            },
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != first_page.headers["ETag"]
+
+    def test_returns_304_when_streamed_device_list_unchanged(
+        self, client: FlaskClient
+    ) -> None:
+        self.create_devices(client)
+        first_response = self._get_page(client, "stream=true")
+        # Read the stream so it is closed before the next request.
+        assert first_response.data
+        etag = first_response.headers["ETag"]
+        response = client.get(
+            "/dhos/v1/device?stream=true",
+            headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag},
+        )
+        assert response.status_code == 304
+
+    def test_includes_activation_status(
+        self, client: FlaskClient, sql_statements: List[str]
+    ) -> None:
+        device_ids: List[str] = []
+        for i in range(3):
+            create_response = client.post(
+                "/dhos/v1/device",
+                json={"location_id": "L1", "description": f"{i}"},
+                headers={"Authorization": "Bearer TOKEN"},
+            )
+            assert create_response.json is not None
+            device_ids.append(create_response.json["uuid"])
+        # The second device has an unused activation, the third has been activated.
+        for device_id in device_ids[1:]:
+            activation_response = client.post(
+                f"/dhos/v1/device/{device_id}/activation",
+                headers={"Authorization": "Bearer TOKEN"},
+            )
+            assert activation_response.json is not None
+            code = activation_response.json["code"]
+        assert (
+            client.post(f"/dhos/v1/activation/{code}?type=send_entry").status_code
+            == 200
+        )
+
+        sql_statements.clear()
+        response = self._get_page(client, "include=activation_status")
+        assert response.json is not None
+        assert [d["activation_status"] for d in response.json] == [
+            {"activated": False, "pending_activation": False},
+            {"activated": False, "pending_activation": True},
+            {"activated": True, "pending_activation": False},
+        ]
+        device_selects = [
+            s for s in sql_statements if "FROM device" in s and "count(" not in s
+        ]
+        assert len(device_selects) == 1
+        assert "authorisation_code_salt" not in device_selects[0]
+
+    def test_device_list_etag_changes_with_activation_status(
+        self, client: FlaskClient
+    ) -> None:
+        self.create_devices(client, count=2)
+        first_response = self._get_page(client, "include=activation_status")
+        assert first_response.json is not None
+        client.post(
+            f"/dhos/v1/device/{first_response.json[0]['uuid']}/activation",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        response = client.get(
+            "/dhos/v1/device?include=activation_status",
+            headers={
+                "Authorization": "Bearer TOKEN",
+                "If-None-Match": first_response.headers["ETag"],
+            },
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json[0]["activation_status"]["pending_activation"] is True
+
+    def test_streams_activation_status(self, client: FlaskClient) -> None:
+        self.create_devices(client, count=2)
+        response = self._get_page(client, "stream=true&include=activation_status")
+        assert response.json is not None
+        assert response.json[0]["activation_status"] == {
+            "activated": False,
+            "pending_activation": False,
+        }
+
+    def test_excludes_activation_status_by_default(self, client: FlaskClient) -> None:
+        self.create_devices(client, count=2)
+        response = self._get_page(client, "")
+        assert response.json is not None
+        assert "activation_status" not in response.json[0]
+
+    def test_unknown_include_fails(self, client: FlaskClient) -> None:
+        self._get_page(client, "include=activation_status,secrets", 400)
@@ -3,12 +3,19 @@ from typing import Dict, Optional
 import pytest
 from flask import Flask, current_app
 from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
 from jose import jwt
 from pytest_mock import MockFixture
 from werkzeug.test import TestResponse
 
 from dhos_activation_auth_api.blueprint_api import controller
-from dhos_activation_auth_api.helpers.utils import hash_ascii_with_salt
+from dhos_activation_auth_api.helpers import utils
+from dhos_activation_auth_api.helpers.utils import (
+    hash_ascii_with_salt,
+    is_legacy_credential_hash,
+    verify_credential,
+)
+from dhos_activation_auth_api.models.patient import Patient
 from dhos_activation_auth_api.models.patient_activation import PatientActivation
 
 
@@ -117,12 +124,31 @@ class TestCreatePatientActivation:
         assert used_activation is not None
 
         hashed_authorisation_code = used_activation.patient.hashed_authorisation_code
-        authorisation_code_salt = used_activation.patient.authorisation_code_salt
+        assert not is_legacy_credential_hash(hashed_authorisation_code)
+        assert used_activation.patient.authorisation_code_salt is None
+        assert verify_credential(auth_code, hashed_authorisation_code)
 
-        assert (
-            hash_ascii_with_salt(auth_code, authorisation_code_salt)
-            == hashed_authorisation_code
+    def test_legacy_authorisation_code_is_rehashed_on_verify(
+        self, client: FlaskClient
+    ) -> None:
+        patient_id = "abcedf12345"
+        auth_code = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123"
+        salt = "0123456789ABCDEFGHIJKLMNOPQRST"
+        patient = Patient(
+            patient_id=patient_id,
+            hashed_authorisation_code=hash_ascii_with_salt(auth_code, salt),
+            authorisation_code_salt=salt,
         )
+        db.session.add(patient)
+        db.session.commit()
+
+        for _ in range(2):
+            assert self._generate_jwt(client, patient_id, auth_code).status_code == 200
+
+        db.session.expire_all()
+        patient = Patient.query.filter_by(patient_id=patient_id).one()
+        assert not is_legacy_credential_hash(patient.hashed_authorisation_code)
+        assert patient.authorisation_code_salt is None
 
     def test_update_nonexistent_activation(self, client: FlaskClient) -> None:
         response = client.post(f"/dhos/v1/activation/{123}", json={"otp": "456"})
@@ -168,6 +194,47 @@ class TestCreatePatientActivation:
         assert decoded["metadata"]["patient_id"] == patient_id
         assert decoded["scope"] == expected_scope
 
+    def test_validate_activation_includes_jwt(
+        self, client: FlaskClient, mocker: MockFixture
+    ) -> None:
+        patient_id = "abcedf12345"
+        activation = self._create_and_return_activation(client, patient_id)
+        hash_spy = mocker.spy(utils, "derive_credential_key")
+
+        response = client.post(
+            f"/dhos/v1/activation/{activation['activation_code']}?include_jwt=true",
+            json={"otp": activation["otp"]},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        # One hash to check the OTP and one for the new authorisation code, but none to
+        # check the authorisation code again.
+        assert hash_spy.call_count == 2
+
+        hs_key = current_app.config["HS_KEY"]
+        audience = current_app.config["PROXY_URL"] + "/"
+        decoded = jwt.decode(
+            response.json["jwt"], hs_key, algorithms="HS512", audience=audience
+        )
+        assert decoded["metadata"]["patient_id"] == patient_id
+
+        # The authorisation code is still returned and works as before.
+        jwt_response = self._generate_jwt(
+            client, patient_id, response.json["authorisation_code"]
+        )
+        assert jwt_response.status_code == 200
+
+    def test_validate_activation_excludes_jwt_by_default(
+        self, client: FlaskClient
+    ) -> None:
+        activation = self._create_and_return_activation(client, "abcedf12345")
+        response = client.post(
+            f"/dhos/v1/activation/{activation['activation_code']}",
+            json={"otp": activation["otp"]},
+        )
+        assert response.json is not None
+        assert "jwt" not in response.json
+
     def test_get_patient_jwt_without_header(self, client: FlaskClient) -> None:
         response = client.get(
             f"/dhos/v1/patient/123/jwt",
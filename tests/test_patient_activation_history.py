@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from werkzeug.test import TestResponse
+
+from dhos_activation_auth_api.models.patient import Patient
+from dhos_activation_auth_api.models.patient_activation import PatientActivation
+
+
+@pytest.mark.usefixtures("app_context")
+class TestPatientActivationHistory:
+    @pytest.fixture(autouse=True)
+    def activations(self) -> List[str]:
+        """Ten completed activations, one a day from 1 January 2020, newest first."""
+        db.session.add(Patient(patient_id="p1"))
+        uuids: List[str] = []
+        for day in range(10):
+            activation = PatientActivation(
+                uuid=f"a{day}",
+                patient_id="p1",
+                code=f"code{day}",
+                hashed_otp=b"hash",
+                used=True,
+                activated_timestamp=datetime(2020, 1, 1) + timedelta(days=day),
+                activated_timezone=3600,
+            )
+            db.session.add(activation)
+            uuids.insert(0, activation.uuid)
+        db.session.commit()
+        return uuids
+
+    def _get(
+        self, client: FlaskClient, query: str, expected_status: int = 200
+    ) -> TestResponse:
+        response = client.get(
+            f"/dhos/v1/patient/p1/activation?{query}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == expected_status
+        return response
+
+    def test_returns_all_activations_without_limit(
+        self, client: FlaskClient, activations: List[str]
+    ) -> None:
+        response = self._get(client, "")
+        assert response.json is not None
+        assert [a["uuid"] for a in response.json] == activations
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_paginates_activations_with_cursor(
+        self, client: FlaskClient, activations: List[str]
+    ) -> None:
+        seen: List[str] = []
+        query = "limit=4"
+        while True:
+            response = self._get(client, query)
+            assert response.json is not None
+            assert len(response.json) <= 4
+            seen.extend(a["uuid"] for a in response.json)
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if next_cursor is None:
+                break
+            query = f"limit=4&cursor={next_cursor}"
+        assert seen == activations
+
+    def test_paginates_activations_missing_timestamp(
+        self, client: FlaskClient, activations: List[str]
+    ) -> None:
+        for uuid in ["n1", "n2"]:
+            db.session.add(
+                PatientActivation(
+                    uuid=uuid,
+                    patient_id="p1",
+                    code=f"code-{uuid}",
+                    hashed_otp=b"hash",
+                    used=True,
+                )
+            )
+        db.session.commit()
+
+        seen: List[str] = []
+        query = "limit=1"
+        while True:
+            response = self._get(client, query)
+            assert response.json is not None
+            seen.extend(a["uuid"] for a in response.json)
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if next_cursor is None:
+                break
+            query = f"limit=1&cursor={next_cursor}"
+        assert seen == ["n2", "n1"] + activations
+
+    def test_filters_by_activation_time(
+        self, client: FlaskClient, activations: List[str]
+    ) -> None:
+        response = self._get(
+            client,
+            "activated_after=2020-01-03T00:00:00.000Z"
+            "&activated_before=2020-01-06T00:00:00.000Z",
+        )
+        assert response.json is not None
+        assert [a["uuid"] for a in response.json] == ["a4", "a3", "a2"]
+
+    def test_limit_above_maximum_fails(self, app: Flask, client: FlaskClient) -> None:
+        self._get(client, f"limit={app.config['MAX_ACTIVATION_PAGE_SIZE'] + 1}", 400)
+
+    def test_invalid_cursor_fails(self, client: FlaskClient) -> None:
+        self._get(client, "cursor=not-a-cursor", 400)
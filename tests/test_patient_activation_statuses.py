@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pytest
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+
+from dhos_activation_auth_api.models.patient import Patient
+from dhos_activation_auth_api.models.patient_activation import PatientActivation
+
+
+@pytest.mark.usefixtures("app_context")
+class TestPatientActivationStatuses:
+    def add_activation(
+        self, patient_id: str, activated_timestamp: Optional[datetime], used: bool
+    ) -> None:
+        if Patient.query.filter_by(patient_id=patient_id).first() is None:
+            db.session.add(Patient(patient_id=patient_id))
+        db.session.add(
+            PatientActivation(
+                patient_id=patient_id,
+                code=f"{patient_id}{activated_timestamp}",
+                hashed_otp=b"hash",
+                used=used,
+                activated_timestamp=activated_timestamp,
+                activated_timezone=0 if activated_timestamp else None,
+            )
+        )
+        db.session.commit()
+
+    def get_statuses(self, client: FlaskClient, patient_ids: List[str]) -> List[Dict]:
+        response = client.post(
+            "/dhos/v1/patient/activation/status",
+            json={"patient_ids": patient_ids},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        return response.json
+
+    def test_returns_latest_completed_activation(
+        self, client: FlaskClient, sql_statements: List[str]
+    ) -> None:
+        self.add_activation("p1", datetime(2020, 1, 1), used=True)
+        self.add_activation("p1", datetime(2021, 6, 1), used=True)
+        self.add_activation("p1", None, used=False)
+        self.add_activation("p2", datetime(2019, 3, 4, 12, 30), used=True)
+        self.add_activation("p3", None, used=False)
+        sql_statements.clear()
+
+        statuses = self.get_statuses(client, ["p3", "p1", "p2", "unknown"])
+
+        assert statuses == [
+            {"patient_id": "p3", "activation_completed": None},
+            {"patient_id": "p1", "activation_completed": "2021-06-01T00:00:00.000Z"},
+            {"patient_id": "p2", "activation_completed": "2019-03-04T12:30:00.000Z"},
+            {"patient_id": "unknown", "activation_completed": None},
+        ]
+        assert len([s for s in sql_statements if "patient_activation" in s]) == 1
+
+    def test_empty_lookup(self, client: FlaskClient) -> None:
+        assert self.get_statuses(client, []) == []
+
+    def test_too_many_patients_fails(self, client: FlaskClient) -> None:
+        response = client.post(
+            "/dhos/v1/patient/activation/status",
+            json={"patient_ids": [f"p{i}" for i in range(2001)]},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_non_string_patient_ids_fail(self, client: FlaskClient) -> None:
+        response = client.post(
+            "/dhos/v1/patient/activation/status",
+            json={"patient_ids": [{"patient_id": "p1"}]},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
@@ -0,0 +1,153 @@
+from typing import Dict, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from mock import Mock
+from pytest_mock import MockFixture
+from sqlalchemy.exc import IntegrityError
+
+from dhos_activation_auth_api.blueprint_api import controller
+from dhos_activation_auth_api.models.device import Device
+from dhos_activation_auth_api.models.device_activation import DeviceActivation
+
+
+@pytest.mark.usefixtures("app")
+class TestProvisionDevices:
+    def provision(
+        self, client: FlaskClient, body: Dict, expected_status: int = 200
+    ) -> List[Dict]:
+        response = client.post(
+            "/dhos/v1/device/provision",
+            json=body,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == expected_status
+        assert response.json is not None
+        return response.json
+
+    def test_provisions_devices_with_activations(self, client: FlaskClient) -> None:
+        provisioned = self.provision(
+            client, {"location_id": "L1", "descriptions": ["Tablet 1", "Tablet 2"]}
+        )
+        assert [p["description"] for p in provisioned] == ["Tablet 1", "Tablet 2"]
+        assert len({p["code"] for p in provisioned}) == 2
+
+        devices = client.get(
+            "/dhos/v1/device?location_id=L1&include=activation_status",
+            headers={"Authorization": "Bearer TOKEN"},
+        ).json
+        assert devices is not None
+        assert {d["uuid"] for d in devices} == {p["device_id"] for p in provisioned}
+        for device in devices:
+            assert device["activation_status"]["pending_activation"] is True
+
+        # The activation codes can be used in the same way as individual ones.
+        activation_response = client.post(
+            f"/dhos/v1/activation/{provisioned[0]['code']}?type=send_entry"
+        )
+        assert activation_response.status_code == 200
+        assert activation_response.json is not None
+        assert activation_response.json["device_id"] == provisioned[0]["device_id"]
+
+    def test_uses_set_based_inserts(
+        self, client: FlaskClient, sql_statements: List[str]
+    ) -> None:
+        self.provision(
+            client, {"location_id": "L1", "descriptions": [str(i) for i in range(20)]}
+        )
+        inserts = [s for s in sql_statements if s.startswith("INSERT INTO device")]
+        # executemany reports each INSERT statement once.
+        assert len(inserts) == 2
+
+    def test_regenerates_codes_in_use(
+        self, app: Flask, client: FlaskClient, mocker: MockFixture
+    ) -> None:
+        existing = self.provision(client, {"location_id": "L1", "descriptions": ["1"]})
+        mocker.patch.object(
+            controller,
+            "generate_secure_numeric_string",
+            side_effect=[existing[0]["code"], "111111111", "111111111", "222222222"],
+        )
+        provisioned = self.provision(
+            client, {"location_id": "L1", "descriptions": ["2", "3"]}
+        )
+        assert {p["code"] for p in provisioned} == {"111111111", "222222222"}
+        with app.app_context():
+            assert DeviceActivation.query.filter_by(used=False).count() == 3
+
+    def test_retries_when_code_issued_concurrently(
+        self, app: Flask, client: FlaskClient, mocker: MockFixture
+    ) -> None:
+        existing = self.provision(client, {"location_id": "L1", "descriptions": ["1"]})
+        # Another request issued the code after it was checked, so the INSERT fails.
+        mocker.patch.object(
+            controller,
+            "_generate_unused_activation_codes",
+            side_effect=[
+                [existing[0]["code"], "111111111"],
+                ["222222222", "333333333"],
+            ],
+        )
+        provisioned = self.provision(
+            client, {"location_id": "L1", "descriptions": ["2", "3"]}
+        )
+        assert [p["code"] for p in provisioned] == ["222222222", "333333333"]
+        with app.app_context():
+            assert Device.query.count() == 3
+            assert DeviceActivation.query.filter_by(used=False).count() == 3
+
+    def test_fails_when_codes_keep_clashing(
+        self, app: Flask, client: FlaskClient, mocker: MockFixture
+    ) -> None:
+        existing = self.provision(client, {"location_id": "L1", "descriptions": ["1"]})
+        mocker.patch.object(
+            controller,
+            "_generate_unused_activation_codes",
+            return_value=[existing[0]["code"]],
+        )
+        with pytest.raises(IntegrityError):
+            client.post(
+                "/dhos/v1/device/provision",
+                json={"location_id": "L1", "descriptions": ["2"]},
+                headers={"Authorization": "Bearer TOKEN"},
+            )
+        with app.app_context():
+            assert Device.query.count() == 1
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"location_id": "L1", "descriptions": []},
+            {"location_id": "L1", "descriptions": ["x"] * 5001},
+            {"descriptions": ["Tablet 1"]},
+        ],
+    )
+    def test_rejects_invalid_request(
+        self, app: Flask, client: FlaskClient, body: Dict
+    ) -> None:
+        self.provision(client, body, expected_status=400)
+        with app.app_context():
+            assert Device.query.count() == 0
+
+
+@pytest.mark.usefixtures("app_context")
+class TestRetryOnDuplicateCode:
+    @staticmethod
+    def violation(constraint_name: str) -> IntegrityError:
+        return IntegrityError(
+            "INSERT", {}, Mock(diag=Mock(constraint_name=constraint_name))
+        )
+
+    def test_retries_duplicate_code(self) -> None:
+        write = Mock(
+            side_effect=[self.violation("ix_device_activation_code_unused"), "done"]
+        )
+        assert controller._retry_on_duplicate_code(write) == "done"
+        assert write.call_count == 2
+
+    def test_other_violations_are_not_retried(self) -> None:
+        write = Mock(side_effect=self.violation("device_activation_device_id_fkey"))
+        with pytest.raises(IntegrityError):
+            controller._retry_on_duplicate_code(write)
+        assert write.call_count == 1
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+from pytest_mock import MockFixture
+
+from dhos_activation_auth_api.helpers import random_pool
+from dhos_activation_auth_api.helpers.random_pool import SecureStringPool
+from dhos_activation_auth_api.helpers.utils import numeric_choices, random_choices
+
+
+class TestSecureStringPool:
+    @pytest.fixture
+    def pool(self, mocker: MockFixture) -> SecureStringPool:
+        # Refill synchronously in tests, rather than on the background thread.
+        mocker.patch.object(SecureStringPool, "_start_refill")
+        return SecureStringPool(max_size=4)
+
+    def test_take_generates_synchronously_when_empty(
+        self, pool: SecureStringPool, mocker: MockFixture
+    ) -> None:
+        generate = mocker.spy(random_pool, "generate_secure_string")
+        value = pool.take(random_choices, 10)
+        assert len(value) == 10
+        assert set(value) <= set(random_choices)
+        generate.assert_called_once_with(10, random_choices)
+
+    def test_take_uses_pool_once_refilled(
+        self, pool: SecureStringPool, mocker: MockFixture
+    ) -> None:
+        pool.take(numeric_choices, 6)
+        pool.refill()
+        assert pool.available(numeric_choices, 6) == 4
+
+        generate = mocker.spy(random_pool, "generate_secure_string")
+        values = [pool.take(numeric_choices, 6) for _ in range(4)]
+        assert generate.call_count == 0
+        assert all(len(v) == 6 and v.isdigit() for v in values)
+        assert pool.available(numeric_choices, 6) == 0
+
+    def test_pools_are_kept_per_alphabet_and_length(
+        self, pool: SecureStringPool
+    ) -> None:
+        pool.take(numeric_choices, 6)
+        pool.take(random_choices, 6)
+        pool.refill()
+        assert pool.available(numeric_choices, 6) == 4
+        assert pool.available(random_choices, 6) == 4
+        assert pool.available(random_choices, 30) == 0
+
+    def test_invalid_length_is_not_pooled(self, pool: SecureStringPool) -> None:
+        with pytest.raises(ValueError):
+            pool.take(random_choices, 2)
+        pool.refill()
+        assert pool.available(random_choices, 2) == 0
+
+    def test_pool_is_discarded_after_fork(self, pool: SecureStringPool) -> None:
+        pool.take(random_choices, 10)
+        pool.refill()
+        pool._pid = -1
+        pool.take(random_choices, 10)
+        assert pool.available(random_choices, 10) == 0
+
+    def test_pool_disabled(self, mocker: MockFixture) -> None:
+        pool = SecureStringPool(max_size=0)
+        start_refill = mocker.spy(pool, "_start_refill")
+        assert len(pool.take(random_choices, 10)) == 10
+        assert start_refill.call_count == 0
+        assert pool.available(random_choices, 10) == 0
+
+
+def test_pool_is_refilled_in_background() -> None:
+    pool = SecureStringPool(max_size=8)
+    pool.take(random_choices, 10)
+    deadline = time.monotonic() + 5
+    while pool.available(random_choices, 10) < 8 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.available(random_choices, 10) == 8
@@ -0,0 +1,217 @@
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Generator, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from mock import Mock
+from prometheus_client import REGISTRY
+from pytest_mock import MockerFixture
+from sqlalchemy.exc import OperationalError
+
+from dhos_activation_auth_api.blueprint_api import controller
+from dhos_activation_auth_api.helpers.replica import (
+    ReplicaRouter,
+    init_read_replica,
+    reads_from_replica,
+)
+from dhos_activation_auth_api.models.device import Device
+
+
+def _reads(database: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "activation_auth_replica_reads_total", {"database": database}
+        )
+        or 0
+    )
+
+
+@pytest.fixture
+def replica(app: Flask, tmp_path: Path) -> Generator[ReplicaRouter, None, None]:
+    app.config["REPLICA_DATABASE_URI"] = f"sqlite:///{tmp_path / 'replica.db'}"
+    init_read_replica(app)
+    router: ReplicaRouter = app.extensions["replica_router"]
+    db.metadata.create_all(router.engine)
+    yield router
+    router.engine.dispose()
+
+
+def _create_replica_device(router: ReplicaRouter) -> str:
+    device_uuid = str(uuid.uuid4())
+    now = datetime.utcnow()
+    with router.engine.begin() as connection:
+        connection.execute(
+            Device.__table__.insert().values(
+                uuid=device_uuid,
+                created=now,
+                created_by_="replica",
+                modified=now,
+                modified_by_="replica",
+                location_id="L1",
+                description="only on the replica",
+                active=True,
+            )
+        )
+    return device_uuid
+
+
+class TestReadsFromReplica:
+    def test_reads_from_replica(
+        self, client: FlaskClient, replica: ReplicaRouter
+    ) -> None:
+        device_uuid = _create_replica_device(replica)
+        replica_reads = _reads("replica")
+        response = client.get(
+            f"/dhos/v1/device/{device_uuid}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["description"] == "only on the replica"
+        assert _reads("replica") > replica_reads
+
+    def test_falls_back_to_primary_when_replica_fails(
+        self, client: FlaskClient, replica: ReplicaRouter
+    ) -> None:
+        Device.__table__.drop(replica.engine)
+        post_response = client.post(
+            "/dhos/v1/device",
+            json={"location_id": "L1", "description": "on the primary"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert post_response.json is not None
+
+        response = client.get(
+            f"/dhos/v1/device/{post_response.json['uuid']}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["description"] == "on the primary"
+        assert not replica.available()
+
+    def test_skips_lagging_replica(
+        self, client: FlaskClient, replica: ReplicaRouter, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(replica, "replication_lag", return_value=60.0)
+        device_uuid = _create_replica_device(replica)
+        response = client.get(
+            f"/dhos/v1/device/{device_uuid}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 404
+
+    def test_uses_primary_inside_transaction(
+        self, app_context: None, replica: ReplicaRouter
+    ) -> None:
+        device = Device(location_id="L1", description="not yet committed")
+        db.session.add(device)
+        db.session.flush()
+        assert controller.get_device(device.uuid)["description"] == "not yet committed"
+        db.session.rollback()
+
+    def test_writes_after_replica_read_go_to_primary(
+        self, app_context: None, replica: ReplicaRouter
+    ) -> None:
+        replica_uuid = _create_replica_device(replica)
+        assert controller.get_device(replica_uuid)["uuid"] == replica_uuid
+
+        created = controller.create_device(
+            {"location_id": "L2", "description": "written"}, None
+        )
+        primary_uuids: List[str] = [d.uuid for d in Device.query.all()]
+        assert primary_uuids == [created["uuid"]]
+
+    def test_device_jwt_after_activation_checks_primary(
+        self, app: Flask, client: FlaskClient, replica: ReplicaRouter
+    ) -> None:
+        # The replica has the device, but not yet the activation below.
+        device_uuid = _create_replica_device(replica)
+        with app.app_context():
+            db.session.add(Device(uuid=device_uuid, location_id="L1", description="d"))
+            db.session.commit()
+        code_response = client.post(
+            f"/dhos/v1/device/{device_uuid}/activation",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert code_response.json is not None
+        activation_response = client.post(
+            f"/dhos/v1/activation/{code_response.json['code']}?type=send_entry"
+        )
+        assert activation_response.json is not None
+
+        response = client.get(
+            f"/dhos/v1/device/{device_uuid}/jwt",
+            headers={
+                "x-authorisation-code": activation_response.json["authorisation_code"]
+            },
+        )
+        assert response.status_code == 200
+
+    def test_timeouts_are_not_retried_on_primary(
+        self, app_context: None, replica: ReplicaRouter
+    ) -> None:
+        timeout = OperationalError("SELECT", {}, Exception())
+        timeout.orig.pgcode = "57014"  # type: ignore
+        slow_query = Mock(side_effect=timeout)
+
+        with pytest.raises(OperationalError):
+            reads_from_replica(slow_query)()
+        assert slow_query.call_count == 1
+        assert replica.available()
+
+
+class TestReplicaRouter:
+    def test_retries_replica_after_failure(self, replica: ReplicaRouter) -> None:
+        now = [0.0]
+        router = ReplicaRouter(
+            replica.engine,
+            max_lag_seconds=5,
+            retry_after_seconds=10,
+            clock=lambda: now[0],
+        )
+        assert router.available()
+        router.mark_unavailable()
+        now[0] = 9.0
+        assert not router.available()
+        now[0] = 10.0
+        assert router.available()
+
+    def test_lag_is_rechecked_periodically(
+        self, replica: ReplicaRouter, mocker: MockerFixture
+    ) -> None:
+        now = [0.0]
+        router = ReplicaRouter(
+            replica.engine,
+            max_lag_seconds=5,
+            retry_after_seconds=10,
+            clock=lambda: now[0],
+        )
+        lag = mocker.patch.object(router, "replication_lag", return_value=1.0)
+        assert router.available()
+        now[0] = 5.0
+        assert router.available()
+        assert lag.call_count == 1
+        now[0] = 10.0
+        lag.return_value = 6.0
+        assert not router.available()
+        assert lag.call_count == 2
+
+
+class TestInitReadReplica:
+    def test_no_replica_by_default(self, app: Flask) -> None:
+        assert "replica_router" not in app.extensions
+
+    def test_replica_host_reuses_primary_credentials(self, app: Flask) -> None:
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql://user:pw@primary:5432/x"
+        app.config["REPLICA_DATABASE_HOST"] = "replica"
+        init_read_replica(app)
+        url = app.extensions["replica_router"].engine.url
+        assert (url.username, url.host, url.port, url.database) == (
+            "user",
+            "replica",
+            5432,
+            "x",
+        )
@@ -0,0 +1,105 @@
+from typing import List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+
+@pytest.mark.usefixtures("app")
+class TestSearchDevices:
+    def create_devices(self, client: FlaskClient, count: int) -> List[str]:
+        uuids: List[str] = []
+        for i in range(count):
+            response = client.post(
+                "/dhos/v1/device",
+                json={"location_id": "L1", "description": f"{i}"},
+                headers={"Authorization": "Bearer TOKEN"},
+            )
+            assert response.status_code == 200
+            assert response.json is not None
+            uuids.append(response.json["uuid"])
+        return uuids
+
+    def test_returns_devices_in_requested_order(self, client: FlaskClient) -> None:
+        uuids = self.create_devices(client, 3)
+        requested = [uuids[2], uuids[0], uuids[2]]
+        response = client.post(
+            "/dhos/v1/device/search",
+            json={"uuids": requested},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert [d["uuid"] for d in response.json["devices"]] == [uuids[2], uuids[0]]
+        assert response.json["missing"] == []
+
+    def test_reports_missing_devices(self, client: FlaskClient) -> None:
+        uuids = self.create_devices(client, 1)
+        response = client.post(
+            "/dhos/v1/device/search",
+            json={"uuids": ["missing-1", uuids[0], "missing-2"]},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert [d["uuid"] for d in response.json["devices"]] == uuids
+        assert response.json["missing"] == ["missing-1", "missing-2"]
+
+    def test_returns_same_fields_as_get_device(self, client: FlaskClient) -> None:
+        uuids = self.create_devices(client, 1)
+        get_response = client.get(
+            f"/dhos/v1/device/{uuids[0]}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        search_response = client.post(
+            "/dhos/v1/device/search",
+            json={"uuids": uuids},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert search_response.json is not None
+        assert search_response.json["devices"] == [get_response.json]
+
+    def test_uses_single_query(
+        self, client: FlaskClient, sql_statements: List[str]
+    ) -> None:
+        uuids = self.create_devices(client, 5)
+        sql_statements.clear()
+        client.post(
+            "/dhos/v1/device/search",
+            json={"uuids": uuids},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert len([s for s in sql_statements if "FROM device" in s]) == 1
+
+    def test_empty_search(self, client: FlaskClient) -> None:
+        response = client.post(
+            "/dhos/v1/device/search",
+            json={"uuids": []},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == {"devices": [], "missing": []}
+
+    def test_too_many_uuids_fails(self, app: Flask, client: FlaskClient) -> None:
+        uuids = [str(i) for i in range(app.config["MAX_DEVICE_PAGE_SIZE"] + 1)]
+        response = client.post(
+            "/dhos/v1/device/search",
+            json={"uuids": uuids},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_missing_uuids_fails(self, client: FlaskClient) -> None:
+        response = client.post(
+            "/dhos/v1/device/search",
+            json={},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_non_string_uuids_fail(self, client: FlaskClient) -> None:
+        response = client.post(
+            "/dhos/v1/device/search",
+            json={"uuids": [["12345"]]},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
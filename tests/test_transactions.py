@@ -0,0 +1,178 @@
+from typing import Any, Generator, List, Optional, cast
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from mock import Mock
+from pytest_mock import MockerFixture
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from dhos_activation_auth_api.blueprint_api import controller
+from dhos_activation_auth_api.helpers.transactions import (
+    READ_ONLY,
+    TransactionProfile,
+    apply_transaction_profile,
+)
+from dhos_activation_auth_api.models.device import Device
+
+
+class PgError(Exception):
+    def __init__(self, pgcode: str) -> None:
+        super().__init__(f"pgcode {pgcode}")
+        self.pgcode = pgcode
+
+
+@pytest.fixture
+def begun_profiles() -> Any:
+    """Records the transaction profile in effect as each transaction begins"""
+    profiles: List[Optional[TransactionProfile]] = []
+
+    def after_begin(session: Session, *args: Any) -> None:
+        profiles.append(session.info.get("transaction_profile"))
+
+    event.listen(Session, "after_begin", after_begin)
+    yield profiles
+    event.remove(Session, "after_begin", after_begin)
+
+
+class TestApplyTransactionProfile:
+    def test_configures_postgres_transaction(self) -> None:
+        session = Mock(
+            info={"transaction_profile": TransactionProfile(True, 5000, 2000)}
+        )
+        connection = Mock()
+        connection.dialect.name = "postgresql"
+        apply_transaction_profile(session, None, connection)
+        assert [c.args[0] for c in connection.exec_driver_sql.call_args_list] == [
+            "SET TRANSACTION READ ONLY",
+            "SET LOCAL statement_timeout = 5000",
+            "SET LOCAL lock_timeout = 2000",
+        ]
+
+    def test_read_write_transaction_only_sets_timeouts(self) -> None:
+        session = Mock(
+            info={"transaction_profile": TransactionProfile(False, 30000, 2000)}
+        )
+        connection = Mock()
+        connection.dialect.name = "postgresql"
+        apply_transaction_profile(session, None, connection)
+        assert [c.args[0] for c in connection.exec_driver_sql.call_args_list] == [
+            "SET LOCAL statement_timeout = 30000",
+            "SET LOCAL lock_timeout = 2000",
+        ]
+
+    def test_ignores_other_databases(self) -> None:
+        session = Mock(
+            info={"transaction_profile": TransactionProfile(True, 5000, 2000)}
+        )
+        connection = Mock()
+        connection.dialect.name = "sqlite"
+        apply_transaction_profile(session, None, connection)
+        connection.exec_driver_sql.assert_not_called()
+
+
+class TestTransactionProfile:
+    def test_read_endpoint_runs_in_read_only_transaction(
+        self, app: Flask, app_context: None, begun_profiles: List
+    ) -> None:
+        device = controller.create_device(
+            {"location_id": "L1", "description": "d"}, None
+        )
+        begun_profiles.clear()
+
+        assert controller.get_device(device["uuid"])["uuid"] == device["uuid"]
+        assert begun_profiles == [app.extensions["transaction_profiles"][READ_ONLY]]
+        # The read-only transaction is over, so a write can follow.
+        assert not db.session().in_transaction()
+        controller.update_device(device["uuid"], {"description": "changed"})
+
+    def test_joins_transaction_in_progress(
+        self, app_context: None, begun_profiles: List
+    ) -> None:
+        device = Device(location_id="L1", description="d")
+        db.session.add(device)
+        db.session.flush()
+
+        controller.get_device(device.uuid)
+        assert begun_profiles == [None]
+        assert db.session().in_transaction()
+        db.session.rollback()
+
+
+class TestDatabaseTimeouts:
+    @pytest.mark.parametrize(
+        "error,status_code",
+        [
+            (OperationalError("SELECT", {}, PgError("57014")), 504),
+            (OperationalError("SELECT", {}, PgError("55P03")), 503),
+            (PoolTimeoutError("QueuePool limit reached"), 503),
+        ],
+    )
+    def test_timeouts_map_to_clean_errors(
+        self,
+        client: FlaskClient,
+        mocker: MockerFixture,
+        error: Exception,
+        status_code: int,
+    ) -> None:
+        mocker.patch.object(controller, "_device_list_query", side_effect=error)
+        response = client.get(
+            "/dhos/v1/device?location_id=L1,L2",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == status_code
+        assert response.json is not None
+        assert "Database" in response.json["message"]
+        if status_code == 503:
+            assert response.headers["Retry-After"] == "1"
+
+    def test_other_operational_errors_are_unchanged(
+        self, client: FlaskClient, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(
+            controller,
+            "_device_list_query",
+            side_effect=OperationalError("SELECT", {}, Exception("gone away")),
+        )
+        response = client.get(
+            "/dhos/v1/device", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 503
+        assert response.json == {
+            "message": "Database connection failed: Service unavailable"
+        }
+
+
+class TestStreamWithProfile:
+    def test_streamed_devices_are_read_under_read_only_profile(
+        self, app: Flask, app_context: None, begun_profiles: List
+    ) -> None:
+        for description in ["a", "b"]:
+            controller.create_device(
+                {"location_id": "L1", "description": description}, None
+            )
+        begun_profiles.clear()
+
+        devices = controller.stream_devices(True, "L1")
+        # Nothing is read until the stream is consumed.
+        assert begun_profiles == []
+        assert len(list(devices)) == 2
+        assert begun_profiles == [app.extensions["transaction_profiles"][READ_ONLY]]
+        assert not db.session().in_transaction()
+        assert db.session().info.get("transaction_profile") is None
+
+    def test_abandoned_stream_ends_transaction(self, app_context: None) -> None:
+        for description in ["a", "b"]:
+            controller.create_device(
+                {"location_id": "L1", "description": description}, None
+            )
+
+        devices = cast(Generator, controller.stream_devices(True, "L1"))
+        next(devices)
+        assert db.session().in_transaction()
+        devices.close()
+        assert not db.session().in_transaction()
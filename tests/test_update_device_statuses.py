@@ -0,0 +1,130 @@
+from typing import Dict, List
+
+import pytest
+from flask.testing import FlaskClient
+from mock import Mock
+from pytest_mock import MockFixture
+
+from dhos_activation_auth_api.helpers.cache import get_cache
+
+
+@pytest.mark.usefixtures("app")
+class TestUpdateDeviceStatuses:
+    @pytest.fixture
+    def mock_audit(self, mocker: MockFixture) -> Mock:
+        return mocker.patch(
+            "dhos_activation_auth_api.blueprint_api.audit.record_sendentry_devices_update"
+        )
+
+    def create_device(self, client: FlaskClient, location_id: str) -> str:
+        response = client.post(
+            "/dhos/v1/device",
+            json={"location_id": location_id, "description": "a SEND entry device"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        return response.json["uuid"]
+
+    def update_statuses(
+        self, client: FlaskClient, body: Dict, expected_status: int = 200
+    ) -> List[str]:
+        response = client.patch(
+            "/dhos/v1/device", json=body, headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == expected_status
+        assert response.json is not None
+        return response.json.get("device_ids", [])
+
+    def get_device(self, client: FlaskClient, device_id: str) -> Dict:
+        response = client.get(
+            f"/dhos/v1/device/{device_id}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.json is not None
+        return response.json
+
+    def test_deactivates_devices_at_location(
+        self, client: FlaskClient, mock_audit: Mock, sql_statements: List[str]
+    ) -> None:
+        ward = [self.create_device(client, "L1") for _ in range(3)]
+        other = self.create_device(client, "L2")
+        original = self.get_device(client, ward[0])
+        sql_statements.clear()
+
+        device_ids = self.update_statuses(
+            client, {"active": False, "location_id": "L1"}
+        )
+
+        assert sorted(device_ids) == sorted(ward)
+        assert len([s for s in sql_statements if s.startswith("UPDATE device")]) == 1
+        mock_audit.assert_called_once_with(
+            device_ids=device_ids,
+            clinician_id="unknown",
+            updated_fields={"active": False},
+        )
+        for device_id in ward:
+            device = self.get_device(client, device_id)
+            assert device["active"] is False
+            assert device["modified"] > original["modified"]
+        assert self.get_device(client, other)["active"] is True
+
+    def test_activates_devices_by_uuid(
+        self, client: FlaskClient, mock_audit: Mock
+    ) -> None:
+        device_ids = [self.create_device(client, "L1") for _ in range(3)]
+        self.update_statuses(client, {"active": False, "location_id": "L1"})
+
+        changed = self.update_statuses(
+            client, {"active": True, "uuids": device_ids[:2] + ["unknown"]}
+        )
+
+        assert sorted(changed) == sorted(device_ids[:2])
+        assert self.get_device(client, device_ids[2])["active"] is False
+
+    def test_update_rechecks_criteria(
+        self, client: FlaskClient, mock_audit: Mock, sql_statements: List[str]
+    ) -> None:
+        self.create_device(client, "L1")
+        sql_statements.clear()
+
+        self.update_statuses(client, {"active": False, "location_id": "L1"})
+
+        updates = [s for s in sql_statements if s.startswith("UPDATE device")]
+        assert len(updates) == 1
+        # The UPDATE filters on the location and status itself, rather than on a list
+        # of UUIDs selected earlier.
+        assert "location_id = " in updates[0]
+        assert "active IS NOT" in updates[0]
+        assert " IN (" not in updates[0]
+
+    def test_unchanged_devices_are_not_updated(
+        self, client: FlaskClient, mock_audit: Mock
+    ) -> None:
+        self.create_device(client, "L1")
+        assert self.update_statuses(client, {"active": True, "location_id": "L1"}) == []
+        mock_audit.assert_not_called()
+
+    def test_invalidates_device_summary_cache(
+        self, client: FlaskClient, mock_audit: Mock
+    ) -> None:
+        self.create_device(client, "L1")
+        client.get("/dhos/v1/device/summary", headers={"Authorization": "Bearer TOKEN"})
+        self.update_statuses(client, {"active": False, "location_id": "L1"})
+
+        response = client.get(
+            "/dhos/v1/device/summary", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.json == [{"location_id": "L1", "active": 0, "inactive": 1}]
+        assert get_cache("device_summary").hits == 0
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"active": False},
+            {"active": False, "location_id": "L1", "uuids": ["1"]},
+            {"location_id": "L1"},
+            {"active": False, "uuids": [1]},
+        ],
+    )
+    def test_rejects_invalid_request(self, client: FlaskClient, body: Dict) -> None:
+        self.update_statuses(client, body, expected_status=400)
@@ -1,4 +1,6 @@
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Callable
 
 import pytest
 
@@ -52,6 +54,36 @@ def test_generate_secure_random_string_too_short() -> None:
         utils.generate_secure_random_string(length)
 
 
+def test_generate_secure_numeric_string() -> None:
+    secure_random_string = utils.generate_secure_numeric_string(6)
+    assert len(secure_random_string) == 6
+    assert secure_random_string.isdigit()
+
+
+@pytest.mark.parametrize(
+    "generate,alphabet",
+    [
+        (utils.generate_secure_random_string, utils.random_choices),
+        (utils.generate_secure_human_readable_string, utils.human_readable_choices),
+        (utils.generate_secure_numeric_string, utils.numeric_choices),
+    ],
+)
+def test_generate_secure_string_is_uniform(generate: Callable, alphabet: str) -> None:
+    samples = "".join(generate(100) for _ in range(2000))
+    counts = Counter(samples)
+    assert set(counts) == set(alphabet)
+
+    # Pearson's chi-squared goodness of fit against a uniform distribution, compared
+    # with the 99.99th percentile of the chi-squared distribution (Wilson-Hilferty
+    # approximation), so an unbiased generator fails spuriously once in 10,000 runs.
+    expected = len(samples) / len(alphabet)
+    chi_squared = sum((counts[c] - expected) ** 2 / expected for c in alphabet)
+    dof = len(alphabet) - 1
+    z = 3.719
+    threshold = dof * (1 - 2 / (9 * dof) + z * (2 / (9 * dof)) ** 0.5) ** 3
+    assert chi_squared < threshold
+
+
 # AUTHORISATION CODE HASH
 
 
@@ -63,6 +95,33 @@ def test_hash_authorisation_code_match() -> None:
     )
 
 
+def test_hash_credential_is_versioned_and_salted() -> None:
+    first = utils.hash_credential("12345678901234567890")
+    second = utils.hash_credential("12345678901234567890")
+    assert len(first) == 49
+    assert first[0] == utils.CREDENTIAL_HASH_VERSION
+    assert first != second
+    assert not utils.is_legacy_credential_hash(first)
+
+
+def test_verify_credential() -> None:
+    stored_hash = utils.hash_credential("12345678901234567890")
+    assert utils.verify_credential("12345678901234567890", stored_hash)
+    assert not utils.verify_credential("12345678901234567890x", stored_hash)
+    assert not utils.verify_credential("12345678901234567890", None)
+
+
+def test_verify_legacy_credential() -> None:
+    code = "12345678901234567890"
+    salt = "1234567890987654321123456789098765432"
+    stored_hash = utils.hash_ascii_with_salt(code, salt)
+    assert isinstance(stored_hash, bytes)
+    assert utils.is_legacy_credential_hash(stored_hash)
+    assert utils.verify_credential(code, stored_hash, salt)
+    assert not utils.verify_credential("wrong", stored_hash, salt)
+    assert not utils.verify_credential(code, stored_hash)
+
+
 # EXPIRY DATE
 
 
@@ -76,3 +135,34 @@ def test_calculate_end_of_day_expiry() -> None:
     )
 
     assert expiry_datetime == correct_expiry_datetime
+
+
+# KEYSET CURSORS
+
+
+def test_keyset_cursor_round_trip() -> None:
+    timestamp = datetime(2020, 1, 2, 3, 4, 5, 678)
+    cursor = utils.encode_keyset_cursor(timestamp, "some-uuid")
+    assert utils.decode_keyset_cursor(cursor) == (timestamp, "some-uuid")
+
+
+def test_keyset_cursor_ignores_timezone() -> None:
+    timestamp = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    cursor = utils.encode_keyset_cursor(timestamp, "some-uuid")
+    assert utils.decode_keyset_cursor(cursor) == (
+        timestamp.replace(tzinfo=None),
+        "some-uuid",
+    )
+
+
+def test_keyset_cursor_without_timestamp() -> None:
+    cursor = utils.encode_keyset_cursor(None, "some-uuid")
+    assert utils.decode_nullable_keyset_cursor(cursor) == (None, "some-uuid")
+    with pytest.raises(ValueError):
+        utils.decode_keyset_cursor(cursor)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "bm8tc2VwYXJhdG9y", "é"])
+def test_decode_invalid_keyset_cursor(cursor: str) -> None:
+    with pytest.raises(ValueError):
+        utils.decode_keyset_cursor(cursor)
@@ -0,0 +1,78 @@
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+from dhos_activation_auth_api.models.device_activation import DeviceActivation
+from dhos_activation_auth_api.models.types import (
+    INVALID_UUID,
+    UUIDString,
+    validate_identifier,
+)
+
+
+class TestUUIDString:
+    @pytest.mark.parametrize(
+        "value,stored",
+        [
+            (
+                "a7c4c7b2-4b8e-4f9b-9f3e-2d8b7a6c5e41",
+                "a7c4c7b2-4b8e-4f9b-9f3e-2d8b7a6c5e41",
+            ),
+            ("static_patient_uuid_3", "00000000-0000-0000-0001-000000000003"),
+            ("static_device_uuid_D9", "00000000-0000-0000-0002-000000000009"),
+            ("not-a-uuid", INVALID_UUID),
+            (None, None),
+        ],
+    )
+    def test_postgresql_round_trip(self, value: str, stored: str) -> None:
+        dialect = postgresql.dialect()
+        uuid_string = UUIDString()
+        assert uuid_string.process_bind_param(value, dialect) == stored
+        if value != "not-a-uuid":
+            assert uuid_string.process_result_value(stored, dialect) == value
+
+    def test_other_databases_store_strings(self) -> None:
+        dialect = sqlite.dialect()
+        assert UUIDString().process_bind_param("not-a-uuid", dialect) == "not-a-uuid"
+
+    def test_keys_are_native_uuids_on_postgresql(self) -> None:
+        ddl = str(
+            CreateTable(DeviceActivation.__table__).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+        assert "uuid UUID NOT NULL" in ddl
+        assert "device_id UUID" in ddl
+
+
+class TestValidateIdentifier:
+    @pytest.mark.parametrize(
+        "value", ["a7c4c7b2-4b8e-4f9b-9f3e-2d8b7a6c5e41", "static_patient_uuid_1"]
+    )
+    def test_accepts_storable_ids(self, mocker: MockerFixture, value: str) -> None:
+        mocker.patch(
+            "dhos_activation_auth_api.models.types.stores_native_uuids",
+            return_value=True,
+        )
+        validate_identifier("patient_id", value)
+
+    def test_rejects_other_ids_on_postgresql(self, mocker: MockerFixture) -> None:
+        mocker.patch(
+            "dhos_activation_auth_api.models.types.stores_native_uuids",
+            return_value=True,
+        )
+        with pytest.raises(ValueError, match="patient_id must be a UUID"):
+            validate_identifier("patient_id", "not-a-uuid")
+
+    def test_accepts_any_id_elsewhere(self, mocker: MockerFixture) -> None:
+        mocker.patch(
+            "dhos_activation_auth_api.models.types.stores_native_uuids",
+            return_value=False,
+        )
+        validate_identifier("patient_id", "not-a-uuid")
+
+    @pytest.mark.parametrize("value", [["a7c4c7b2-4b8e-4f9b-9f3e-2d8b7a6c5e41"], 1])
+    def test_rejects_values_that_are_not_strings(self, value: object) -> None:
+        with pytest.raises(ValueError, match="patient_id must be a string"):
+            validate_identifier("patient_id", value)
@@ -0,0 +1,126 @@
+from typing import Dict, List
+
+import pytest
+from flask_batteries_included.helpers.error_handler import EntityNotFoundException
+from flask_batteries_included.sqldb import db
+from mock import Mock
+from pytest_mock import MockFixture
+from sqlalchemy.dialects import postgresql
+
+from dhos_activation_auth_api.blueprint_api import controller
+
+
+def _selects(statements: List[str]) -> List[str]:
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+@pytest.mark.usefixtures("app_context")
+class TestWriteRoundTrips:
+    """
+    Write paths should build their responses from the state they have just written,
+    rather than reloading it from the database after committing.
+    """
+
+    @pytest.fixture(autouse=True)
+    def mock_audit(self, mocker: MockFixture) -> None:
+        mocker.patch(
+            "dhos_activation_auth_api.blueprint_api.audit.record_sendentry_device_update"
+        )
+
+    def test_create_device_is_one_statement(self, sql_statements: List[str]) -> None:
+        device = controller.create_device(
+            {"location_id": "L1", "description": "tablet"}, None
+        )
+
+        assert len(sql_statements) == 1
+        assert sql_statements[0].startswith("INSERT INTO device")
+        assert device == controller.get_device(device["uuid"])
+
+    def test_update_device_is_one_statement_with_returning(
+        self, mocker: MockFixture
+    ) -> None:
+        device = controller.create_device(
+            {"location_id": "L1", "description": "tablet"}, None
+        )
+        mocker.patch.object(db.session().get_bind().dialect, "full_returning", True)
+        execute = mocker.patch.object(db.session, "execute")
+        execute.return_value.first.return_value = Mock(
+            uuid=device["uuid"],
+            created=device["created"],
+            created_by_=device["created_by"],
+            modified=device["modified"],
+            modified_by_=device["modified_by"],
+            location_id="L2",
+            description="tablet",
+            active=True,
+        )
+
+        updated = controller.update_device(device["uuid"], {"location_id": "L2"})
+
+        execute.assert_called_once()
+        statement = str(execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert statement.startswith("UPDATE device SET ")
+        assert "WHERE device.uuid = " in statement
+        assert "RETURNING device.uuid, device.created" in statement
+        assert updated == {**device, "location_id": "L2"}
+
+    def test_update_missing_device_with_returning_fails(
+        self, mocker: MockFixture
+    ) -> None:
+        mocker.patch.object(db.session().get_bind().dialect, "full_returning", True)
+        execute = mocker.patch.object(db.session, "execute")
+        execute.return_value.first.return_value = None
+        with pytest.raises(EntityNotFoundException):
+            controller.update_device("missing", {"location_id": "L2"})
+
+    def test_update_device_without_returning_does_not_reload(
+        self, sql_statements: List[str]
+    ) -> None:
+        device_uuid = controller.create_device(
+            {"location_id": "L1", "description": "tablet"}, None
+        )["uuid"]
+        sql_statements.clear()
+
+        device = controller.update_device(device_uuid, {"location_id": "L2"})
+
+        # The SELECT that finds the device, then the UPDATE, and nothing else.
+        assert len(sql_statements) == 2
+        assert sql_statements[1].startswith("UPDATE device")
+        assert device["location_id"] == "L2"
+        assert device == controller.get_device(device_uuid)
+
+    def test_create_clinician_reads_are_batched(
+        self, sample_clinician: Dict, sql_statements: List[str]
+    ) -> None:
+        controller.create_clinician(
+            {
+                **sample_clinician,
+                "products": ["SEND", "GDM", "DBM"],
+                "groups": ["send clinician", "gdm clinician"],
+            }
+        )
+
+        # The duplicate check, then one lookup each for products and groups.
+        assert len(_selects(sql_statements)) == 3
+
+    def test_update_clinician_reads_are_batched(
+        self,
+        sample_clinician: Dict,
+        sample_clinician_update: Dict,
+        sql_statements: List[str],
+    ) -> None:
+        controller.create_clinician(sample_clinician)
+        sql_statements.clear()
+
+        controller.update_clinician(
+            sample_clinician["clinician_id"],
+            {
+                **sample_clinician_update,
+                "products": ["SEND", "GDM", "DBM"],
+                "groups": ["send clinician", "gdm clinician"],
+            },
+        )
+
+        # The clinician, its current products and groups, then one lookup each for the
+        # new products and groups.
+        assert len(_selects(sql_statements)) == 5